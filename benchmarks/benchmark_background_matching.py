@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 15:08:31 2026
+
+@author: kaisjuli
+
+Compares the nested loop of the indirect mapping with the indexed background matching
+for a dense sample and background. The nested loop is only timed for a part of the
+sample scans and extrapolated. Run from the repository root with
+    python -m benchmarks.benchmark_background_matching [number of scans]
+"""
+import sys
+import time
+import numpy as np
+
+from src.calculation import match_background
+
+def match_nested(sample_temperature : np.ndarray,
+                 sample_field : np.ndarray,
+                 sample_direction : np.ndarray,
+                 background_temperature : np.ndarray,
+                 background_field : np.ndarray,
+                 background_direction : np.ndarray,
+                 max_temp_diff : float = 0.1,
+                 max_field_diff : float = 10
+    ) -> np.ndarray:
+    '''
+    Matches the sample scans like the nested loop of the indirect mapping did.
+
+    Parameters
+    ----------
+    sample_temperature : np.ndarray
+        The temperatures of the sample scans.
+    sample_field : np.ndarray
+        The fields of the sample scans.
+    sample_direction : np.ndarray
+        The scan directions of the sample scans.
+    background_temperature : np.ndarray
+        The temperatures of the background scans.
+    background_field : np.ndarray
+        The fields of the background scans.
+    background_direction : np.ndarray
+        The scan directions of the background scans.
+    max_temp_diff : float, optional
+        The maximum temperature difference. The default is 0.1.
+    max_field_diff : float, optional
+        The maximum field difference. The default is 10.
+
+    Returns
+    -------
+    np.ndarray
+        The index of the matching background scan of every sample scan, -1 if there is
+        none.
+
+    '''
+    matches : list[int] = []
+    for temp, field, direction in zip(sample_temperature, sample_field, sample_direction):
+        bg : int = -1
+        best : float = np.inf
+        for index, (b_temp, b_field, b_direction) in enumerate(zip(background_temperature, background_field, background_direction)):
+            if abs(b_temp - temp) < max_temp_diff and abs(b_field - field) < max_field_diff and b_direction == direction:
+                diff_1 : float = abs(b_temp - temp) / temp
+                diff_2 : float = abs(b_field - field) / abs(field) if abs(field) > 1 else abs(b_field - field)
+                if diff_1 + diff_2 < best:
+                    bg, best = index, diff_1 + diff_2
+        matches.append(bg)
+    return np.array(matches)
+
+if __name__ == "__main__":
+    nr_scans : int = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng : np.random.Generator = np.random.default_rng(0)
+    background_temperature : np.ndarray = np.linspace(2, 300, nr_scans)
+    background_field : np.ndarray = np.full(nr_scans, 1000.0)
+    background_direction : np.ndarray = np.where(np.arange(nr_scans) % 2 == 0, "up", "down")
+    sample_temperature : np.ndarray = background_temperature + rng.normal(0, 0.02, nr_scans)
+    sample_field : np.ndarray = background_field + rng.normal(0, 1, nr_scans)
+    sample_direction : np.ndarray = background_direction[rng.permutation(nr_scans)]
+
+    start : float = time.perf_counter()
+    matches : np.ndarray = match_background(sample_temperature, sample_field, background_temperature, background_field,
+                                            0.1, 10, sample_direction, background_direction)
+    t_indexed : float = time.perf_counter() - start
+    nr_timed : int = min(nr_scans, 50)
+    start : float = time.perf_counter()
+    nested : np.ndarray = match_nested(sample_temperature[:nr_timed], sample_field[:nr_timed], sample_direction[:nr_timed],
+                                       background_temperature, background_field, background_direction)
+    t_nested : float = (time.perf_counter() - start) * nr_scans / nr_timed
+    print("{0} sample scans, {0} background scans, {1} unmatched".format(nr_scans, np.sum(matches < 0)))
+    print("nested loop {:8.2f} s (extrapolated)   indexed {:7.3f} s   speedup {:6.0f}x".format(
+        t_nested, t_indexed, t_nested / t_indexed))
+    print("same matches as the nested loop: {}".format(bool(np.all(nested == matches[:nr_timed]))))
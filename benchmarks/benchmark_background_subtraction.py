@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 16:42:15 2026
+
+@author: kaisjuli
+
+Compares subtracting the background of every datapoint on its own with the batch
+subtraction on shared position grids. Run from the repository root with
+    python -m benchmarks.benchmark_background_subtraction [sample raw datafile] [background raw datafile]
+Without raw datafiles synthetic files are used.
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+from src.data import RawDataFile
+from src.calculation import subtract_background, subtract_backgrounds
+from .synthetic import write_synthetic_raw_datafile
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        filenames : list[str] = sys.argv[1:3]
+        if len(filenames) == 0:
+            filenames : list[str] = [os.path.join(directory, "sample.rw.dat"), os.path.join(directory, "background.rw.dat")]
+            write_synthetic_raw_datafile(filenames[0], 20000, amplitude=0.5, seed=1)
+            write_synthetic_raw_datafile(filenames[1], 20000, amplitude=0.05, seed=2)
+        sample_rdf : RawDataFile = RawDataFile(filenames[0])
+        background_rdf : RawDataFile = RawDataFile(filenames[1])
+    nr_datapoints : int = min(len(sample_rdf), len(background_rdf))
+    sample_rdps : list = sample_rdf[:nr_datapoints]
+    background_rdps : list = background_rdf[:nr_datapoints]
+    nr_grids : int = len({(s.raw_position.tobytes(), b.raw_position.tobytes()) for s, b in zip(sample_rdps, background_rdps)})
+    print("{} datapoints, {} different pairs of position grids".format(nr_datapoints, nr_grids))
+
+    start : float = time.perf_counter()
+    single : list = [subtract_background(s, b) for s, b in zip(sample_rdps, background_rdps)]
+    t_single : float = time.perf_counter() - start
+    start : float = time.perf_counter()
+    batch : list = subtract_backgrounds(sample_rdps, background_rdps)
+    t_batch : float = time.perf_counter() - start
+    identical : bool = all(np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1]) for a, b in zip(single, batch))
+    print("one by one {:7.3f} s   batch {:7.3f} s   speedup {:5.1f}x   identical {}".format(
+        t_single, t_batch, t_single / t_batch, identical))
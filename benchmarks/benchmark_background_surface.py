@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 16:52:40 2026
+
+@author: kaisjuli
+
+Compares the direct and the indirect mapping of a dense sample sweep on a sparse and a
+dense background run with the background surface of the sparse run. Reports the covered
+sample scans, the time and the error of the backgrounds towards the noiseless background
+signal. Run from the repository root with
+    python -m benchmarks.benchmark_background_surface [background temperature step in K]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+from src.data import RawDataFile, BackgroundSurface
+from src.calculation import match_background, gradiometer_function
+from src.constants import DIRECT_MAPPING_MAX_TEMP_DIFF, DIRECT_MAPPING_MAX_FIELD_DIFF
+from src.constants import INDIRECT_MAPPING_MAX_TEMP_DIFF, INDIRECT_MAPPING_MAX_FIELD_DIFF
+from .synthetic import write_synthetic_raw_datafile
+
+BACKGROUND_AMPLITUDE : float = 0.05
+BACKGROUND_CURIE_CONSTANT : float = 0.2
+
+def true_background(position : np.ndarray, temperature : np.ndarray) -> np.ndarray:
+    '''
+    Calculates the noiseless background signal of the synthetic files.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The positions in mm.
+    temperature : np.ndarray
+        The temperatures in K.
+
+    Returns
+    -------
+    np.ndarray
+        The signal at the positions, one row per temperature.
+
+    '''
+    return np.array([gradiometer_function(position, BACKGROUND_AMPLITUDE + BACKGROUND_CURIE_CONSTANT / temp, 0.01, 1e-5, 37.5)
+                     for temp in temperature])
+
+def rms_error(backgrounds : list, temperature : np.ndarray) -> float:
+    '''
+    Calculates the root mean square error of background scans towards the noiseless
+    background signal at the sample temperatures.
+
+    Parameters
+    ----------
+    backgrounds : list[RawDataPoint]
+        The background scans.
+    temperature : np.ndarray
+        The temperatures of the sample scans in K.
+
+    Returns
+    -------
+    float
+        The root mean square error in V.
+
+    '''
+    errors : list[np.ndarray] = [rdp.raw_voltage - true_background(rdp.raw_position, [temp])[0]
+                                 for rdp, temp in zip(backgrounds, temperature)]
+    return float(np.sqrt(np.mean(np.concatenate(errors)**2)))
+
+def match_direct(samples : list, backgrounds : list) -> np.ndarray:
+    '''
+    Matches the sample scans with the background scans like the direct mapping, i.e.
+    every sample scan with the background scan of the same index.
+
+    Parameters
+    ----------
+    samples : list[RawDataPoint]
+        The sample scans.
+    backgrounds : list[RawDataPoint]
+        The background scans.
+
+    Returns
+    -------
+    np.ndarray
+        The index of the matching background scan of every sample scan, -1 if there is
+        none.
+
+    '''
+    matches : np.ndarray = np.full(len(samples), -1)
+    for index, (s, b) in enumerate(zip(samples, backgrounds)):
+        if abs(s.temperature - b.temperature) <= DIRECT_MAPPING_MAX_TEMP_DIFF and abs(s.field - b.field) <= DIRECT_MAPPING_MAX_FIELD_DIFF:
+            matches[index] = index
+    return matches
+
+def match_indirect(samples : list, backgrounds : list) -> np.ndarray:
+    '''
+    Matches the sample scans with the background scans like the indirect mapping.
+
+    Parameters
+    ----------
+    samples : list[RawDataPoint]
+        The sample scans.
+    backgrounds : list[RawDataPoint]
+        The background scans.
+
+    Returns
+    -------
+    np.ndarray
+        The index of the matching background scan of every sample scan, -1 if there is
+        none.
+
+    '''
+    return match_background([s.temperature for s in samples], [s.field for s in samples],
+                            [b.temperature for b in backgrounds], [b.field for b in backgrounds],
+                            INDIRECT_MAPPING_MAX_TEMP_DIFF, INDIRECT_MAPPING_MAX_FIELD_DIFF,
+                            [s.scan_direction for s in samples], [b.scan_direction for b in backgrounds])
+
+if __name__ == "__main__":
+    temp_step : float = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    with tempfile.TemporaryDirectory() as directory:
+        filenames : list[str] = [os.path.join(directory, name) for name in ("sample.rw.dat", "sparse.rw.dat", "dense.rw.dat")]
+        write_synthetic_raw_datafile(filenames[0], 2981, amplitude=0.5, temp_step=0.1, seed=1)
+        write_synthetic_raw_datafile(filenames[1], int(298 / temp_step) + 1, amplitude=BACKGROUND_AMPLITUDE, temp_step=temp_step,
+                                     seed=2, curie_constant=BACKGROUND_CURIE_CONSTANT)
+        write_synthetic_raw_datafile(filenames[2], 2981, amplitude=BACKGROUND_AMPLITUDE, temp_step=0.1, seed=3,
+                                     curie_constant=BACKGROUND_CURIE_CONSTANT)
+        samples, sparse, dense = (RawDataFile(filename)[:] for filename in filenames)
+    temperature : np.ndarray = np.array([s.temperature for s in samples])
+    print("{} sample scans every 0.1 K, sparse background every {} K, dense background every 0.1 K".format(
+        len(samples), temp_step))
+
+    for name, match, backgrounds in (("direct sparse", match_direct, sparse), ("direct dense", match_direct, dense),
+                                     ("indirect sparse", match_indirect, sparse), ("indirect dense", match_indirect, dense)):
+        start : float = time.perf_counter()
+        matches : np.ndarray = match(samples, backgrounds)
+        duration : float = time.perf_counter() - start
+        matched : np.ndarray = np.flatnonzero(matches >= 0)
+        print("{:16} {:5} covered   {:7.3f} s   rms error {:.2e} V".format(
+            name, len(matched), duration, rms_error([backgrounds[index] for index in matches[matched]], temperature[matched])))
+
+    start : float = time.perf_counter()
+    surface : BackgroundSurface = BackgroundSurface(sparse)
+    rdps, errors = surface.backgrounds(temperature, [s.field for s in samples], [s.scan_direction for s in samples])
+    duration : float = time.perf_counter() - start
+    covered : np.ndarray = np.array([index for index, rdp in enumerate(rdps) if rdp is not None])
+    print("{:16} {:5} covered   {:7.3f} s   rms error {:.2e} V   estimated {:.2e} V".format(
+        "surface sparse", len(covered), duration, rms_error([rdps[index] for index in covered], temperature[covered]),
+        surface.accuracy))
+    start : float = time.perf_counter()
+    surface.backgrounds(temperature, [s.field for s in samples], [s.scan_direction for s in samples])
+    print("{:16} {:5} cached    {:7.3f} s".format("surface again", len(surface), time.perf_counter() - start))
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 11:02:48 2026
+
+@author: kaisjuli
+
+Compares the exact evaluation of the gradiometer function and its Jacobian with the
+kernel table and checks the interpolation errors against their bounds. Run from the
+repository root with
+    python -m benchmarks.benchmark_gradiometer_kernel [raw datafile]
+Without a raw datafile a synthetic file is used.
+"""
+import os
+import sys
+import time
+import tempfile
+from typing import Callable
+import numpy as np
+
+from src import constants
+from src.data import RawDataFile
+from src.calculation import (pad_signals, fit_signals, gradiometer_function, gradiometer_kernel,
+                             gradiometer_kernel_error_bounds, evaluate_gradiometer)
+from src.calculation import batch_fit
+from src.calculation.gradiometer_kernel import _exact_kernel
+from .synthetic import write_synthetic_raw_datafile
+
+def exact_jacobian(position : np.ndarray, mask : np.ndarray, params : np.ndarray) -> np.ndarray:
+    '''
+    The Jacobian of the batched fit calculated exactly like before the kernel table.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The padded positions, one row per signal.
+    mask : np.ndarray
+        Which points of the rows are valid.
+    params : np.ndarray
+        The parameters of every signal.
+
+    Returns
+    -------
+    np.ndarray
+        The derivatives of every signal at every position with respect to A, S, m and C.
+
+    '''
+    A, S, m, C = (params[:, column, None] for column in range(4))
+    dipole, dipole_derivative = _exact_kernel(position - C, constants.COIL_RADIUS, constants.COIL_DISTANCE)
+    return np.stack((dipole, np.ones_like(dipole), position, -A * dipole_derivative), axis=-1) * mask[..., None]
+
+def best_time(function : Callable, repeat : int = 5) -> float:
+    '''
+    The shortest wall time of several calls.
+
+    Parameters
+    ----------
+    function : Callable
+        The function to call without arguments.
+    repeat : int, optional
+        The number of calls. The default is 5.
+
+    Returns
+    -------
+    float
+        The shortest wall time.
+
+    '''
+    times : list[float] = []
+    for _ in range(repeat):
+        start : float = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        filename : str = sys.argv[1] if len(sys.argv) > 1 else os.path.join(directory, "synthetic.rw.dat")
+        if len(sys.argv) == 1:
+            write_synthetic_raw_datafile(filename, 5000, amplitude=0.05)
+        datapoints : list = RawDataFile(filename).datapoints
+    position, voltage, mask = pad_signals([rdp.raw_position for rdp in datapoints],
+                                          [rdp.raw_voltage for rdp in datapoints])
+    p0 : np.ndarray = np.array([[0, np.mean(rdp.raw_voltage), 0, rdp.given_center] for rdp in datapoints])
+    u : np.ndarray = position - p0[:, 3, None]
+    print("{} scans, {} points".format(*position.shape))
+
+    t_table : float = best_time(lambda: gradiometer_kernel(u, True))
+    t_exact : float = best_time(lambda: _exact_kernel(u, constants.COIL_RADIUS, constants.COIL_DISTANCE))
+    print("signal and derivative   exact {:7.4f} s   table {:7.4f} s   speedup {:4.1f}x".format(
+        t_exact, t_table, t_exact / t_table))
+    t_table : float = best_time(lambda: evaluate_gradiometer(position, p0))
+    t_exact : float = best_time(lambda: gradiometer_function(position, *p0[:, :, None].transpose(1, 0, 2)))
+    print("signal only             exact {:7.4f} s   table {:7.4f} s   speedup {:4.1f}x".format(
+        t_exact, t_table, t_exact / t_table))
+
+    distances : np.ndarray = np.linspace(-constants.GRADIOMETER_KERNEL_EXTENT, constants.GRADIOMETER_KERNEL_EXTENT, 2000001)
+    signal, derivative = gradiometer_kernel(distances, True)
+    exact_signal, exact_derivative = _exact_kernel(distances, constants.COIL_RADIUS, constants.COIL_DISTANCE)
+    signal_bound, derivative_bound = gradiometer_kernel_error_bounds()
+    print("largest error of the signal {:.2e} (bound {:.2e}), of the derivative {:.2e} (bound {:.2e})".format(
+        np.max(np.abs(signal - exact_signal)), signal_bound, np.max(np.abs(derivative - exact_derivative)), derivative_bound))
+
+    table_jacobian : Callable = batch_fit._jacobian
+    popt_table, _, _ = fit_signals(position, voltage, p0, mask)
+    t_table : float = best_time(lambda: fit_signals(position, voltage, p0, mask), 3)
+    batch_fit._jacobian = exact_jacobian
+    try:
+        popt_exact, _, _ = fit_signals(position, voltage, p0, mask)
+        t_exact : float = best_time(lambda: fit_signals(position, voltage, p0, mask), 3)
+    finally:
+        batch_fit._jacobian = table_jacobian
+    valid : np.ndarray = ~(np.isnan(popt_table).any(axis=1) | np.isnan(popt_exact).any(axis=1))
+    deviation : float = np.max(np.abs(popt_table[valid, 0] - popt_exact[valid, 0]) / np.abs(popt_exact[valid, 0]))
+    print("batched fits            exact {:7.3f} s   table {:7.3f} s   speedup {:4.1f}x".format(
+        t_exact, t_table, t_exact / t_table))
+    print("largest relative deviation of the amplitudes {:.2e}".format(deviation))
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:37:05 2026
+
+@author: kaisjuli
+
+Compares the free-center fit with finite-difference derivatives and with the analytic
+Jacobian. Run from the repository root with
+    python -m benchmarks.benchmark_jacobian [raw datafiles ...]
+Without raw datafiles a synthetic file is used.
+"""
+import os
+import sys
+import time
+import tempfile
+import warnings
+from typing import Callable
+import numpy as np
+from scipy.optimize import curve_fit, OptimizeWarning
+
+from src.data import RawDataFile
+from src.calculation import gradiometer_function, gradiometer_jacobian
+from .synthetic import write_synthetic_raw_datafile
+
+def fit_corpus(scans : list[tuple[np.ndarray, np.ndarray, float]], jac : Callable | None) -> tuple[float, list]:
+    '''
+    Fits all scans with a free center like fit_signal does.
+
+    Parameters
+    ----------
+    scans : list[tuple[np.ndarray, np.ndarray, float]]
+        The positions, voltages and given centers of the scans.
+    jac : Callable | None
+        The Jacobian passed to curve_fit or None for finite differences.
+
+    Returns
+    -------
+    tuple(float, list)
+        The wall time and the fitted parameters, the number of function evaluations
+        and the number of Jacobian evaluations of every scan. Failed fits are None.
+
+    '''
+    results : list = []
+    start : float = time.perf_counter()
+    for position, voltage, center in scans:
+        try:
+            popt, _, infodict, _, _ = curve_fit(gradiometer_function, position, voltage, jac=jac, full_output=True,
+                                                p0=[0, np.mean(voltage), 0, center])
+            results.append((popt, infodict["nfev"], infodict.get("njev", 0)))
+        except RuntimeError:
+            results.append(None)
+    return time.perf_counter() - start, results
+
+def load_corpus(filenames : list[str]) -> list[tuple[np.ndarray, np.ndarray, float]]:
+    '''
+    Reads the positions, voltages and given centers of all scans of the raw datafiles.
+
+    Parameters
+    ----------
+    filenames : list[str]
+        The filenames of the raw datafiles.
+
+    Returns
+    -------
+    list[tuple[np.ndarray, np.ndarray, float]]
+        The positions, voltages and given centers of the scans.
+
+    '''
+    scans : list[tuple[np.ndarray, np.ndarray, float]] = []
+    for filename in filenames:
+        for rdp in RawDataFile(filename).datapoints:
+            scans.append((rdp.raw_position, rdp.raw_voltage, rdp.given_center))
+    return scans
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", OptimizeWarning)
+    with tempfile.TemporaryDirectory() as directory:
+        filenames : list[str] = sys.argv[1:]
+        if len(filenames) == 0:
+            filenames : list[str] = [os.path.join(directory, "synthetic.rw.dat")]
+            write_synthetic_raw_datafile(filenames[0], 2000, amplitude=0.05)
+        scans : list[tuple[np.ndarray, np.ndarray, float]] = load_corpus(filenames)
+
+    t_old, old = fit_corpus(scans, None)
+    t_new, new = fit_corpus(scans, gradiometer_jacobian)
+    both : list[tuple] = [(o, n) for o, n in zip(old, new) if o is not None and n is not None]
+    deviation : float = max(np.max(np.abs(o[0] - n[0]) / (np.abs(o[0]) + 1e-12)) for o, n in both)
+    print("{} scans, failed fits: finite differences {}, analytic {}".format(
+        len(scans), old.count(None), new.count(None)))
+    print("function evaluations per fit: finite differences {:.1f}, analytic {:.1f} (+{:.1f} Jacobian)".format(
+        np.mean([o[1] for o, _ in both]), np.mean([n[1] for _, n in both]), np.mean([n[2] for _, n in both])))
+    print("free-center fits  finite differences {:8.3f} s   analytic {:8.3f} s   speedup {:5.1f}x".format(
+        t_old, t_new, t_old / t_new))
+    print("largest relative deviation of the parameters {:.2e}".format(deviation))
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:58:14 2026
+
+@author: kaisjuli
+
+Compares the per-scan jump correction with the jump correction of all scans at once.
+Run from the repository root with
+    python -m benchmarks.benchmark_jump_correction [nr_scans] [jump_probability]
+"""
+import os
+import sys
+import tempfile
+import numpy as np
+
+from src.calculation import sort_scans, correct_jumps
+from src.data.rawdataparser import read_header, parse_data_section
+from .synthetic import write_synthetic_raw_datafile
+from .benchmark_rawdatafile import best_of
+
+def correct_jumps_per_scan(data : np.ndarray) -> tuple[np.ndarray, bool]:
+    '''
+    The former jump correction of a single scan with one Polynomial.fit per jump.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        The rows of the scan sorted by the raw position.
+
+    Returns
+    -------
+    tuple(np.ndarray, bool)
+        The corrected rows and if a jump was corrected.
+
+    '''
+    jump_corrected : bool = False
+    data : np.ndarray = data[np.abs(data[:, 2]) < 500, :]
+
+    mean_diff : float = np.mean(np.abs(np.diff(data[:, 2])))
+    jump_index : np.ndarray = np.argwhere(np.abs(np.diff(data[:, 2])) > 10 * mean_diff)
+
+    for index in jump_index.flatten():
+        jump_corrected : bool = True
+        if index > 9:
+            fit_data : np.ndarray = data[index-9:index+1, 1:3]
+            fit_func : np.polynomial.Polynomial = np.polynomial.Polynomial.fit(fit_data[:, 0], fit_data[:, 1], 2)
+            y_goal : np.ndarray = fit_func(data[index+1, 1])
+            data[index+1:, 2] += y_goal - data[index+1, 2]
+        else:
+            fit_data : np.ndarray = data[index+1:index+11, 1:3]
+            fit_func : np.polynomial.Polynomial = np.polynomial.Polynomial.fit(fit_data[:, 0], fit_data[:, 1], 2)
+            y_goal : np.ndarray = fit_func(data[index, 1])
+            data[:index, 2] += y_goal - data[index, 2]
+    return data, jump_corrected
+
+def correct_all_per_scan(data : np.ndarray, offsets : np.ndarray) -> list[tuple[np.ndarray, bool]]:
+    '''
+    Corrects the jumps of all scans one after another.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        The sorted rows of all scans.
+    offsets : np.ndarray
+        The offsets of the scans in the rows.
+
+    Returns
+    -------
+    list[tuple[np.ndarray, bool]]
+        The corrected rows and if a jump was corrected for every scan.
+
+    '''
+    return [correct_jumps_per_scan(data[start:stop]) for start, stop in zip(offsets[:-1], offsets[1:])]
+
+if __name__ == "__main__":
+    nr_scans : int = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    jump_probability : float = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    with tempfile.TemporaryDirectory() as directory:
+        filename : str = os.path.join(directory, "synthetic.rw.dat")
+        write_synthetic_raw_datafile(filename, nr_scans, jump_probability=jump_probability)
+        with open(filename, "rb") as file:
+            buffer : bytes = file.read()
+    _, data, offsets = parse_data_section(buffer, read_header(buffer)[1])
+    data, _ = sort_scans(data, offsets)
+
+    scans : list[tuple[np.ndarray, bool]] = correct_all_per_scan(data, offsets)
+    corrected, new_offsets, jump_corrected = correct_jumps(data, offsets)
+    assert np.array_equal(jump_corrected, [flag for _, flag in scans])
+    for (rows, _), start, stop in zip(scans, new_offsets[:-1], new_offsets[1:]):
+        assert rows.shape == corrected[start:stop].shape
+        assert np.allclose(rows, corrected[start:stop], rtol=1e-12, atol=1e-12)
+    print("{} scans, {} with jumps, results identical".format(nr_scans, np.count_nonzero(jump_corrected)))
+
+    t_old : float = best_of(correct_all_per_scan, data, offsets)
+    t_new : float = best_of(correct_jumps, data, offsets)
+    print("jump correction  per scan {:8.3f} s   all scans {:8.3f} s   speedup {:5.1f}x".format(t_old, t_new, t_old / t_new))
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:03:51 2026
+
+@author: kaisjuli
+
+Compares the serial and the parallel fits with a free center of one large measurement.
+Run from the repository root with
+    python -m benchmarks.benchmark_parallel_fit [sample raw datafile] [background raw datafile] [max workers]
+Without raw datafiles synthetic files are used.
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+from src.data import RawDataFile, MeasurementDataPointContainer
+from .synthetic import write_synthetic_raw_datafile
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        filenames : list[str] = sys.argv[1:3]
+        if len(filenames) == 0:
+            filenames : list[str] = [os.path.join(directory, "sample.rw.dat"), os.path.join(directory, "background.rw.dat")]
+            write_synthetic_raw_datafile(filenames[0], 20000, amplitude=0.5, seed=1)
+            write_synthetic_raw_datafile(filenames[1], 20000, amplitude=0.05, seed=2)
+        sample_rdf : RawDataFile = RawDataFile(filenames[0])
+        background_rdf : RawDataFile = RawDataFile(filenames[1])
+    rdp_pairs : list = list(zip(sample_rdf, background_rdf))
+    max_workers : int = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+    print("{} datapoints, {} processors".format(len(rdp_pairs), os.cpu_count()))
+
+    moments : dict[tuple[int, int], np.ndarray] = {}
+    for workers, chunk_size in ((1, len(rdp_pairs)), (max_workers, 500), (max_workers, 2000), (max_workers, 5000)):
+        container : MeasurementDataPointContainer = MeasurementDataPointContainer(max_workers=workers, chunk_size=chunk_size)
+        start : float = time.perf_counter()
+        container.add_many(rdp_pairs)
+        duration : float = time.perf_counter() - start
+        moments[(workers, chunk_size)] = np.array([mdp.datapoint_result["moment"] for mdp in container])
+        print("{:3d} workers   chunk size {:6d}   {:7.3f} s   {} failures".format(
+            workers, chunk_size, duration, len(container.failures)))
+    serial : np.ndarray = moments[(1, len(rdp_pairs))]
+    deviation : float = max(np.max(np.abs(moment - serial) / np.abs(serial)) for moment in moments.values())
+    print("largest relative deviation of the moments {:.2e}".format(deviation))
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:10:19 2026
+
+@author: kaisjuli
+
+Compares the line-by-line parser with the vectorized parser of the raw datafile.
+Run from the repository root with
+    python -m benchmarks.benchmark_rawdatafile [nr_scans]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+from src.data import RawDataFile, RawDataPointContainer
+from src.data.rawdataparser import read_header, parse_data_section
+from .synthetic import write_synthetic_raw_datafile
+
+def parse_line_by_line(filename : str) -> list[tuple[str, np.ndarray]]:
+    '''
+    The former parser of the raw datafile, which walks every line in Python and converts
+    the rows of every scan separately.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the raw datafile.
+
+    Returns
+    -------
+    list[tuple[str, np.ndarray]]
+        The info string and the converted rows of each scan.
+
+    '''
+    scans : list[tuple[str, np.ndarray]] = []
+    with open(filename) as file:
+        data_flag : bool = False
+        data_info_buffer : str = ""
+        data_buffer : list[list[str]] = []
+        for line in file:
+            if line == "[Data]\n":
+                data_flag : bool = True
+            if data_flag:
+                if line[0] == ";":
+                    if data_info_buffer != "":
+                        scans.append((data_info_buffer, np.array(data_buffer, dtype=float)))
+                        data_buffer : list[list[str]] = []
+                    data_info_buffer : str = line
+                elif line[0] == ",":
+                    if line.count(",") == 4:
+                        res : list[str] = line[:-1].split(",")[1:]
+                        if res[1] != '':
+                            data_buffer.append(res)
+        scans.append((data_info_buffer, np.array(data_buffer, dtype=float)))
+    return scans
+
+def load_line_by_line(filename : str) -> RawDataPointContainer:
+    '''
+    Creates all raw datapoints from the former parser.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the raw datafile.
+
+    Returns
+    -------
+    RawDataPointContainer
+        The container with all raw datapoints of the file.
+
+    '''
+    datapoints : RawDataPointContainer = RawDataPointContainer()
+    for info_string, data in parse_line_by_line(filename):
+        datapoints.add(info_string, data)
+    return datapoints
+
+def parse_vectorized(filename : str) -> tuple[list[str], np.ndarray, np.ndarray]:
+    '''
+    Parses the raw datafile with the vectorized parser without creating the raw datapoints.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the raw datafile.
+
+    Returns
+    -------
+    tuple(list[str], np.ndarray, np.ndarray)
+        The info strings, the rows and the scan offsets.
+
+    '''
+    with open(filename, "rb") as file:
+        buffer : bytes = file.read()
+    return parse_data_section(buffer, read_header(buffer)[1])
+
+def best_of(func : callable, *args, repeat : int = 3) -> float:
+    best : float = np.inf
+    for _ in range(repeat):
+        start : float = time.perf_counter()
+        func(*args)
+        best : float = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    nr_scans : int = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as directory:
+        filename : str = os.path.join(directory, "synthetic.rw.dat")
+        write_synthetic_raw_datafile(filename, nr_scans, jump_probability=0.01)
+        print("{} scans, {:.1f} MB".format(nr_scans, os.path.getsize(filename) / 1e6))
+
+        scans : list[tuple[str, np.ndarray]] = parse_line_by_line(filename)
+        info_strings, data, offsets = parse_vectorized(filename)
+        assert len(scans) == len(info_strings)
+        for (info_string, rows), new_info_string, start, stop in zip(scans, info_strings, offsets[:-1], offsets[1:]):
+            assert info_string.rstrip("\n") == new_info_string and np.array_equal(rows, data[start:stop])
+
+        t_old : float = best_of(parse_line_by_line, filename)
+        t_new : float = best_of(parse_vectorized, filename)
+        print("data section     line by line {:8.3f} s   vectorized {:8.3f} s   speedup {:5.1f}x".format(t_old, t_new, t_old / t_new))
+        t_old : float = best_of(load_line_by_line, filename, repeat=1)
+        t_new : float = best_of(RawDataFile, filename, repeat=1)
+        print("RawDataFile      line by line {:8.3f} s   vectorized {:8.3f} s   speedup {:5.1f}x".format(t_old, t_new, t_old / t_new))
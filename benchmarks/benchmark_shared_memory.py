@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 17:11:38 2026
+
+@author: kaisjuli
+
+Compares sending pickled chunks of padded signals to the fitting processes with sharing
+them in shared memory. Run from the repository root with
+    python -m benchmarks.benchmark_shared_memory [sample raw datafile] [background raw datafile] [max workers]
+Without raw datafiles synthetic files are used.
+"""
+import os
+import sys
+import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from src.data import RawDataFile, MeasurementDataPoint, MeasurementDataPointContainer
+from src.data.measurementdatapointcontainer import _fit_chunk
+from src.calculation import pad_signals
+from .synthetic import write_synthetic_raw_datafile
+
+def fit_pickled(position : np.ndarray,
+                voltage : np.ndarray,
+                mask : np.ndarray,
+                p0 : np.ndarray,
+                max_workers : int,
+                chunk_size : int
+    ) -> np.ndarray:
+    '''
+    Fits the padded signals in processes, which get pickled chunks and send back pickled
+    results.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The padded positions, one row per signal.
+    voltage : np.ndarray
+        The padded voltages, one row per signal.
+    mask : np.ndarray
+        Which points of the rows are valid.
+    p0 : np.ndarray
+        The start parameters of every signal.
+    max_workers : int
+        The number of processes.
+    chunk_size : int
+        The number of signals of every chunk.
+
+    Returns
+    -------
+    np.ndarray
+        The fitted parameters of every signal.
+
+    '''
+    chunks : list[slice] = [slice(index, index + chunk_size) for index in range(0, len(voltage), chunk_size)]
+    with ProcessPoolExecutor(max_workers) as executor:
+        futures : list = [executor.submit(_fit_chunk, position[chunk], voltage[chunk], mask[chunk], p0[chunk],
+                                          p0[chunk], False) for chunk in chunks]
+        return np.concatenate([future.result()[0] for future in futures])
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        filenames : list[str] = sys.argv[1:3]
+        if len(filenames) == 0:
+            filenames : list[str] = [os.path.join(directory, "sample.rw.dat"), os.path.join(directory, "background.rw.dat")]
+            write_synthetic_raw_datafile(filenames[0], 20000, amplitude=0.5, seed=1)
+            write_synthetic_raw_datafile(filenames[1], 20000, amplitude=0.05, seed=2)
+        sample_rdf : RawDataFile = RawDataFile(filenames[0])
+        background_rdf : RawDataFile = RawDataFile(filenames[1])
+    rdp_pairs : list = list(zip(sample_rdf, background_rdf))
+    max_workers : int = int(sys.argv[3]) if len(sys.argv) > 3 else max(os.cpu_count() or 1, 2)
+    tasks : list[tuple] = [MeasurementDataPoint(s, b, False).fitting_tasks()[-1] for s, b in rdp_pairs]
+    position, voltage, mask = pad_signals([task[0] for task in tasks], [task[1] for task in tasks])
+    p0 : np.ndarray = np.array([task[2] for task in tasks], dtype=float)
+    print("{} datapoints, {} processors, {} workers".format(len(rdp_pairs), os.cpu_count(), max_workers))
+
+    for chunk_size in (100, 500, 2000):
+        start : float = time.perf_counter()
+        pickled : np.ndarray = fit_pickled(position, voltage, mask, p0, max_workers, chunk_size)
+        t_pickled : float = time.perf_counter() - start
+        container : MeasurementDataPointContainer = MeasurementDataPointContainer(max_workers=max_workers, chunk_size=chunk_size)
+        start : float = time.perf_counter()
+        shared : tuple = container.__fit_free_center__(position, voltage, mask, p0, p0)
+        t_shared : float = time.perf_counter() - start
+        deviation : float = np.max(np.abs(shared[0] - pickled) / (np.abs(pickled) + 1e-12))
+        print("chunk size {:5d}   pickled {:7.3f} s   shared memory {:7.3f} s   deviation {:.1e}".format(
+            chunk_size, t_pickled, t_shared, deviation))
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 10:14:36 2026
+
+@author: kaisjuli
+
+Compares the free-center fit of curve_fit with the variable projection, which brackets
+the center around the given and the calculated center of the header and refines it with
+the analytic derivative of the projected residual. Reports the time, the model
+evaluations per fit and the deviation of the centers. Run from the repository root with
+    python -m benchmarks.benchmark_variable_projection [raw datafiles ...]
+Without raw datafiles a synthetic file is used.
+"""
+import os
+import sys
+import time
+import tempfile
+import warnings
+import numpy as np
+from scipy.optimize import curve_fit, OptimizeWarning
+
+from src.data import RawDataFile
+from src.calculation import gradiometer_function, gradiometer_jacobian, fit_signal_variable_projection
+from .synthetic import write_synthetic_raw_datafile
+
+def load_corpus(filenames : list[str]) -> list[tuple[np.ndarray, np.ndarray, float, float]]:
+    '''
+    Reads the positions, voltages, given and calculated centers of all scans of the raw
+    datafiles.
+
+    Parameters
+    ----------
+    filenames : list[str]
+        The filenames of the raw datafiles.
+
+    Returns
+    -------
+    list[tuple[np.ndarray, np.ndarray, float, float]]
+        The positions, voltages, given and calculated centers of the scans.
+
+    '''
+    scans : list[tuple[np.ndarray, np.ndarray, float, float]] = []
+    for filename in filenames:
+        for rdp in RawDataFile(filename).datapoints:
+            scans.append((rdp.raw_position, rdp.raw_voltage, rdp.given_center, rdp.calculated_center))
+    return scans
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", OptimizeWarning)
+    with tempfile.TemporaryDirectory() as directory:
+        filenames : list[str] = sys.argv[1:]
+        if len(filenames) == 0:
+            filenames : list[str] = [os.path.join(directory, "synthetic.rw.dat")]
+            write_synthetic_raw_datafile(filenames[0], 2000, amplitude=0.05)
+        scans : list[tuple[np.ndarray, np.ndarray, float, float]] = load_corpus(filenames)
+
+    start : float = time.perf_counter()
+    curve_fit_results : list = []
+    for position, voltage, given_center, _ in scans:
+        try:
+            popt, _, infodict, _, _ = curve_fit(gradiometer_function, position, voltage, p0=[0, np.mean(voltage), 0, given_center],
+                                                jac=gradiometer_jacobian, full_output=True)
+            curve_fit_results.append((popt, infodict["nfev"] + infodict.get("njev", 0)))
+        except RuntimeError:
+            curve_fit_results.append(None)
+    t_curve_fit : float = time.perf_counter() - start
+
+    start : float = time.perf_counter()
+    projection_results : list = [fit_signal_variable_projection(position, voltage, (given_center, calculated_center), full_output=True)
+                                 for position, voltage, given_center, calculated_center in scans]
+    t_projection : float = time.perf_counter() - start
+
+    both : list[tuple] = [(c, p) for c, p in zip(curve_fit_results, projection_results) if c is not None]
+    deviation : np.ndarray = np.array([abs(c[0][3] - p[0][3]) for c, p in both])
+    print("{} scans, failed fits: curve_fit {}, variable projection 0".format(len(scans), curve_fit_results.count(None)))
+    print("model evaluations per fit: curve_fit {:.1f} (function and Jacobian), variable projection {:.1f}".format(
+        np.mean([c[1] for c, _ in both]), np.mean([p[2] for p in projection_results])))
+    print("free-center fits  curve_fit {:8.3f} s   variable projection {:8.3f} s   speedup {:5.1f}x".format(
+        t_curve_fit, t_projection, t_curve_fit / t_projection))
+    print("center deviation: median {:.2e} mm, above 0.01 mm in {} fits".format(np.median(deviation), np.sum(deviation > 0.01)))
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:42:10 2026
+
+@author: kaisjuli
+
+Compares the iterations of the batched fits with a free center for all warm start
+sources. Run from the repository root with
+    python -m benchmarks.benchmark_warm_start [sample raw datafile] [background raw datafile]
+Without raw datafiles synthetic files are used.
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+from src.data import Measurement
+from src.calculation import WARM_START_SOURCES
+from .synthetic import write_synthetic_raw_datafile
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        filenames : list[str] = sys.argv[1:3]
+        if len(filenames) == 0:
+            filenames : list[str] = [os.path.join(directory, "sample.rw.dat"), os.path.join(directory, "background.rw.dat")]
+            write_synthetic_raw_datafile(filenames[0], 2000, amplitude=0.5, seed=1)
+            write_synthetic_raw_datafile(filenames[1], 2000, amplitude=0.05, seed=2)
+        moments : dict[str, np.ndarray] = {}
+        for source in WARM_START_SOURCES:
+            start : float = time.perf_counter()
+            measurement : Measurement = Measurement(*filenames, warm_start=source)
+            duration : float = time.perf_counter() - start
+            moments[source] = measurement.moment
+            datapoints = measurement.datapoints
+            print("{:9s} {:6d} fits   {:5.2f} iterations per fit   {:7.3f} s".format(
+                source, datapoints.nr_fits, datapoints.nr_iterations / max(datapoints.nr_fits, 1), duration))
+        for source in WARM_START_SOURCES[1:]:
+            deviation : float = np.max(np.abs(moments[source] - moments["default"]) / np.abs(moments["default"]))
+            print("largest relative deviation of the moments {:9s} {:.2e}".format(source, deviation))
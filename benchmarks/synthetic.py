@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:02:44 2026
+
+@author: kaisjuli
+"""
+import numpy as np
+
+from src.calculation import gradiometer_function
+
+INFO_LINE : str = ";low temp = {:.4f} K;high temp = {:.4f} K;avg. temp = {:.4f} K;" \
+                  "low field = {:.3f} Oe;high field = {:.3f} Oe;drift = 1e-05 V/s;" \
+                  "slope = 2e-05 V/mm;squid range = 1;given center = 37.5 mm;" \
+                  "calculated center = {:.3f} mm;amp fixed = {:.6g} V;amp free = {:.6g} V\n"
+
+def write_synthetic_raw_datafile(filename : str,
+                                 nr_scans : int,
+                                 nr_rows : int = 40,
+                                 amplitude : float = 0.5,
+                                 start_temp : float = 2.0,
+                                 temp_step : float = 0.01,
+                                 field : float = 1000.0,
+                                 jump_probability : float = 0.0,
+                                 seed : int = 0,
+                                 curie_constant : float = 0.0) -> None:
+    '''
+    Writes a raw datafile with dipole scans alternating between moving up and down.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the raw datafile.
+    nr_scans : int
+        The number of scans in the file.
+    nr_rows : int, optional
+        The number of rows per scan. The default is 40.
+    amplitude : float, optional
+        The amplitude of the dipole signal in V. The default is 0.5.
+    start_temp : float, optional
+        The temperature of the first scan in K. The default is 2.0.
+    temp_step : float, optional
+        The temperature step between two scans in K. The default is 0.01.
+    field : float, optional
+        The field of all scans in Oe. The default is 1000.0.
+    jump_probability : float, optional
+        The probability of a scan to contain a jump in the voltage. The default is 0.0.
+    seed : int, optional
+        The seed of the random noise. The default is 0.
+    curie_constant : float, optional
+        The amplitude in V K, which is added divided by the temperature to the amplitude
+        of every scan. The default is 0.0.
+
+    Returns
+    -------
+    None.
+
+    '''
+    rng : np.random.Generator = np.random.default_rng(seed)
+    positions : np.ndarray = np.linspace(20, 55, nr_rows)
+    timestamp : float = 0.0
+    with open(filename, "w") as file:
+        file.write("[Header]\nTITLE,synthetic\nINFO,MPMS3,APPNAME\nINFO,1.0,SAMPLE_MASS\n"
+                   "INFO,5.0,SAMPLE_DENSITY\nINFO,100.0,SAMPLE_MOLAR_MASS\nINFO,straw,SAMPLE_HOLDER\n[Data]\n"
+                   "Comment,Time Stamp (sec),Raw Position (mm),Raw Voltage (V),Processed Voltage (V)\n")
+        for index in range(nr_scans):
+            temp : float = start_temp + index * temp_step
+            center : float = 37.5 + rng.normal(0, 0.1)
+            pos : np.ndarray = positions if index % 2 == 0 else positions[::-1]
+            scan_amplitude : float = amplitude + curie_constant / temp
+            voltage : np.ndarray = gradiometer_function(pos, scan_amplitude, 0.01, 1e-5, center)
+            voltage += rng.normal(0, 1e-4, nr_rows)
+            if rng.random() < jump_probability:
+                voltage[rng.integers(2, nr_rows - 2):] += 0.5
+            file.write(INFO_LINE.format(temp - 0.001, temp + 0.001, temp, field - 0.1, field + 0.1,
+                                        center, scan_amplitude, scan_amplitude))
+            for p, v in zip(pos, voltage):
+                timestamp += 0.1
+                file.write(",{:.2f},{:.4f},{:.8g},{:.8g}\n".format(timestamp, p, v, v))
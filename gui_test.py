@@ -10,7 +10,9 @@ from PyQt5.QtWidgets import QApplication
 
 from src.gui.main_window import MainWindow
 
-app = QApplication(sys.argv)
-Window = MainWindow()
-Window.show()
-sys.exit(app.exec())
\ No newline at end of file
+# the guard is needed, because the worker processes of the parallel file loading import this module
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    Window = MainWindow()
+    Window.show()
+    sys.exit(app.exec())
\ No newline at end of file
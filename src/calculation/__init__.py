@@ -5,8 +5,23 @@ Created on Mon May 12 14:24:35 2025
 @author: kaisjuli
 """
 
+from .signal_fit import FIT_ERRORS
 from .signal_fit import gradiometer_function
 from .signal_fit import gradiometer_function_fixed_center
+from .signal_fit import gradiometer_jacobian
+from .gradiometer_kernel import gradiometer_kernel
+from .gradiometer_kernel import gradiometer_kernel_error_bounds
+from .gradiometer_kernel import evaluate_gradiometer
 from .signal_fit import fit_signal
+from .signal_fit import fit_signal_fixed_center
+from .signal_fit import fit_signal_variable_projection
 from .signal_fit import convert_amplitude_to_moment
-from .background_subtraction import subtract_background
\ No newline at end of file
+from .background_subtraction import subtract_background
+from .background_subtraction import subtract_backgrounds
+from .background_matching import match_background
+from .jump_correction import sort_scans
+from .jump_correction import correct_jumps
+from .batch_fit import pad_signals
+from .batch_fit import fit_signals
+from .warm_start import WARM_START_SOURCES
+from .warm_start import warm_start_parameters
\ No newline at end of file
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 14:21:09 2026
+
+@author: kaisjuli
+"""
+from itertools import chain
+import numpy as np
+from scipy.spatial import cKDTree
+
+def match_background(sample_temperature : np.ndarray,
+                     sample_field : np.ndarray,
+                     background_temperature : np.ndarray,
+                     background_field : np.ndarray,
+                     max_temp_diff : float,
+                     max_field_diff : float,
+                     sample_direction : np.ndarray | None = None,
+                     background_direction : np.ndarray | None = None
+    ) -> np.ndarray:
+    '''
+    Finds the closest background scan of the same scan direction for every sample scan,
+    whose temperature and field differ by less than the maximum differences. The distance
+    is the temperature difference relative to the sample temperature plus the field
+    difference relative to the sample field, or the absolute field difference for fields
+    up to 1 Oe. Of equally close scans the first one is taken. The background scans of
+    every direction are indexed once in a KD-tree, which is queried for all sample scans
+    at once. Scans with a missing temperature or field never match.
+
+    Parameters
+    ----------
+    sample_temperature : np.ndarray
+        The temperatures of the sample scans in K.
+    sample_field : np.ndarray
+        The fields of the sample scans in Oe.
+    background_temperature : np.ndarray
+        The temperatures of the background scans in K.
+    background_field : np.ndarray
+        The fields of the background scans in Oe.
+    max_temp_diff : float
+        The maximum temperature difference in K.
+    max_field_diff : float
+        The maximum field difference in Oe.
+    sample_direction : np.ndarray | None, optional
+        The scan directions of the sample scans. The default is None, which means the
+        directions aren't compared.
+    background_direction : np.ndarray | None, optional
+        The scan directions of the background scans. The default is None.
+
+    Returns
+    -------
+    np.ndarray
+        The index of the matching background scan of every sample scan, -1 if there is
+        none.
+
+    '''
+    sample_temperature : np.ndarray = np.asarray(sample_temperature, dtype=float)
+    sample_field : np.ndarray = np.asarray(sample_field, dtype=float)
+    background_temperature : np.ndarray = np.asarray(background_temperature, dtype=float)
+    background_field : np.ndarray = np.asarray(background_field, dtype=float)
+    matches : np.ndarray = np.full(len(sample_temperature), -1, dtype=np.intp)
+    # missing info values are decoded as NaN, which the KD-tree can't index
+    sample_valid : np.ndarray = np.isfinite(sample_temperature) & np.isfinite(sample_field)
+    background_valid : np.ndarray = np.isfinite(background_temperature) & np.isfinite(background_field)
+    if sample_direction is None or background_direction is None:
+        groups : list[tuple[np.ndarray, np.ndarray]] = [(np.flatnonzero(sample_valid), np.flatnonzero(background_valid))]
+    else:
+        sample_direction : np.ndarray = np.asarray(sample_direction)
+        background_direction : np.ndarray = np.asarray(background_direction)
+        groups : list[tuple[np.ndarray, np.ndarray]] = [(np.flatnonzero(sample_valid & (sample_direction == direction)),
+                                                         np.flatnonzero(background_valid & (background_direction == direction)))
+                                                        for direction in np.unique(sample_direction)]
+    # the field is scaled, so both maximum differences are a box of the same size
+    scale : float = max_temp_diff / max_field_diff
+    for samples, backgrounds in groups:
+        if len(samples) == 0 or len(backgrounds) == 0:
+            continue
+        tree : cKDTree = cKDTree(np.column_stack((background_temperature[backgrounds], background_field[backgrounds] * scale)))
+        # the box is slightly enlarged against rounding, the exact limits are checked below
+        neighbours : np.ndarray = tree.query_ball_point(np.column_stack((sample_temperature[samples], sample_field[samples] * scale)),
+                                                        max_temp_diff * (1 + 1e-9), p=np.inf)
+        nr_neighbours : np.ndarray = np.fromiter(map(len, neighbours), dtype=np.intp, count=len(samples))
+        candidate : np.ndarray = backgrounds[np.fromiter(chain.from_iterable(neighbours), dtype=np.intp,
+                                                         count=int(nr_neighbours.sum()))]
+        owner : np.ndarray = samples[np.repeat(np.arange(len(samples)), nr_neighbours)]
+        temp_diff : np.ndarray = np.abs(background_temperature[candidate] - sample_temperature[owner])
+        field_diff : np.ndarray = np.abs(background_field[candidate] - sample_field[owner])
+        valid : np.ndarray = (temp_diff < max_temp_diff) & (field_diff < max_field_diff)
+        candidate, owner, temp_diff, field_diff = candidate[valid], owner[valid], temp_diff[valid], field_diff[valid]
+        field : np.ndarray = np.abs(sample_field[owner])
+        distance : np.ndarray = temp_diff / sample_temperature[owner] + np.where(field > 1, field_diff / np.maximum(field, 1), field_diff)
+        order : np.ndarray = np.lexsort((candidate, distance, owner))
+        first : np.ndarray = order[np.r_[True, owner[order][1:] != owner[order][:-1]]] if len(order) > 0 else order
+        matches[owner[first]] = candidate[first]
+    return matches
@@ -33,4 +33,80 @@ def subtract_background(sample_rdp : RawDataPoint, background_rdp : RawDataPoint
     positions : np.ndarray = np.linspace(min_pos, max_pos, len(sample_rdp.raw_position))
     sample_interp : np.ndarray = np.interp(positions, sample_rdp.raw_position, sample_rdp.raw_voltage)
     background_interp : np.ndarray = np.interp(positions, background_rdp.raw_position, background_rdp.raw_voltage)
-    return positions, sample_interp - background_interp
\ No newline at end of file
+    return positions, sample_interp - background_interp
+
+def subtract_backgrounds(sample_rdps : list[RawDataPoint],
+                         background_rdps : list[RawDataPoint]
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+    '''
+    Subtracts the background signals from many raw datapoints at once like
+    subtract_background. Datapoints, whose sample and background scans have the same
+    positions, share the interpolation grid and the interpolation indices, which are
+    calculated once, and all their voltages are interpolated and subtracted in one array
+    operation. If the positions of a scan are already the grid, it isn't interpolated.
+
+    Parameters
+    ----------
+    sample_rdps : list[RawDataPoint]
+        The raw datapoints of the measurement with the sample.
+    background_rdps : list[RawDataPoint]
+        The raw datapoints of the background measurement.
+
+    Returns
+    -------
+    list[tuple(np.ndarray, np.ndarray)]
+        The interpolated positions of the moment and the subtracted voltage signals.
+
+    '''
+    groups : dict[tuple[bytes, bytes], list[int]] = {}
+    for index, (sample_rdp, background_rdp) in enumerate(zip(sample_rdps, background_rdps)):
+        key : tuple[bytes, bytes] = (sample_rdp.raw_position.tobytes(), background_rdp.raw_position.tobytes())
+        groups.setdefault(key, []).append(index)
+    results : list[tuple[np.ndarray, np.ndarray] | None] = [None] * len(sample_rdps)
+    for indices in groups.values():
+        sample_position : np.ndarray = sample_rdps[indices[0]].raw_position
+        background_position : np.ndarray = background_rdps[indices[0]].raw_position
+        min_pos : float = max([np.min(sample_position), np.min(background_position)])
+        max_pos : float = min([np.max(sample_position), np.max(background_position)])
+        positions : np.ndarray = np.linspace(min_pos, max_pos, len(sample_position))
+        voltage : np.ndarray = (_interpolate(positions, sample_position, np.array([sample_rdps[index].raw_voltage for index in indices]))
+                                - _interpolate(positions, background_position, np.array([background_rdps[index].raw_voltage for index in indices])))
+        for index, subtracted in zip(indices, voltage):
+            results[index] = (positions, subtracted)
+    return results
+
+def _interpolate(x : np.ndarray, xp : np.ndarray, fp : np.ndarray) -> np.ndarray:
+    '''
+    Interpolates many signals with the same positions linearly like np.interp, the
+    indices and slopes are calculated once for all signals.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The positions to interpolate at.
+    xp : np.ndarray
+        The increasing positions of the signals.
+    fp : np.ndarray
+        The signals, one row per signal.
+
+    Returns
+    -------
+    np.ndarray
+        The interpolated signals, one row per signal.
+
+    '''
+    if np.array_equal(x, xp):
+        return fp
+    if len(xp) == 1:
+        return np.repeat(fp, len(x), axis=1)
+    index : np.ndarray = np.clip(np.searchsorted(xp, x, side="right") - 1, 0, len(xp) - 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # repeated positions are only used as exact nodes below
+        slope : np.ndarray = (fp[:, index + 1] - fp[:, index]) / (xp[index + 1] - xp[index])
+        interpolated : np.ndarray = slope * (x - xp[index]) + fp[:, index]
+    # the borders and the nodes are taken exactly
+    exact : np.ndarray = x == xp[index]
+    interpolated[:, exact] = fp[:, index[exact]]
+    interpolated[:, x >= xp[-1]] = fp[:, -1:]
+    interpolated[:, x < xp[0]] = fp[:, :1]
+    return interpolated
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:48:21 2026
+
+@author: kaisjuli
+"""
+import numpy as np
+
+from .signal_fit import gradiometer_function
+from .gradiometer_kernel import evaluate_gradiometer
+
+def pad_signals(positions : list[np.ndarray], voltages : list[np.ndarray]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Stacks signals of different lengths into padded arrays.
+
+    Parameters
+    ----------
+    positions : list[np.ndarray]
+        The positions of every signal.
+    voltages : list[np.ndarray]
+        The voltages of every signal.
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray, np.ndarray)
+        The padded positions, the padded voltages and the mask of the valid points,
+        one row per signal. Padded points repeat the last position and have no voltage.
+
+    '''
+    lengths : np.ndarray = np.array([len(voltage) for voltage in voltages], dtype=np.int64)
+    mask : np.ndarray = np.arange(max(lengths.max(initial=0), 1)) < lengths[:, None]
+    position : np.ndarray = np.zeros(mask.shape)
+    voltage : np.ndarray = np.zeros(mask.shape)
+    if len(lengths) > 0 and lengths.sum() > 0:
+        position[mask] = np.concatenate(positions)
+        voltage[mask] = np.concatenate(voltages)
+        last : np.ndarray = position[np.arange(len(lengths)), np.maximum(lengths - 1, 0)]
+        position : np.ndarray = np.where(mask, position, last[:, None])
+    return position, voltage, mask
+
+def fit_signals(position : np.ndarray,
+                voltage : np.ndarray,
+                p0 : np.ndarray,
+                mask : np.ndarray | None = None,
+                max_iterations : int = 200,
+                ftol : float = 1.49012e-8,
+                xtol : float = 1.49012e-8,
+                full_output : bool = False
+    ) -> tuple[np.ndarray, ...]:
+    '''
+    Fits many signals at once to the gradiometer function with a free center by the
+    Levenberg-Marquardt algorithm. All signals are iterated together, every signal has its
+    own damping and stops on its own, when the relative reduction of the squared residuals
+    or the relative step is below the tolerance.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The positions of the dipole, one row per signal.
+    voltage : np.ndarray
+        The generated voltages of the dipole, one row per signal.
+    p0 : np.ndarray
+        The initial amplitude, shift, slope and center of every signal.
+    mask : np.ndarray | None, optional
+        Which points of the rows are valid. The default is None, which means all points.
+    max_iterations : int, optional
+        The maximum number of iterations. The default is 200.
+    ftol : float, optional
+        The tolerance of the relative reduction of the squared residuals. The default
+        is 1.49012e-8 like in curve_fit.
+    xtol : float, optional
+        The tolerance of the relative step of the parameters. The default is 1.49012e-8
+        like in curve_fit.
+    full_output : bool, optional
+        If the number of iterations of every signal is returned as well. The default
+        is False.
+
+    Returns
+    -------
+    tuple(np.ndarray, ...)
+        The fitted parameters of every signal, their covariance like curve_fit returns
+        them, if the fit converged and with full_output the number of iterations.
+
+    '''
+    position : np.ndarray = np.asarray(position, dtype=float)
+    voltage : np.ndarray = np.asarray(voltage, dtype=float)
+    mask : np.ndarray = np.ones(voltage.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    params : np.ndarray = np.array(p0, dtype=float).reshape(len(voltage), 4)
+    damping : np.ndarray = np.full(len(voltage), 1e-3)
+    converged : np.ndarray = np.zeros(len(voltage), dtype=bool)
+    iterations : np.ndarray = np.zeros(len(voltage), dtype=np.int64)
+    cost : np.ndarray = np.sum(_residual(position, voltage, mask, params)**2, axis=1)
+
+    for _ in range(max_iterations):
+        active : np.ndarray = np.flatnonzero(~converged)
+        if len(active) == 0:
+            break
+        iterations[active] += 1
+        jacobian : np.ndarray = _jacobian(position[active], mask[active], params[active])
+        residual : np.ndarray = _residual(position[active], voltage[active], mask[active], params[active])
+        normal_matrix : np.ndarray = np.einsum("kni,knj->kij", jacobian, jacobian)
+        gradient : np.ndarray = np.einsum("kni,kn->ki", jacobian, residual)
+        diagonal : np.ndarray = np.maximum(np.einsum("kii->ki", normal_matrix), np.finfo(float).tiny)
+        damped : np.ndarray = normal_matrix + (damping[active, None] * diagonal)[:, :, None] * np.eye(4)
+        try:
+            step : np.ndarray = np.linalg.solve(damped, gradient[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            step : np.ndarray = np.einsum("kij,kj->ki", np.linalg.pinv(damped), gradient)
+        new_params : np.ndarray = params[active] + step
+        new_cost : np.ndarray = np.sum(_residual(position[active], voltage[active], mask[active], new_params)**2, axis=1)
+
+        improved : np.ndarray = new_cost <= cost[active]
+        small_reduction : np.ndarray = cost[active] - new_cost <= ftol * cost[active]
+        small_step : np.ndarray = np.all(np.abs(step) <= xtol * (np.abs(params[active]) + xtol), axis=1)
+        accepted : np.ndarray = active[improved]
+        params[accepted] = new_params[improved]
+        cost[accepted] = new_cost[improved]
+        damping[active] = np.where(improved, damping[active] / 10, damping[active] * 10)
+        # a signal, whose cost can't be reduced even with a huge damping, is at its minimum
+        converged[active] = (improved & (small_reduction | small_step)) | (damping[active] > 1e16)
+
+    jacobian : np.ndarray = _jacobian(position, mask, params)
+    pcov : np.ndarray = np.linalg.pinv(np.einsum("kni,knj->kij", jacobian, jacobian))
+    dof : np.ndarray = mask.sum(axis=1) - 4
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pcov *= np.where(dof > 0, cost / dof, np.inf)[:, None, None]
+    pcov[dof <= 0] = np.inf
+    if full_output:
+        return params, pcov, converged, iterations
+    return params, pcov, converged
+
+def _residual(position : np.ndarray, voltage : np.ndarray, mask : np.ndarray, params : np.ndarray) -> np.ndarray:
+    '''
+    Calculates the residuals of every signal, which are zero at invalid points.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The positions of the dipole, one row per signal.
+    voltage : np.ndarray
+        The generated voltages of the dipole, one row per signal.
+    mask : np.ndarray
+        Which points of the rows are valid.
+    params : np.ndarray
+        The amplitude, shift, slope and center of every signal.
+
+    Returns
+    -------
+    np.ndarray
+        The residuals of every signal.
+
+    '''
+    residual : np.ndarray = voltage - gradiometer_function(position, *params[:, :, None].transpose(1, 0, 2))
+    return np.where(mask, residual, 0)
+
+def _jacobian(position : np.ndarray, mask : np.ndarray, params : np.ndarray) -> np.ndarray:
+    '''
+    Calculates the Jacobian of every signal, which is zero at invalid points.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The positions of the dipole, one row per signal.
+    mask : np.ndarray
+        Which points of the rows are valid.
+    params : np.ndarray
+        The amplitude, shift, slope and center of every signal.
+
+    Returns
+    -------
+    np.ndarray
+        The derivatives of every signal at every position with the columns A, S, m and C.
+
+    '''
+    return evaluate_gradiometer(position, params, jacobian=True)[1] * mask[..., None]
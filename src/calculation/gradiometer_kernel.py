@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:34:17 2026
+
+@author: kaisjuli
+"""
+from functools import lru_cache
+import numpy as np
+
+from .. import constants
+
+def gradiometer_kernel(u : np.ndarray, derivative : bool = False) -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+    '''
+    The signal of a dipole with amplitude one at the distance u to the center and
+    optionally its derivative with respect to u. Inside the range of the kernel table both
+    are interpolated by cubic Hermite polynomials with the error bounds of
+    gradiometer_kernel_error_bounds, outside they are calculated exactly. The table is
+    created for the current constants on the first call and again, if they change.
+
+    Parameters
+    ----------
+    u : np.ndarray
+        The distances of the dipole to the center.
+    derivative : bool, optional
+        If the derivative is returned as well. The default is False.
+
+    Returns
+    -------
+    np.ndarray | tuple(np.ndarray, np.ndarray)
+        The signal and, if requested, its derivative.
+
+    '''
+    u : np.ndarray = np.asarray(u, dtype=float)
+    start, step, coefficients, _, _ = _kernel_table(constants.COIL_RADIUS, constants.COIL_DISTANCE,
+                                                    constants.GRADIOMETER_KERNEL_TOLERANCE,
+                                                    constants.GRADIOMETER_KERNEL_EXTENT)
+    x : np.ndarray = (u - start) / step
+    # distances outside of the table are clipped here and calculated exactly below
+    index : np.ndarray = np.clip(x.astype(np.intp), 0, coefficients.shape[1] - 1)
+    t : np.ndarray = x - index
+    c0, c1, c2, c3 = (coefficient.take(index) for coefficient in coefficients)
+    signal : np.ndarray = ((c3 * t + c2) * t + c1) * t + c0
+    if derivative:
+        signal_derivative : np.ndarray = ((3 * c3 * t + 2 * c2) * t + c1) / step
+    outside : np.ndarray = (x < 0) | (x > coefficients.shape[1])
+    if np.any(outside):
+        exact_signal, exact_derivative = _exact_kernel(u[outside], constants.COIL_RADIUS, constants.COIL_DISTANCE)
+        signal[outside] = exact_signal
+        if derivative:
+            signal_derivative[outside] = exact_derivative
+    if derivative:
+        return signal, signal_derivative
+    return signal
+
+def gradiometer_kernel_error_bounds() -> tuple[float, float]:
+    '''
+    The guaranteed bounds of the absolute interpolation errors of gradiometer_kernel for
+    the current constants, apart from rounding. They follow from the error of the cubic
+    Hermite interpolation with the step h of the table,
+        |f - p| <= h^4 / 384 * max|f^(4)| and |f' - p'| <= sqrt(3) / 216 * h^3 * max|f^(4)|,
+    where max|f^(4)| <= 180 / COIL_RADIUS^5, since the fourth derivative of every coil term
+    is largest at its center.
+
+    Returns
+    -------
+    tuple(float, float)
+        The bounds of the errors of the signal and of its derivative.
+
+    '''
+    table : tuple = _kernel_table(constants.COIL_RADIUS, constants.COIL_DISTANCE,
+                                  constants.GRADIOMETER_KERNEL_TOLERANCE, constants.GRADIOMETER_KERNEL_EXTENT)
+    return table[3], table[4]
+
+def evaluate_gradiometer(z : np.ndarray, params : np.ndarray, jacobian : bool = False) -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+    '''
+    Evaluates the gradiometer function for many signals at once with the kernel table.
+
+    Parameters
+    ----------
+    z : np.ndarray
+        The positions of the dipole, one row per signal or one row for all signals.
+    params : np.ndarray
+        The amplitude, shift, slope and center of every signal, one row per signal.
+    jacobian : bool, optional
+        If the derivatives with respect to A, S, m and C are returned as well. The default
+        is False.
+
+    Returns
+    -------
+    np.ndarray | tuple(np.ndarray, np.ndarray)
+        The signals, one row per signal, and, if requested, the derivatives of every signal
+        at every position with the columns A, S, m and C.
+
+    '''
+    z : np.ndarray = np.asarray(z, dtype=float)
+    params : np.ndarray = np.asarray(params, dtype=float)
+    A, S, m, C = (params[..., column, None] for column in range(4))
+    if not jacobian:
+        return S + A * gradiometer_kernel(z - C) + m * z
+    dipole, dipole_derivative = gradiometer_kernel(z - C, True)
+    z : np.ndarray = np.broadcast_to(z, dipole.shape)
+    return S + A * dipole + m * z, np.stack((dipole, np.ones_like(dipole), z, -A * dipole_derivative), axis=-1)
+
+@lru_cache(maxsize=4)
+def _kernel_table(radius : float,
+                  distance : float,
+                  tolerance : float,
+                  extent : float
+    ) -> tuple[float, float, np.ndarray, float, float]:
+    '''
+    Creates the table of the cubic Hermite polynomials of the kernel. The step is chosen,
+    so the bound of the interpolation error is the tolerance times the maximum of the
+    kernel. The table is cached for every set of constants.
+
+    Parameters
+    ----------
+    radius : float
+        The radius of the coils.
+    distance : float
+        The distance between the coils.
+    tolerance : float
+        The maximum interpolation error relative to the maximum of the kernel.
+    extent : float
+        The table covers distances from -extent to extent.
+
+    Returns
+    -------
+    tuple(float, float, np.ndarray, float, float)
+        The first node, the step, the coefficients of the polynomials of every interval
+        in powers of the relative position, the bounds of the errors of the signal and
+        of its derivative.
+
+    '''
+    max_fourth_derivative : float = 180 / radius**5
+    peak : float = abs(_exact_kernel(np.zeros(1), radius, distance)[0][0])
+    step : float = (384 * tolerance * peak / max_fourth_derivative)**(1/4)
+    nr_intervals : int = int(np.ceil(2 * extent / step))
+    nodes : np.ndarray = -extent + step * np.arange(nr_intervals + 1)
+    signal, derivative = _exact_kernel(nodes, radius, distance)
+    slope : np.ndarray = derivative * step
+    coefficients : np.ndarray = np.stack((signal[:-1],
+                                          slope[:-1],
+                                          3 * (signal[1:] - signal[:-1]) - 2 * slope[:-1] - slope[1:],
+                                          2 * (signal[:-1] - signal[1:]) + slope[:-1] + slope[1:]))
+    return (-extent, step, coefficients, step**4 / 384 * max_fourth_derivative,
+            np.sqrt(3) / 216 * step**3 * max_fourth_derivative)
+
+def _exact_kernel(u : np.ndarray, radius : float, distance : float) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Calculates the signal of a dipole with amplitude one and its derivative exactly.
+
+    Parameters
+    ----------
+    u : np.ndarray
+        The distances of the dipole to the center.
+    radius : float
+        The radius of the coils.
+    distance : float
+        The distance between the coils.
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray)
+        The signal and its derivative.
+
+    '''
+    signal : np.ndarray = np.zeros_like(u)
+    derivative : np.ndarray = np.zeros_like(u)
+    for weight, shift in ((2, 0), (-1, distance), (-1, -distance)):
+        square : np.ndarray = radius**2 + (u + shift)**2
+        power : np.ndarray = square**(-3/2)
+        signal += weight * power
+        derivative += weight * (u + shift) * power / square
+    return radius**2 * signal, -3 * radius**2 * derivative
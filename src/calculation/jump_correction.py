@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:26:52 2026
+
+@author: kaisjuli
+"""
+import numpy as np
+
+from .. import constants
+
+def sort_scans(data : np.ndarray, offsets : np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Sorts the rows of all scans by the raw position and determines the scan directions.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        The rows of all scans with the columns timestamp, raw position, raw voltage
+        and processed voltage.
+    offsets : np.ndarray
+        The offsets of the scans in the rows, such that scan i covers the rows
+        offsets[i]:offsets[i+1].
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray)
+        The sorted rows and if the scans were performed moving down.
+
+    '''
+    lengths : np.ndarray = np.diff(offsets)
+    not_empty : np.ndarray = lengths > 0
+    down : np.ndarray = np.zeros(len(lengths), dtype=bool)
+    down[not_empty] = data[offsets[:-1][not_empty], 1] - data[offsets[1:][not_empty] - 1, 1] > 0
+    scan_index : np.ndarray = np.repeat(np.arange(len(lengths)), lengths)
+    return data[np.lexsort((data[:, 1], scan_index))], down
+
+def correct_jumps(data : np.ndarray,
+                  offsets : np.ndarray,
+                  voltage_limit : float | None = None,
+                  jump_threshold : float | None = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Corrects possible jumps in the voltage signal of all scans at once. Rows with a voltage
+    above the voltage limit are removed. A jump is a voltage difference between two rows
+    above jump_threshold times the mean difference of the scan. The part of the scan
+    behind the jump, or in front of it for jumps within the first ten rows, is shifted to
+    a quadratic fit of the ten rows on the other side of the jump. The fits of all scans
+    are solved together, the jumps inside a scan are corrected one after another.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        The rows of all scans sorted by the raw position.
+    offsets : np.ndarray
+        The offsets of the scans in the rows.
+    voltage_limit : float | None, optional
+        The maximum absolute raw voltage in V. The default is None, which means the
+        current JUMP_VOLTAGE_LIMIT.
+    jump_threshold : float | None, optional
+        The factor of the mean voltage difference above which a difference is
+        a jump. The default is None, which means the current JUMP_THRESHOLD.
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray, np.ndarray)
+        The corrected rows, the offsets of the scans in the corrected rows and if a jump
+        was corrected in the scans.
+
+    '''
+    # the constants are read on every call like the key of the raw data cache
+    if voltage_limit is None:
+        voltage_limit : float = constants.JUMP_VOLTAGE_LIMIT
+    if jump_threshold is None:
+        jump_threshold : float = constants.JUMP_THRESHOLD
+    nr_scans : int = len(offsets) - 1
+    scan_index : np.ndarray = np.repeat(np.arange(nr_scans), np.diff(offsets))
+    keep : np.ndarray = np.abs(data[:, 2]) < voltage_limit
+    data : np.ndarray = data[keep]
+    scan_index : np.ndarray = scan_index[keep]
+    lengths : np.ndarray = np.bincount(scan_index, minlength=nr_scans)
+    offsets : np.ndarray = np.zeros(nr_scans + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+
+    voltage : np.ndarray = data[:, 2]
+    diff : np.ndarray = np.abs(np.diff(voltage))
+    same_scan : np.ndarray = scan_index[1:] == scan_index[:-1]
+    diff_scan : np.ndarray = scan_index[1:][same_scan]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_diff : np.ndarray = np.bincount(diff_scan, weights=diff[same_scan], minlength=nr_scans) / (lengths - 1)
+    is_jump : np.ndarray = np.zeros(len(diff), dtype=bool)
+    is_jump[same_scan] = diff[same_scan] > jump_threshold * mean_diff[diff_scan]
+
+    jump_rows : np.ndarray = np.flatnonzero(is_jump)
+    jump_scans : np.ndarray = scan_index[jump_rows]
+    jump_corrected : np.ndarray = np.zeros(nr_scans, dtype=bool)
+    jump_corrected[jump_scans] = True
+    # the n-th jumps of all scans are corrected together, as every correction changes the
+    # data used for the following jumps of the same scan
+    rank : np.ndarray = np.arange(len(jump_rows)) - np.searchsorted(jump_scans, jump_scans)
+    for nr in range(rank.max() + 1 if len(rank) else 0):
+        rows : np.ndarray = jump_rows[rank == nr]
+        scans : np.ndarray = jump_scans[rank == nr]
+        behind : np.ndarray = rows - offsets[scans] > 9
+        window : np.ndarray = np.where(behind, rows - 9, rows + 1)[:, None] + np.arange(10)
+        valid : np.ndarray = window < offsets[scans + 1][:, None]
+        target : np.ndarray = np.where(behind, rows + 1, rows)
+        y_goal : np.ndarray = _fit_quadratic(data[:, 1], voltage, window, valid, data[target, 1])
+        shift_start : np.ndarray = np.where(behind, rows + 1, offsets[scans])
+        shift_stop : np.ndarray = np.where(behind, offsets[scans + 1], rows)
+        shift : np.ndarray = np.zeros(len(voltage) + 1)
+        np.add.at(shift, shift_start, y_goal - voltage[target])
+        np.add.at(shift, shift_stop, voltage[target] - y_goal)
+        voltage += np.cumsum(shift[:-1])
+    return data, offsets, jump_corrected
+
+def _fit_quadratic(x : np.ndarray, y : np.ndarray, window : np.ndarray, valid : np.ndarray, x_goal : np.ndarray) -> np.ndarray:
+    '''
+    Fits a quadratic polynomial to every window of points by least squares and evaluates
+    it at the goal. Like np.polynomial.Polynomial.fit the points are mapped to [-1, 1]
+    before the fit.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The x values of all points.
+    y : np.ndarray
+        The y values of all points.
+    window : np.ndarray
+        The indices of the points of every fit.
+    valid : np.ndarray
+        Which indices of the windows are used.
+    x_goal : np.ndarray
+        The x value of every fit at which the polynomial is evaluated.
+
+    Returns
+    -------
+    np.ndarray
+        The value of every polynomial at the goal.
+
+    '''
+    window : np.ndarray = np.minimum(window, len(x) - 1)
+    x_window : np.ndarray = x[window]
+    x_min : np.ndarray = np.where(valid, x_window, np.inf).min(axis=1)
+    x_max : np.ndarray = np.where(valid, x_window, -np.inf).max(axis=1)
+    x_range : np.ndarray = np.where(x_max > x_min, x_max - x_min, 1.0)
+    t : np.ndarray = (2 * x_window - x_max[:, None] - x_min[:, None]) / x_range[:, None]
+    t_goal : np.ndarray = (2 * x_goal - x_max - x_min) / x_range
+    design : np.ndarray = np.stack((np.ones_like(t), t, t**2), axis=2) * valid[:, :, None]
+    coef : np.ndarray = np.einsum("nij,nj->ni", np.linalg.pinv(design), y[window] * valid)
+    return coef[:, 0] + coef[:, 1] * t_goal + coef[:, 2] * t_goal**2
@@ -7,7 +7,11 @@ Created on Mon May 12 13:55:18 2025
 import numpy as np
 from scipy.optimize import curve_fit
 
-from ..constants import COIL_RADIUS, COIL_DISTANCE, SYSTEM_CALIBRATION, DC_CALIBRATION_FACTOR
+from .gradiometer_kernel import gradiometer_kernel
+from .. import constants
+
+# the errors of a fit, which doesn't converge or whose signal can't be fitted
+FIT_ERRORS : tuple[type[Exception], ...] = (RuntimeError, ValueError, np.linalg.LinAlgError)
 
 def gradiometer_function(z : float, A : float, S : float, m : float, C : float) -> float:
     '''
@@ -33,9 +37,9 @@ def gradiometer_function(z : float, A : float, S : float, m : float, C : float)
         The generated signal at the given position of the dipole.
 
     '''
-    voltage = 2 * COIL_RADIUS**2 * (COIL_RADIUS**2 + (z - C)**2)**(-3/2)
-    voltage -=  COIL_RADIUS**2 * (COIL_RADIUS**2 + ( COIL_DISTANCE + z - C)**2)**(-3/2)
-    voltage -=  COIL_RADIUS**2 * (COIL_RADIUS**2 + (-COIL_DISTANCE + z - C)**2)**(-3/2)
+    voltage = 2 * constants.COIL_RADIUS**2 * (constants.COIL_RADIUS**2 + (z - C)**2)**(-3/2)
+    voltage -=  constants.COIL_RADIUS**2 * (constants.COIL_RADIUS**2 + ( constants.COIL_DISTANCE + z - C)**2)**(-3/2)
+    voltage -=  constants.COIL_RADIUS**2 * (constants.COIL_RADIUS**2 + (-constants.COIL_DISTANCE + z - C)**2)**(-3/2)
     return S + A * voltage + m * z
 
 def gradiometer_function_fixed_center(C : float) -> callable:
@@ -78,17 +82,64 @@ def gradiometer_function_fixed_center(C : float) -> callable:
             The generated signal at the given position of the dipole.
 
         '''
-        voltage = 2 * COIL_RADIUS**2 * (COIL_RADIUS**2 + (z - C)**2)**(-3/2)
-        voltage -=  COIL_RADIUS**2 * (COIL_RADIUS**2 + ( COIL_DISTANCE + z - C)**2)**(-3/2)
-        voltage -=  COIL_RADIUS**2 * (COIL_RADIUS**2 + (-COIL_DISTANCE + z - C)**2)**(-3/2)
+        voltage = 2 * constants.COIL_RADIUS**2 * (constants.COIL_RADIUS**2 + (z - C)**2)**(-3/2)
+        voltage -=  constants.COIL_RADIUS**2 * (constants.COIL_RADIUS**2 + ( constants.COIL_DISTANCE + z - C)**2)**(-3/2)
+        voltage -=  constants.COIL_RADIUS**2 * (constants.COIL_RADIUS**2 + (-constants.COIL_DISTANCE + z - C)**2)**(-3/2)
         return S + A * voltage + m * z
     return gradiometer_function
 
+def gradiometer_jacobian(z : np.ndarray, A : float, S : float, m : float, C : float) -> np.ndarray:
+    '''
+    The derivatives of the gradiometer function with respect to the amplitude, the shift,
+    the slope and the center.
+
+    Parameters
+    ----------
+    z : np.ndarray
+        The positions of the dipole.
+    A : float
+        The amplitude of the signal.
+    S : float
+        The veritcal shift of the signal.
+    m : float
+        The slope of the signal.
+    C : float
+        The center of the signal.
+
+    Returns
+    -------
+    np.ndarray
+        The derivatives at every position with the columns A, S, m and C.
+
+    '''
+    z : np.ndarray = np.asarray(z, dtype=float)
+    dipole, dipole_derivative = _dipole_terms(z - C)
+    return np.stack((dipole, np.ones_like(z), z, -A * dipole_derivative), axis=-1)
+
+def _dipole_terms(u : np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Calculates the signal of a dipole with amplitude one and its derivative with respect
+    to the distance to the center from the kernel table.
+
+    Parameters
+    ----------
+    u : np.ndarray
+        The distance of the dipole to the center.
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray)
+        The signal and its derivative.
+
+    '''
+    return gradiometer_kernel(u, True)
+
 def fit_signal(position : np.ndarray,
                voltage : np.ndarray,
                p0 : None | list[float] = None,
                fixed_center : bool = False,
-               center_pos : float = 0.0
+               center_pos : float = 0.0,
+               variable_projection : bool = False
                ) -> list[np.ndarray]:
     '''
     Fits the signal to the theoretical function of of a magnetic pointlike dipol crossing
@@ -106,6 +157,9 @@ def fit_signal(position : np.ndarray,
         If the fit is performed with a fixed center of the signal. The default is False.
     center_pos : float, optional
         The fixed center of the signal. The default is 0.0.
+    variable_projection : bool, optional
+        If the fit with a free center only searches the center around the center of p0
+        and solves the other parameters directly. The default is False.
 
     Returns
     -------
@@ -116,11 +170,231 @@ def fit_signal(position : np.ndarray,
     if p0 is None:
         p0 : list[float] = [0, np.mean(voltage), 0, 37]
     if fixed_center:
-        result = curve_fit(gradiometer_function_fixed_center(center_pos), position, voltage, p0=p0[:3])
+        # the fit with a fixed center is linear, p0 isn't needed
+        result = fit_signal_fixed_center(position, voltage, center_pos)
+    elif variable_projection:
+        result = fit_signal_variable_projection(position, voltage, p0[3])
     else:
-        result = curve_fit(gradiometer_function, position, voltage, p0=p0)
+        result = curve_fit(gradiometer_function, position, voltage, p0=p0, jac=gradiometer_jacobian)
     return result
 
+def fit_signal_fixed_center(position : np.ndarray,
+                            voltage : np.ndarray,
+                            center_pos : float | np.ndarray,
+                            mask : np.ndarray | None = None
+                            ) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Fits the signal with a fixed center by linear least squares. With a fixed center the
+    gradiometer function is linear in the amplitude, shift and slope, so the fit is solved
+    directly instead of iteratively. Many signals are fitted at once, if voltage contains
+    one signal per row. If they share the positions and the center, the design matrix is
+    only decomposed once.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The positions of the dipole, either shared by all signals or one row per signal.
+    voltage : np.ndarray
+        The generated voltage of the dipole, one row per signal.
+    center_pos : float | np.ndarray
+        The fixed center of the signal or of every signal.
+    mask : np.ndarray | None, optional
+        Which points of the rows are valid, if the signals are padded to the same length.
+        The default is None, which means all points.
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray)
+        The fitted amplitude, shift and slope and their covariance like curve_fit returns
+        them, with an additional leading axis if many signals are fitted.
+
+    '''
+    position : np.ndarray = np.asarray(position, dtype=float)
+    voltage : np.ndarray = np.asarray(voltage, dtype=float)
+    center_pos : np.ndarray = np.asarray(center_pos, dtype=float)
+    design : np.ndarray = _fixed_center_design(position, center_pos)
+    if mask is not None:
+        # invalid points don't contribute to the least squares
+        design : np.ndarray = design * mask[..., None]
+        voltage : np.ndarray = np.where(mask, voltage, 0)
+    pseudo_inverse : np.ndarray = np.linalg.pinv(design)
+    popt : np.ndarray = np.einsum("...ij,...j->...i", pseudo_inverse, voltage)
+    residuals : np.ndarray = voltage - np.einsum("...ij,...j->...i", design, popt)
+    dof : np.ndarray = (voltage.shape[-1] if mask is None else np.sum(mask, axis=-1)) - 3
+    # curve_fit scales the covariance with the reduced chi square and returns inf without
+    # degrees of freedom
+    pcov : np.ndarray = pseudo_inverse @ np.swapaxes(pseudo_inverse, -1, -2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pcov *= (np.sum(residuals**2, axis=-1) / dof)[..., None, None]
+    pcov[dof <= 0] = np.inf
+    return popt, pcov
+
+def fit_signal_variable_projection(position : np.ndarray,
+                                   voltage : np.ndarray,
+                                   center_guesses : float | list[float] | None = None,
+                                   max_iterations : int = 20,
+                                   full_output : bool = False
+                                   ) -> tuple[np.ndarray, np.ndarray] | tuple[np.ndarray, np.ndarray, int]:
+    '''
+    Fits the signal with a free center by variable projection. For every center the
+    amplitude, shift and slope are solved directly, so only the sum of the squared
+    residuals as a function of the center is minimised. The minimum is bracketed by a few
+    candidate centers around the guessed centers, e.g. of the header and of MultiVu, and
+    refined by Gauss-Newton steps with the analytic derivative of the projected residual.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The position of the dipole.
+    voltage : np.ndarray
+        The generated voltage of the dipole.
+    center_guesses : float | list[float] | None, optional
+        The guessed centers, around which the candidates are placed at the
+        VARIABLE_PROJECTION_OFFSETS. The default is None, which means
+        VARIABLE_PROJECTION_GRID_SIZE candidates cover the range of the positions.
+    max_iterations : int, optional
+        The maximum number of Gauss-Newton steps. The default is 20.
+    full_output : bool, optional
+        If the number of model evaluations is returned as well, counted per center
+        like the function evaluations of curve_fit. The default is False.
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray) | tuple(np.ndarray, np.ndarray, int)
+        The fitted amplitude, shift, slope and center and their covariance like
+        curve_fit returns them and, if requested, the number of model evaluations.
+
+    '''
+    position : np.ndarray = np.asarray(position, dtype=float)
+    voltage : np.ndarray = np.asarray(voltage, dtype=float)
+    lower : float = float(np.min(position))
+    upper : float = float(np.max(position))
+    if center_guesses is None:
+        candidates : np.ndarray = np.linspace(lower, upper, constants.VARIABLE_PROJECTION_GRID_SIZE)
+    else:
+        candidates : np.ndarray = np.unique(np.clip(np.add.outer(np.atleast_1d(np.asarray(center_guesses, dtype=float)),
+                                                                 constants.VARIABLE_PROJECTION_OFFSETS).ravel(), lower, upper))
+    sum_sq : np.ndarray = _projected_sum_of_squares(position, voltage, candidates)[1]
+    center : float = float(candidates[np.argmin(sum_sq)])
+    popt, sum_sq, gradient, curvature = _projected_center_terms(position, voltage, center)
+    nr_evaluations : int = len(candidates) + 1
+    tolerance : float = 1e-9 * (1 + abs(center))
+    for _ in range(max_iterations):
+        if curvature <= 0:
+            break
+        step : float = min(max(center - gradient / curvature, lower), upper) - center
+        if abs(step) < tolerance:
+            break
+        # the step is halved, until the residual doesn't grow
+        while True:
+            new_terms : tuple = _projected_center_terms(position, voltage, center + step)
+            nr_evaluations += 1
+            if new_terms[1] <= sum_sq or abs(step) < tolerance:
+                break
+            step /= 2
+        center += step
+        popt, sum_sq, gradient, curvature = new_terms
+    popt : np.ndarray = np.append(popt, center)
+    jacobian : np.ndarray = gradiometer_jacobian(position, *popt)
+    dof : int = len(voltage) - 4
+    pcov : np.ndarray = np.linalg.pinv(jacobian.T @ jacobian)
+    if dof > 0:
+        pcov *= np.sum((voltage - gradiometer_function(position, *popt))**2) / dof
+    else:
+        pcov[...] = np.inf
+    if full_output:
+        return popt, pcov, nr_evaluations
+    return popt, pcov
+
+def _projected_center_terms(position : np.ndarray,
+                            voltage : np.ndarray,
+                            center : float
+                            ) -> tuple[np.ndarray, float, float, float]:
+    '''
+    Solves the amplitude, shift and slope of the signal for one center and calculates the
+    derivative of half the projected sum of squares with respect to the center and its
+    Gauss-Newton approximation of the second derivative. The amplitude, shift and slope
+    are optimal for every center, so they don't contribute to the first derivative.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The position of the dipole.
+    voltage : np.ndarray
+        The generated voltage of the dipole.
+    center : float
+        The center of the signal.
+
+    Returns
+    -------
+    tuple(np.ndarray, float, float, float)
+        The amplitude, shift and slope, the sum of the squared residuals, the first and
+        the approximated second derivative.
+
+    '''
+    dipole, dipole_derivative = _dipole_terms(position - center)
+    design : np.ndarray = np.stack((dipole, np.ones_like(position), position), axis=-1)
+    # the parameters and the projection of the derivative of the dipole on the columns
+    # of the design matrix share the normal matrix
+    solution : np.ndarray = np.linalg.solve(design.T @ design, design.T @ np.stack((voltage, dipole_derivative), axis=-1))
+    popt : np.ndarray = solution[:, 0]
+    residuals : np.ndarray = voltage - design @ popt
+    # the derivative of the model with respect to the center is -A times the derivative
+    # of the dipole, only its part outside of the columns of the design matrix counts
+    projected : np.ndarray = dipole_derivative - design @ solution[:, 1]
+    return (popt, float(residuals @ residuals), float(popt[0] * (residuals @ dipole_derivative)),
+            float(popt[0]**2 * (projected @ projected)))
+
+def _projected_sum_of_squares(position : np.ndarray,
+                              voltage : np.ndarray,
+                              centers : np.ndarray
+                              ) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Solves the amplitude, shift and slope of the signal for many centers at once.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The position of the dipole.
+    voltage : np.ndarray
+        The generated voltage of the dipole.
+    centers : np.ndarray
+        The centers of the signal.
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray)
+        The amplitude, shift and slope and the sum of the squared residuals for
+        every center.
+
+    '''
+    design : np.ndarray = _fixed_center_design(position, centers)
+    normal_matrix : np.ndarray = np.einsum("kij,kil->kjl", design, design)
+    popt : np.ndarray = np.linalg.solve(normal_matrix, np.einsum("kij,i->kj", design, voltage)[..., None])[..., 0]
+    residuals : np.ndarray = voltage - np.einsum("kij,kj->ki", design, popt)
+    return popt, np.sum(residuals**2, axis=-1)
+
+def _fixed_center_design(position : np.ndarray, center_pos : np.ndarray) -> np.ndarray:
+    '''
+    Creates the design matrix of the gradiometer function with a fixed center, whose
+    columns belong to the amplitude, shift and slope.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The positions of the dipole, either shared by all signals or one row per signal.
+    center_pos : np.ndarray
+        The fixed center of the signal or of every signal.
+
+    Returns
+    -------
+    np.ndarray
+        The design matrix with an additional leading axis for many signals.
+
+    '''
+    return np.stack(np.broadcast_arrays(gradiometer_function(position, 1, 0, 0, center_pos[..., None]),
+                                        np.ones_like(position), position), axis=-1)
+
 def convert_amplitude_to_moment(amplitude : float) -> float:
     '''
     Converts the fitted ampliutde to the corresponding moment value. The corresponding
@@ -137,4 +411,4 @@ def convert_amplitude_to_moment(amplitude : float) -> float:
         The converted moment.
 
     '''
-    return - SYSTEM_CALIBRATION * DC_CALIBRATION_FACTOR * amplitude / 1000
\ No newline at end of file
+    return - constants.SYSTEM_CALIBRATION * constants.DC_CALIBRATION_FACTOR * amplitude / 1000
\ No newline at end of file
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:05:46 2026
+
+@author: kaisjuli
+"""
+import numpy as np
+
+from .signal_fit import fit_signal_fixed_center
+
+WARM_START_SOURCES : tuple[str, ...] = ("default", "header", "previous", "median")
+
+def warm_start_parameters(position : np.ndarray,
+                          voltage : np.ndarray,
+                          p0 : np.ndarray,
+                          source : str = "default",
+                          centers : np.ndarray | None = None,
+                          previous : np.ndarray | None = None,
+                          mask : np.ndarray | None = None
+    ) -> np.ndarray:
+    '''
+    Determines the start parameters of many fits with a free center. Except for the
+    default source only the start center is taken from the source, the amplitude, shift
+    and slope are solved directly for this center, so they are exact from the beginning.
+    The sources are
+        - default : the given start parameters
+        - header : the centers from the info lines of the raw datafile
+        - previous : the fitted centers of the previous datapoints, fits without a
+                     previous center use the centers from the header
+        - median : the median of the centers from the header of all fits
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The positions of the dipole, one row per signal.
+    voltage : np.ndarray
+        The generated voltages of the dipole, one row per signal.
+    p0 : np.ndarray
+        The default start parameters of every signal.
+    source : str, optional
+        The source of the start center, one of WARM_START_SOURCES. The default is
+        'default'.
+    centers : np.ndarray | None, optional
+        The centers from the info lines of every signal. Needed for all sources except
+        the default source. The default is None.
+    previous : np.ndarray | None, optional
+        The fitted parameters of the previous datapoint of every signal, NaN if there is
+        none. Needed for the previous source. The default is None.
+    mask : np.ndarray | None, optional
+        Which points of the rows are valid. The default is None, which means all points.
+
+    Raises
+    ------
+    ValueError
+        If the source is unknown.
+
+    Returns
+    -------
+    np.ndarray
+        The start parameters of every signal.
+
+    '''
+    if source not in WARM_START_SOURCES:
+        raise ValueError("unknown warm start source '{}', expected one of {}".format(source, WARM_START_SOURCES))
+    p0 : np.ndarray = np.array(p0, dtype=float)
+    if source == "default" or len(p0) == 0:
+        return p0
+    start_center : np.ndarray = np.array(centers, dtype=float)
+    if source == "previous" and previous is not None:
+        start_center : np.ndarray = np.where(np.isnan(previous[:, 3]), start_center, previous[:, 3])
+    elif source == "median":
+        start_center : np.ndarray = np.full(len(p0), np.nanmedian(start_center))
+    # signals without a usable center keep the default start
+    start_center : np.ndarray = np.where(np.isfinite(start_center), start_center, p0[:, 3])
+    linear : np.ndarray = fit_signal_fixed_center(position, voltage, start_center, mask)[0]
+    return np.column_stack((linear, start_center))
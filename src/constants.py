@@ -4,8 +4,44 @@ Created on Thu Aug 21 14:20:41 2025
 
 @author: kaisjuli
 """
+import os
 
 COIL_RADIUS : float = 8.3654
 COIL_DISTANCE : float = 7.9600
 SYSTEM_CALIBRATION : float = 0.00285897
 DC_CALIBRATION_FACTOR : float = 14.7029
+
+JUMP_VOLTAGE_LIMIT : float = 500
+JUMP_THRESHOLD : float = 10
+
+RAW_DATA_CACHE_DIRECTORY : str = os.path.join(os.path.expanduser("~"), ".mpms_subtractor", "raw_data_cache")
+RAW_DATA_CACHE_MAX_SIZE : int = 2 * 1024**3
+# has to be increased, if the parsing or the layout of the cache entries changes
+RAW_DATA_CACHE_FORMAT_VERSION : int = 1
+
+FIT_RESULT_CACHE_FILE : str = os.path.join(os.path.expanduser("~"), ".mpms_subtractor", "fit_result_cache.sqlite")
+FIT_RESULT_CACHE_MAX_ENTRIES : int = 1000000
+# the number of inserted entries, after which the size of the cache is checked again
+FIT_RESULT_CACHE_EVICTION_INTERVAL : int = 10000
+
+BACKGROUND_LIBRARY_FILE : str = os.path.join(os.path.expanduser("~"), ".mpms_subtractor", "background_library.sqlite")
+
+FIT_CHUNK_SIZE : int = 2000
+
+GRADIOMETER_KERNEL_TOLERANCE : float = 1e-10
+GRADIOMETER_KERNEL_EXTENT : float = 100
+
+# the candidate centers in mm of the variable projection around every guessed center
+VARIABLE_PROJECTION_OFFSETS : tuple[float, ...] = (-4, 0, 4)
+VARIABLE_PROJECTION_GRID_SIZE : int = 36
+
+QUICK_LOOK_CHUNK_SIZE : int = 500
+# the number of sample scans, which are matched at once by the streaming indirect mapping
+SCAN_STREAM_BLOCK_SIZE : int = 100
+
+DIRECT_MAPPING_MAX_TEMP_DIFF : float = 0.25
+DIRECT_MAPPING_MAX_FIELD_DIFF : float = 2
+INDIRECT_MAPPING_MAX_TEMP_DIFF : float = 0.1
+INDIRECT_MAPPING_MAX_FIELD_DIFF : float = 10
+
+BACKGROUND_SURFACE_CACHE_SIZE : int = 10000
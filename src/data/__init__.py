@@ -8,7 +8,16 @@ Created on Mon May 12 13:51:05 2025
 from .rawdatafile import RawDataFile
 from .rawdatapoint import RawDataPoint
 from .rawdatapointcontainer import RawDataPointContainer
+from .columnarrawdatapointcontainer import ColumnarRawDataPointContainer
+from .rawdatacache import RawDataCache
+from .fitresultcache import FitResultCache
+from .sharedarrays import SharedArrays
 from .measurement import Measurement
 from .measurementdatapoint import MeasurementDataPoint
 from .measurementdatapointcontainer import MeasurementDataPointContainer
-from .measurementcontainer import MeasurementContainer
\ No newline at end of file
+from .fitresult import FitResult
+from .measurementcontainer import MeasurementContainer
+from .backgroundregistry import BackgroundRegistry
+from .backgroundlibrary import BackgroundLibrary
+from .backgroundsurface import BackgroundSurface
+from .scanstream import iter_scans, iter_measurement_points
\ No newline at end of file
@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 09:14:48 2026
+
+@author: kaisjuli
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .fitresultcache import FitResultCache
+
+import os
+import sqlite3
+import threading
+import numpy as np
+
+from .rawdatafile import RawDataFile
+from .rawdatapoint import RawDataPoint
+from .rawdataparser import INFO_DTYPE
+from .fitresult import FitResult
+from .measurementdatapoint import MeasurementDataPoint
+from .measurementdatapointcontainer import MeasurementDataPointContainer
+from ..calculation import match_background
+from ..constants import BACKGROUND_LIBRARY_FILE
+
+class BackgroundLibrary():
+    """
+    A class to store the background scans of sample holders in a SQLite database, so they
+    can be used as templates for the background of any measurement with the same sample
+    holder without parsing and fitting a background file. Every scan is stored sorted and
+    jump corrected together with the results of its fits with a free and a fixed center.
+    The scans are indexed by SAMPLE_HOLDER, SAMPLE_HOLDER_DETAIL, temperature and field.
+    The connection to the database is opened on first use in every process and thread and
+    isn't pickled, so the library can be passed to worker processes.
+
+    Parameters
+    ----------
+    filename : str, optional
+        The filename of the database. The default is BACKGROUND_LIBRARY_FILE.
+
+    Attributes
+    ----------
+    filename : str
+        The filename of the database.
+    """
+
+    def __init__(self, filename : str = BACKGROUND_LIBRARY_FILE) -> None:
+        self.filename : str = filename
+        # sqlite connections can't be shared between threads
+        self.__local : threading.local = threading.local()
+
+    def __getstate__(self) -> dict:
+        '''
+        Gets the state for pickling without the connection to the database.
+
+        Returns
+        -------
+        dict
+            The filename.
+
+        '''
+        return {"filename" : self.filename}
+
+    def __setstate__(self, state : dict) -> None:
+        '''
+        Sets the state after unpickling, the connection is opened on first use.
+
+        Parameters
+        ----------
+        state : dict
+            The filename.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.__init__(**state)
+
+    def add(self,
+            background_filename : str,
+            fit_cache : FitResultCache | None = None,
+            max_workers : int | None = 1
+        ) -> int:
+        '''
+        Parses and fits all scans of a background raw datafile and stores them as
+        templates of its sample holder. Templates of a previously added file with the same
+        filename are replaced.
+
+        Parameters
+        ----------
+        background_filename : str
+            The filename of the raw datafile of the background.
+        fit_cache : FitResultCache | None, optional
+            The cache of already performed fits. The default is None.
+        max_workers : int | None, optional
+            The maximum number of parallel processes for the fits. The default is 1.
+
+        Returns
+        -------
+        int
+            The number of stored templates.
+
+        '''
+        rdf : RawDataFile = RawDataFile(background_filename, columnar=True)
+        datapoints : MeasurementDataPointContainer = MeasurementDataPointContainer(fit_cache=fit_cache, max_workers=max_workers)
+        datapoints.add_many([(None, rdp) for rdp in rdf[:]], fit=False)
+        datapoints.fit(results=("background_result",))
+        source : str = os.path.abspath(background_filename)
+        rows : list[tuple] = []
+        for index, mdp in enumerate(datapoints):
+            rdp : RawDataPoint = mdp.background_rdp
+            data : np.ndarray = rdf.datapoints.data[rdf.datapoints.offsets[index]:rdf.datapoints.offsets[index + 1]]
+            result : FitResult = mdp.background_result
+            rows.append((rdf.sample_holder, rdf.sample_holder_detail, float(rdp.temperature), float(rdp.field),
+                         rdp.scan_direction, source, rdf.datapoints.info[index:index + 1].tobytes(), data.shape[1],
+                         np.ascontiguousarray(data, dtype=float).tobytes(),
+                         _encode(dict.get(result, "p0")),
+                         _encode(dict.get(result, "fit_coeff"), dict.get(result, "fit_err")),
+                         _encode(dict.get(result, "fit_fixed_ctr_coeff"), dict.get(result, "fit_fixed_ctr_err"))))
+        os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+        with self.__connect__() as connection:
+            connection.execute("DELETE FROM templates WHERE source = ?", (source,))
+            connection.executemany("INSERT INTO templates (sample_holder, sample_holder_detail, temperature, field, "
+                                   "scan_direction, source, info, nr_columns, data, p0, fit, fit_fixed_ctr) "
+                                   "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def remove(self, background_filename : str) -> None:
+        '''
+        Removes all templates of a background raw datafile.
+
+        Parameters
+        ----------
+        background_filename : str
+            The filename of the raw datafile of the background.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if not os.path.isfile(self.filename):
+            return
+        with self.__connect__() as connection:
+            connection.execute("DELETE FROM templates WHERE source = ?", (os.path.abspath(background_filename),))
+
+    def sample_holders(self) -> list[tuple[str | None, str | None, int]]:
+        '''
+        Lists the sample holders of the library.
+
+        Returns
+        -------
+        list[tuple(str | None, str | None, int)]
+            The sample holder, the details of the sample holder and the number of
+            templates of every sample holder.
+
+        '''
+        if not os.path.isfile(self.filename):
+            return []
+        with self.__connect__() as connection:
+            return connection.execute("SELECT sample_holder, sample_holder_detail, COUNT(*) FROM templates "
+                                      "GROUP BY sample_holder, sample_holder_detail").fetchall()
+
+    def match(self,
+              sample_holder : str | None,
+              sample_holder_detail : str | None,
+              temperature : np.ndarray,
+              field : np.ndarray,
+              scan_direction : np.ndarray,
+              max_temp_diff : float,
+              max_field_diff : float
+        ) -> np.ndarray:
+        '''
+        Finds the best matching template of the sample holder for every sample scan like
+        the indirect mapping. Only the templates within the temperature range of the
+        sample scans are read from the database.
+
+        Parameters
+        ----------
+        sample_holder : str | None
+            The sample holder of the sample raw datafile.
+        sample_holder_detail : str | None
+            The details of the sample holder of the sample raw datafile.
+        temperature : np.ndarray
+            The temperatures of the sample scans in K.
+        field : np.ndarray
+            The fields of the sample scans in Oe.
+        scan_direction : np.ndarray
+            The scan directions of the sample scans.
+        max_temp_diff : float
+            The maximum temperature difference in K.
+        max_field_diff : float
+            The maximum field difference in Oe.
+
+        Returns
+        -------
+        np.ndarray
+            The id of the matching template of every sample scan, -1 if there is none.
+
+        '''
+        temperature : np.ndarray = np.asarray(temperature, dtype=float)
+        if len(temperature) == 0 or not os.path.isfile(self.filename):
+            return np.full(len(temperature), -1, dtype=np.int64)
+        with self.__connect__() as connection:
+            rows : list[tuple] = connection.execute(
+                "SELECT id, temperature, field, scan_direction FROM templates WHERE sample_holder IS ? "
+                "AND sample_holder_detail IS ? AND temperature BETWEEN ? AND ?",
+                (sample_holder, sample_holder_detail, float(np.min(temperature)) - max_temp_diff,
+                 float(np.max(temperature)) + max_temp_diff)).fetchall()
+        if len(rows) == 0:
+            return np.full(len(temperature), -1, dtype=np.int64)
+        ids, template_temperature, template_field, template_direction = zip(*rows)
+        matches : np.ndarray = match_background(temperature, field, template_temperature, template_field,
+                                                max_temp_diff, max_field_diff, scan_direction, template_direction)
+        return np.where(matches < 0, -1, np.array(ids, dtype=np.int64)[matches])
+
+    def load(self, ids : list[int]) -> dict[int, tuple[RawDataPoint, FitResult]]:
+        '''
+        Loads templates of the library. The results of the templates are already fitted
+        and are never fitted again.
+
+        Parameters
+        ----------
+        ids : list[int]
+            The ids of the templates.
+
+        Returns
+        -------
+        dict[int, tuple[RawDataPoint, FitResult]]
+            The raw datapoint and the results of the fits of every template.
+
+        '''
+        ids : list[int] = [int(template_id) for template_id in ids]
+        templates : dict[int, tuple[RawDataPoint, FitResult]] = {}
+        if len(ids) == 0 or not os.path.isfile(self.filename):
+            return templates
+        with self.__connect__() as connection:
+            for start in range(0, len(ids), 500):
+                chunk : list[int] = ids[start:start + 500]
+                rows : list[tuple] = connection.execute(
+                    "SELECT id, info, nr_columns, data, p0, fit, fit_fixed_ctr FROM templates WHERE id IN ({})".format(
+                        ",".join("?" * len(chunk))), chunk).fetchall()
+                for template_id, info, nr_columns, data, p0, fit, fit_fixed_ctr in rows:
+                    rdp : RawDataPoint = RawDataPoint(np.frombuffer(info, dtype=INFO_DTYPE)[0],
+                                                      np.frombuffer(data, dtype=float).reshape(-1, nr_columns), True)
+                    # without a fit function the stored results are final
+                    result : FitResult = FitResult()
+                    if p0 is not None:
+                        MeasurementDataPoint.set_fitting_result(result, list(_decode(p0)[0]), _decode(fit), _decode(fit_fixed_ctr))
+                    templates[template_id] = (rdp, result)
+        return templates
+
+    def clear(self) -> None:
+        '''
+        Removes all templates of the library.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.__close__()
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+
+    def __len__(self) -> int:
+        '''
+        Returns the number of templates of the library.
+
+        Returns
+        -------
+        int
+            The number of templates of the library.
+
+        '''
+        if not os.path.isfile(self.filename):
+            return 0
+        with self.__connect__() as connection:
+            return connection.execute("SELECT COUNT(*) FROM templates").fetchone()[0]
+
+    def __connect__(self) -> sqlite3.Connection:
+        '''
+        Gets the connection to the database of this process and thread and opens it and
+        creates the table, if necessary. The connection commits, when it is used as a
+        context manager.
+
+        Returns
+        -------
+        sqlite3.Connection
+            The connection to the database.
+
+        '''
+        connection : sqlite3.Connection | None = getattr(self.__local, "connection", None)
+        if connection is None or self.__local.pid != os.getpid() or not os.path.isfile(self.filename):
+            self.__close__()
+            connection : sqlite3.Connection = sqlite3.connect(self.filename, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS templates (id INTEGER PRIMARY KEY, sample_holder TEXT, "
+                               "sample_holder_detail TEXT, temperature REAL, field REAL, scan_direction TEXT, "
+                               "source TEXT, info BLOB, nr_columns INTEGER, data BLOB, p0 BLOB, fit BLOB, "
+                               "fit_fixed_ctr BLOB)")
+            connection.execute("CREATE INDEX IF NOT EXISTS templates_holder ON templates "
+                               "(sample_holder, sample_holder_detail, temperature, field)")
+            connection.execute("CREATE INDEX IF NOT EXISTS templates_source ON templates (source)")
+            self.__local.connection : sqlite3.Connection | None = connection
+            self.__local.pid : int | None = os.getpid()
+        return connection
+
+    def __close__(self) -> None:
+        '''
+        Closes the connection to the database of this process and thread, if it is open.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if getattr(self.__local, "connection", None) is not None and self.__local.pid == os.getpid():
+            self.__local.connection.close()
+        self.__local.connection : sqlite3.Connection | None = None
+        self.__local.pid : int | None = None
+
+def _encode(*arrays : np.ndarray | list[float] | None) -> bytes | None:
+    '''
+    Encodes the coefficients and the covariance of a fit or the start conditions for the
+    database.
+
+    Parameters
+    ----------
+    *arrays : np.ndarray | list[float] | None
+        The coefficients and the covariance or the start conditions.
+
+    Returns
+    -------
+    bytes | None
+        The number of coefficients followed by all values or None, if any array is None.
+
+    '''
+    if any(array is None for array in arrays):
+        return None
+    return np.concatenate([[len(arrays[0])]] + [np.ravel(array) for array in arrays]).astype(float).tobytes()
+
+def _decode(blob : bytes | None) -> tuple[np.ndarray, np.ndarray] | None:
+    '''
+    Decodes the coefficients and the covariance of a fit or the start conditions of the
+    database.
+
+    Parameters
+    ----------
+    blob : bytes | None
+        The encoded values.
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray) | None
+        The coefficients and the covariance or the start conditions and an empty array.
+
+    '''
+    if blob is None:
+        return None
+    values : np.ndarray = np.frombuffer(blob, dtype=float)
+    nr_parameters : int = int(values[0])
+    return (values[1:nr_parameters + 1].copy(),
+            values[nr_parameters + 1:].reshape(nr_parameters, -1).copy() if len(values) > nr_parameters + 1 else np.zeros(0))
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 17:35:22 2026
+
+@author: kaisjuli
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .rawdatacache import RawDataCache
+    from .fitresult import FitResult
+
+import os
+
+from .rawdatafile import RawDataFile
+
+class BackgroundRegistry():
+    """
+    A class to share the raw datafiles of backgrounds and the fit results of their
+    datapoints between all measurements, which use the same background. Every background
+    raw datafile is parsed once on the first acquire and every background datapoint is
+    fitted once for all measurements. The measurements must only read the shared raw
+    datafiles. The fit results only depend on the background scans and are keyed by their
+    index, so they don't keep any measurement alive. The entries are counted and removed,
+    when the last measurement released them.
+
+    Parameters
+    ----------
+    cache : RawDataCache | None, optional
+        The cache of already parsed raw datafiles. The default is None.
+
+    Attributes
+    ----------
+    cache : RawDataCache | None
+        The cache of already parsed raw datafiles.
+    """
+
+    def __init__(self, cache : RawDataCache | None = None) -> None:
+        self.cache : RawDataCache | None = cache
+        self.__entries : dict[str, tuple[RawDataFile, dict[int, FitResult]]] = {}
+        self.__reference_counts : dict[str, int] = {}
+
+    def acquire(self, filename : str) -> RawDataFile:
+        '''
+        Gets the shared raw datafile of a background and parses it, if it isn't used yet.
+
+        Parameters
+        ----------
+        filename : str
+            The filename of the raw datafile of the background.
+
+        Returns
+        -------
+        RawDataFile
+            The shared raw datafile.
+
+        '''
+        key : str = os.path.abspath(filename)
+        if key not in self.__entries:
+            self.__entries[key] = (RawDataFile(filename, cache=self.cache), {})
+            self.__reference_counts[key] = 0
+        self.__reference_counts[key] += 1
+        return self.__entries[key][0]
+
+    def release(self, filename : str) -> None:
+        '''
+        Releases a background, which isn't used by a measurement anymore, and removes it,
+        if no measurement uses it.
+
+        Parameters
+        ----------
+        filename : str
+            The filename of the raw datafile of the background.
+
+        Returns
+        -------
+        None.
+
+        '''
+        key : str = os.path.abspath(filename)
+        if key not in self.__entries:
+            return
+        self.__reference_counts[key] -= 1
+        if self.__reference_counts[key] <= 0:
+            del self.__entries[key]
+            del self.__reference_counts[key]
+
+    def results(self, filename : str) -> dict[int, FitResult]:
+        '''
+        Gets the shared fit results of the datapoints of an acquired background.
+
+        Parameters
+        ----------
+        filename : str
+            The filename of the raw datafile of the background.
+
+        Returns
+        -------
+        dict[int, FitResult]
+            The fit results by the index of the raw datapoints in the shared raw datafile.
+
+        '''
+        return self.__entries[os.path.abspath(filename)][1]
+
+    def reference_count(self, filename : str) -> int:
+        '''
+        Gets the number of measurements, which use a background.
+
+        Parameters
+        ----------
+        filename : str
+            The filename of the raw datafile of the background.
+
+        Returns
+        -------
+        int
+            The number of measurements.
+
+        '''
+        return self.__reference_counts.get(os.path.abspath(filename), 0)
+
+    def __contains__(self, filename : str) -> bool:
+        '''
+        Checks if a background is used by any measurement.
+
+        Parameters
+        ----------
+        filename : str
+            The filename of the raw datafile of the background.
+
+        Returns
+        -------
+        bool
+            True, if the background is registered.
+
+        '''
+        return os.path.abspath(filename) in self.__entries
+
+    def __len__(self) -> int:
+        '''
+        Returns the number of registered backgrounds.
+
+        Returns
+        -------
+        int
+            The number of registered backgrounds.
+
+        '''
+        return len(self.__entries)
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 14:37:05 2026
+
+@author: kaisjuli
+"""
+from __future__ import annotations
+
+import numpy as np
+from scipy.interpolate import interp1d, LinearNDInterpolator
+from scipy.spatial import QhullError
+
+from .rawdatapoint import RawDataPoint
+from .rawdataparser import INFO_FIELDS, INFO_DTYPE
+from ..constants import INDIRECT_MAPPING_MAX_FIELD_DIFF, BACKGROUND_SURFACE_CACHE_SIZE
+
+class BackgroundSurface():
+    """
+    A class to synthesize background scans at any temperature and field from all scans of
+    a background measurement, e.g. for sample scans without a matching background scan.
+    All background scans are resampled once on a common position grid and their voltages
+    are interpolated linearly over the temperature or, if the fields of the scans differ,
+    over the temperature and the field. Every scan direction gets its own interpolation,
+    outside of its scans the scans of both directions are used. Outside of the measured
+    temperatures and fields no scans are synthesized. The synthesized scans are cached.
+
+    The accuracy is estimated by interpolating every second background scan from the
+    others. The estimate contains the noise and the differences between single scans,
+    which no interpolation can reproduce, and overestimates the error of the smooth
+    part due to the doubled spacing.
+
+    Parameters
+    ----------
+    background_rdps : list[RawDataPoint]
+        The raw datapoints of the background measurement.
+    max_field_diff : float, optional
+        The maximum field difference in Oe of a synthesized scan to the background scans,
+        if all background scans have the same field. The default is
+        INDIRECT_MAPPING_MAX_FIELD_DIFF.
+    cache_size : int, optional
+        The maximum number of cached scans. The default is BACKGROUND_SURFACE_CACHE_SIZE.
+
+    Attributes
+    ----------
+    max_field_diff : float
+        The maximum field difference of a synthesized scan to the background scans.
+    cache_size : int
+        The maximum number of cached scans.
+    position : np.ndarray
+        The common positions of all synthesized scans.
+    accuracy : float
+        The root mean square of the estimated errors in V of scans synthesized at the
+        background scans. NaN, if there are too few background scans.
+    """
+
+    def __init__(self,
+                 background_rdps : list[RawDataPoint],
+                 max_field_diff : float = INDIRECT_MAPPING_MAX_FIELD_DIFF,
+                 cache_size : int = BACKGROUND_SURFACE_CACHE_SIZE
+        ) -> None:
+        self.max_field_diff : float = max_field_diff
+        self.cache_size : int = cache_size
+        self.__cache : dict[tuple[float, float, str], tuple[RawDataPoint | None, float]] = {}
+        self.__models : dict[str | None, tuple[interp1d | LinearNDInterpolator, float | None]] = {}
+        self.accuracy : float = np.nan
+        if len(background_rdps) == 0:
+            self.position : np.ndarray = np.zeros(0)
+            return
+        self.position : np.ndarray = np.linspace(max(np.min(rdp.raw_position) for rdp in background_rdps),
+                                                 min(np.max(rdp.raw_position) for rdp in background_rdps),
+                                                 int(np.median([len(rdp.raw_position) for rdp in background_rdps])))
+        temperature : np.ndarray = np.array([rdp.temperature for rdp in background_rdps])
+        field : np.ndarray = np.array([rdp.field for rdp in background_rdps])
+        direction : np.ndarray = np.array([rdp.scan_direction for rdp in background_rdps])
+        # the voltages, the processed voltages and the secondary information are interpolated together
+        values : np.ndarray = np.column_stack((
+            np.array([np.interp(self.position, rdp.raw_position, rdp.raw_voltage) for rdp in background_rdps]),
+            np.array([np.interp(self.position, rdp.raw_position, rdp.processed_voltage) for rdp in background_rdps]),
+            np.array([[getattr(rdp, name) for name in INFO_FIELDS] for rdp in background_rdps])))
+        errors : dict[str | None, np.ndarray] = {}
+        for key in [None] + sorted(set(direction)):
+            selected : np.ndarray = np.ones(len(direction), dtype=bool) if key is None else direction == key
+            model, error = self.__build__(temperature[selected], field[selected], values[selected])
+            if model is not None:
+                self.__models[key] = model
+                errors[key] = error
+        # the interpolations of single scan directions are used, if they exist
+        used : list[np.ndarray] = [error for key, error in errors.items() if key is not None] or list(errors.values())
+        if len(used) > 0 and np.any(np.isfinite(np.concatenate(used))):
+            self.accuracy : float = float(np.sqrt(np.nanmean(np.concatenate(used)**2)))
+
+    def __build__(self,
+                  temperature : np.ndarray,
+                  field : np.ndarray,
+                  values : np.ndarray
+        ) -> tuple[tuple[interp1d | LinearNDInterpolator, float | None] | None, np.ndarray | None]:
+        '''
+        Builds the interpolation of the values of some background scans together with the
+        estimated error of every scan, which is interpolated as last value.
+
+        Parameters
+        ----------
+        temperature : np.ndarray
+            The temperatures of the scans in K.
+        field : np.ndarray
+            The fields of the scans in Oe.
+        values : np.ndarray
+            The interpolated values of every scan, one row per scan.
+
+        Returns
+        -------
+        tuple(tuple[interp1d | LinearNDInterpolator, float | None] | None, np.ndarray | None)
+            The interpolation of the values and the error like __interpolation__ and the
+            estimated errors of the scans. None, if there are too few scans.
+
+        '''
+        nr_points : int = len(self.position)
+        error : np.ndarray = np.full(len(temperature), np.nan)
+        order : np.ndarray = np.lexsort((field, temperature))
+        for known, unknown in ((order[::2], order[1::2]), (order[1::2], order[::2])):
+            half : tuple | None = self.__interpolation__(temperature[known], field[known], values[known, :nr_points])
+            if half is not None and len(unknown) > 0:
+                residual : np.ndarray = (self.__interpolate__(half, temperature[unknown], field[unknown])
+                                         - values[unknown, :nr_points])
+                error[unknown] = np.sqrt(np.mean(residual**2, axis=1))
+        # the scans at the borders can't be interpolated from the others
+        if np.any(np.isfinite(error)):
+            error[~np.isfinite(error)] = np.nanmax(error)
+        model : tuple | None = self.__interpolation__(temperature, field, np.column_stack((values, error)))
+        if model is None:
+            return None, None
+        return model, error
+
+    def __interpolation__(self,
+                          temperature : np.ndarray,
+                          field : np.ndarray,
+                          values : np.ndarray
+        ) -> tuple[interp1d | LinearNDInterpolator, float | None] | None:
+        '''
+        Creates the linear interpolation of values over the temperature, if all fields are
+        the same, otherwise over the temperature and the field. Outside of the scans the
+        interpolation is NaN.
+
+        Parameters
+        ----------
+        temperature : np.ndarray
+            The temperatures of the scans in K.
+        field : np.ndarray
+            The fields of the scans in Oe.
+        values : np.ndarray
+            The values of every scan, one row per scan.
+
+        Returns
+        -------
+        tuple(interp1d | LinearNDInterpolator, float | None) | None
+            The interpolation and the field of all scans, if it is only over the
+            temperature. None, if there are less than two temperatures or the scans are
+            on a line in the plane of temperature and field.
+
+        '''
+        unique_temperature, inverse = np.unique(temperature, return_inverse=True)
+        if len(unique_temperature) < 2:
+            return None
+        if np.ptp(field) < self.max_field_diff:
+            # scans at the same temperature are averaged
+            counts : np.ndarray = np.bincount(inverse)
+            averaged : np.ndarray = np.zeros((len(unique_temperature), values.shape[1]))
+            np.add.at(averaged, inverse, values)
+            return (interp1d(unique_temperature, averaged / counts[:, None], axis=0, bounds_error=False,
+                             fill_value=np.nan, assume_sorted=True), float(np.mean(field)))
+        try:
+            return (LinearNDInterpolator(np.column_stack((temperature, field)), values, fill_value=np.nan, rescale=True),
+                    None)
+        except QhullError:
+            return None
+
+    def __interpolate__(self,
+                        model : tuple[interp1d | LinearNDInterpolator, float | None],
+                        temperature : np.ndarray,
+                        field : np.ndarray
+        ) -> np.ndarray:
+        '''
+        Evaluates an interpolation at temperatures and fields.
+
+        Parameters
+        ----------
+        model : tuple[interp1d | LinearNDInterpolator, float | None]
+            The interpolation and the field of all scans, if it is only over the
+            temperature.
+        temperature : np.ndarray
+            The temperatures in K.
+        field : np.ndarray
+            The fields in Oe.
+
+        Returns
+        -------
+        np.ndarray
+            The interpolated values, one row per temperature and field.
+
+        '''
+        interpolation, field_level = model
+        if field_level is None:
+            return interpolation(np.column_stack((temperature, field)))
+        result : np.ndarray = interpolation(temperature)
+        result[np.abs(field - field_level) >= self.max_field_diff] = np.nan
+        return result
+
+    def evaluate(self,
+                 temperature : np.ndarray,
+                 field : np.ndarray,
+                 scan_direction : np.ndarray | None = None
+        ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        Synthesizes the background scans at many temperatures and fields at once.
+
+        Parameters
+        ----------
+        temperature : np.ndarray
+            The temperatures in K.
+        field : np.ndarray
+            The fields in Oe.
+        scan_direction : np.ndarray | None, optional
+            The scan directions. The default is None, which means the scans of both
+            directions are used.
+
+        Returns
+        -------
+        tuple(np.ndarray, np.ndarray, np.ndarray, np.ndarray)
+            The voltages and the processed voltages at the positions, one row per scan,
+            the secondary information of the type INFO_FIELDS of every scan and the
+            estimated error in V of every scan. The rows of scans outside of the
+            background scans are NaN.
+
+        '''
+        temperature : np.ndarray = np.asarray(temperature, dtype=float)
+        field : np.ndarray = np.asarray(field, dtype=float)
+        if scan_direction is None:
+            scan_direction : np.ndarray = np.full(len(temperature), None)
+        scan_direction : np.ndarray = np.asarray(scan_direction)
+        nr_points : int = len(self.position)
+        result : np.ndarray = np.full((len(temperature), 2 * nr_points + len(INFO_FIELDS) + 1), np.nan)
+        for direction in set(scan_direction.tolist()):
+            if direction in self.__models:
+                selected : np.ndarray = scan_direction == direction
+                result[selected] = self.__interpolate__(self.__models[direction], temperature[selected], field[selected])
+        # outside of the scans of their direction the scans of both directions are used
+        missing : np.ndarray = np.isnan(result[:, 0])
+        if None in self.__models and np.any(missing):
+            result[missing] = self.__interpolate__(self.__models[None], temperature[missing], field[missing])
+        return result[:, :nr_points], result[:, nr_points:2 * nr_points], result[:, 2 * nr_points:-1], result[:, -1]
+
+    def backgrounds(self,
+                    temperature : np.ndarray,
+                    field : np.ndarray,
+                    scan_direction : np.ndarray
+        ) -> tuple[list[RawDataPoint | None], np.ndarray]:
+        '''
+        Gets the synthesized background scans at many temperatures and fields as raw
+        datapoints. Only the scans, which aren't cached, are synthesized, all of them at
+        once.
+
+        Parameters
+        ----------
+        temperature : np.ndarray
+            The temperatures in K.
+        field : np.ndarray
+            The fields in Oe.
+        scan_direction : np.ndarray
+            The scan directions.
+
+        Returns
+        -------
+        tuple(list[RawDataPoint | None], np.ndarray)
+            The synthesized raw datapoints, None outside of the background scans, and the
+            estimated error in V of every scan.
+
+        '''
+        keys : list[tuple[float, float, str]] = [(round(float(t), 4), round(float(h), 2), str(d))
+                                                 for t, h, d in zip(temperature, field, scan_direction)]
+        missing : list[tuple[float, float, str]] = list(dict.fromkeys(key for key in keys if key not in self.__cache))
+        if len(missing) > 0:
+            t, h, d = (np.array(column) for column in zip(*missing))
+            voltage, processed_voltage, info, error = self.evaluate(t, h, d)
+            for index, key in enumerate(missing):
+                self.__cache[key] = (self.__raw_datapoint__(key, voltage[index], processed_voltage[index], info[index]),
+                                     float(error[index]))
+        rdps : list[RawDataPoint | None] = [self.__cache[key][0] for key in keys]
+        errors : np.ndarray = np.array([self.__cache[key][1] for key in keys])
+        while len(self.__cache) > self.cache_size:
+            del self.__cache[next(iter(self.__cache))]
+        return rdps, errors
+
+    def __raw_datapoint__(self,
+                          key : tuple[float, float, str],
+                          voltage : np.ndarray,
+                          processed_voltage : np.ndarray,
+                          info : np.ndarray
+        ) -> RawDataPoint | None:
+        '''
+        Creates the raw datapoint of a synthesized scan.
+
+        Parameters
+        ----------
+        key : tuple[float, float, str]
+            The temperature, the field and the scan direction of the scan.
+        voltage : np.ndarray
+            The voltages at the positions.
+        processed_voltage : np.ndarray
+            The processed voltages at the positions.
+        info : np.ndarray
+            The secondary information of the type INFO_FIELDS.
+
+        Returns
+        -------
+        RawDataPoint | None
+            The synthesized raw datapoint or None outside of the background scans.
+
+        '''
+        if len(voltage) == 0 or not np.all(np.isfinite(voltage)):
+            return None
+        temperature, field, direction = key
+        record : dict[str, float] = dict(zip(INFO_FIELDS, info))
+        record.update(low_temp=temperature, high_temp=temperature, avg_temp=temperature,
+                      low_field=field, high_field=field, squid_range=1.0)
+        # the voltages are already multiplied by the squid range
+        info_record : np.void = np.array(tuple(record[name] for name in INFO_FIELDS) + (False, direction), dtype=INFO_DTYPE)[()]
+        data : np.ndarray = np.column_stack((np.full(len(self.position), np.nan), self.position, voltage, processed_voltage))
+        return RawDataPoint(info_record, data, True)
+
+    def __len__(self) -> int:
+        '''
+        Returns the number of cached scans.
+
+        Returns
+        -------
+        int
+            The number of cached scans.
+
+        '''
+        return len(self.__cache)
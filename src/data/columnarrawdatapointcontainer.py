@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:03:27 2026
+
+@author: kaisjuli
+"""
+import numpy as np
+
+from .rawdatapoint import RawDataPoint, INFO_DTYPE
+
+class ColumnarRawDataPointContainer():
+    """
+    A class to store all datapoints of a raw datafile in contiguous arrays. The rows of all
+    scans are stored in one array and the secondary information in one record array. The
+    raw datapoints are only views on these arrays, which are created on their first access.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        The converted rows of all scans with the columns timestamp, raw position, raw voltage
+        and processed voltage.
+    offsets : np.ndarray
+        The offsets of the scans in the rows, such that scan i covers the rows
+        offsets[i]:offsets[i+1].
+    info : np.ndarray
+        The secondary information of all scans of the type INFO_DTYPE.
+
+    Attributes
+    ----------
+    data : np.ndarray
+        The converted rows of all scans.
+    offsets : np.ndarray
+        The offsets of the scans in the rows.
+    info : np.ndarray
+        The secondary information of all scans.
+    container : list[RawDataPoint | None]
+        Contains the raw datapoints, which were already accessed.
+
+    temperature : np.ndarray
+        The mean temperatures of all scans in K.
+    field : np.ndarray
+        The mean fields of all scans in Oe.
+    timestamp : np.ndarray
+        The last timestamp of all scans.
+    scan_index : np.ndarray
+        The index of the scan of every row.
+    """
+
+    def __init__(self, data : np.ndarray, offsets : np.ndarray, info : np.ndarray) -> None:
+        self.data : np.ndarray = data
+        self.offsets : np.ndarray = offsets
+        self.info : np.ndarray = info
+        self.container : list[RawDataPoint | None] = [None] * len(info)
+
+    def extend(self, data : np.ndarray, offsets : np.ndarray, info : np.ndarray) -> None:
+        '''
+        Appends converted scans to the container.
+
+        Parameters
+        ----------
+        data : np.ndarray
+            The converted rows of the new scans.
+        offsets : np.ndarray
+            The offsets of the new scans in their rows.
+        info : np.ndarray
+            The secondary information of the new scans of the type INFO_DTYPE.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.offsets : np.ndarray = np.concatenate((self.offsets[:-1], offsets + self.offsets[-1]))
+        self.data : np.ndarray = np.concatenate((self.data, data))
+        self.info : np.ndarray = np.concatenate((self.info, info.astype(INFO_DTYPE)))
+        self.container.extend([None] * len(info))
+
+    def select(self, index_map : np.ndarray) -> 'ColumnarRawDataPointContainer':
+        '''
+        Creates a new container with the scans at the given indices.
+
+        Parameters
+        ----------
+        index_map : np.ndarray
+            A list of indices, which scans should be selected.
+
+        Returns
+        -------
+        ColumnarRawDataPointContainer
+            The container with the selected scans.
+
+        '''
+        index_map : np.ndarray = np.arange(len(self))[index_map]
+        lengths : np.ndarray = np.diff(self.offsets)[index_map]
+        offsets : np.ndarray = np.zeros(len(index_map) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(lengths)
+        rows : np.ndarray = np.arange(offsets[-1]) + np.repeat(self.offsets[index_map] - offsets[:-1], lengths)
+        return ColumnarRawDataPointContainer(self.data[rows], offsets, self.info[index_map])
+
+    @property
+    def temperature(self) -> np.ndarray:
+        '''
+        Returns the mean temperatures of all scans.
+
+        Returns
+        -------
+        np.ndarray
+            The mean temperatures of all scans in K.
+
+        '''
+        return (self.info["high_temp"] + self.info["low_temp"]) / 2
+
+    @property
+    def field(self) -> np.ndarray:
+        '''
+        Returns the mean fields of all scans.
+
+        Returns
+        -------
+        np.ndarray
+            The mean fields of all scans in Oe.
+
+        '''
+        return (self.info["high_field"] + self.info["low_field"]) / 2
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        '''
+        Returns the last timestamp of all scans. Scans without rows get NaN.
+
+        Returns
+        -------
+        np.ndarray
+            The last timestamps of all scans.
+
+        '''
+        timestamps : np.ndarray = np.full(len(self), np.nan)
+        not_empty : np.ndarray = np.diff(self.offsets) > 0
+        timestamps[not_empty] = self.data[self.offsets[1:][not_empty] - 1, 0]
+        return timestamps
+
+    @property
+    def scan_index(self) -> np.ndarray:
+        '''
+        Returns the index of the scan of every row, e.g. to reduce the rows per scan.
+
+        Returns
+        -------
+        np.ndarray
+            The index of the scan of every row.
+
+        '''
+        return np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+    def __getitem__(self, index : int | slice) -> RawDataPoint | list[RawDataPoint]:
+        '''
+        Gets the datapoint from the container at the desired position.
+
+        Parameters
+        ----------
+        index : int | slice
+            The desired position in the container.
+
+        Returns
+        -------
+        RawDataPoint | list[RawDataPoint]
+            The raw datapoint at the specified position.
+
+        '''
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("datapoint index out of range")
+        if self.container[index] is None:
+            self.container[index] = RawDataPoint(self.info[index],
+                                                 self.data[self.offsets[index]:self.offsets[index + 1]],
+                                                 True)
+        return self.container[index]
+
+    def __len__(self) -> int:
+        '''
+        Returns the amount of raw datapoints inside the container.
+
+        Returns
+        -------
+        int
+            The amount of raw datapoints inside the container.
+
+        '''
+        return len(self.info)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:37 2026
+
+@author: kaisjuli
+"""
+from __future__ import annotations
+from typing import Callable
+import numpy as np
+
+FREE_CENTER_KEYS : tuple[str, ...] = ("moment", "moment_err", "fit_coeff", "fit_err")
+FIXED_CENTER_KEYS : tuple[str, ...] = ("moment_fixed_ctr", "moment_fixed_ctr_err", "fit_fixed_ctr_coeff", "fit_fixed_ctr_err")
+START_KEYS : tuple[str, ...] = ("p0", "fixed_ctr")
+# the results of the fits with a free center, which are exchanged in arrays, e.g. with
+# worker processes
+FREE_CENTER_DTYPE : np.dtype = np.dtype([("fit_coeff", float, (4,)), ("fit_err", float, (4, 4))])
+
+class FitResult(dict):
+    """
+    A dictionary of the results of one fitting task, whose fits are performed on the first
+    access of their keys and kept afterwards. The keys of the fit with a free center are
+    FREE_CENTER_KEYS, the keys of the fit with a fixed center FIXED_CENTER_KEYS. The start
+    conditions p0 and fixed_ctr are set by both fits, accessing them performs the cheaper
+    fit with a fixed center.
+
+    Parameters
+    ----------
+    fit_function : Callable[[FitResult, bool], None] | None, optional
+        Performs the fit with a fixed center, if the second argument is True, otherwise
+        the fit with a free center, and saves its results in the given FitResult. The
+        default is None, which means there is nothing to fit and all keys are None.
+
+    Attributes
+    ----------
+    fit_function : Callable[[FitResult, bool], None] | None
+        Performs the fits on demand.
+    """
+
+    def __init__(self, fit_function : Callable[[FitResult, bool], None] | None = None) -> None:
+        super().__init__()
+        self.fit_function : Callable[[FitResult, bool], None] | None = fit_function
+        if fit_function is None:
+            self.update(dict.fromkeys(START_KEYS + FREE_CENTER_KEYS + FIXED_CENTER_KEYS))
+
+    def __missing__(self, key : str):
+        '''
+        Performs the fit, which belongs to a key not set yet.
+
+        Parameters
+        ----------
+        key : str
+            The requested key.
+
+        Raises
+        ------
+        KeyError
+            If the key doesn't belong to any fit.
+
+        Returns
+        -------
+        None | float | list[float] | np.ndarray
+            The value of the key after fitting.
+
+        '''
+        if key in FREE_CENTER_KEYS:
+            self.fit_function(self, False)
+        elif key in FIXED_CENTER_KEYS or key in START_KEYS:
+            self.fit_function(self, True)
+        else:
+            raise KeyError(key)
+        return dict.__getitem__(self, key)
+
+    def is_fitted(self, fixed_center : bool = False) -> bool:
+        '''
+        Checks if the results of a fit are available without fitting.
+
+        Parameters
+        ----------
+        fixed_center : bool, optional
+            If the fit with a fixed center is checked, otherwise the fit with a free center.
+            The default is False.
+
+        Returns
+        -------
+        bool
+            True, if all results of the fit are set.
+
+        '''
+        keys : tuple[str, ...] = FIXED_CENTER_KEYS if fixed_center else FREE_CENTER_KEYS
+        return all(self.get(key) is not None for key in keys)
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:26:04 2026
+
+@author: kaisjuli
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+from .. import constants
+from ..constants import FIT_RESULT_CACHE_FILE, FIT_RESULT_CACHE_MAX_ENTRIES, FIT_RESULT_CACHE_EVICTION_INTERVAL
+
+class FitResultCache():
+    """
+    A class to store the coefficients and covariances of fits in a SQLite database, so
+    reopening a measurement doesn't require to fit it again. Every entry is keyed by a
+    hash of the fitted signal, the start conditions, the fit mode and the constants of the
+    gradiometer. The number of entries is counted once on the first connection and then
+    tracked by the saves. If it exceeds max_entries, the least recently used entries are
+    removed at most every eviction_interval inserted entries, so the cache can temporarily
+    contain slightly more entries, e.g. if several processes save. The connection to the
+    database is opened on first use in every process and thread and isn't pickled, so the
+    cache can be passed to worker processes and used by background threads.
+
+    Parameters
+    ----------
+    filename : str, optional
+        The filename of the database. The default is FIT_RESULT_CACHE_FILE.
+    max_entries : int, optional
+        The maximum number of entries. The default is FIT_RESULT_CACHE_MAX_ENTRIES.
+    eviction_interval : int, optional
+        The number of inserted entries, after which the cache is evicted again. The
+        default is FIT_RESULT_CACHE_EVICTION_INTERVAL.
+
+    Attributes
+    ----------
+    filename : str
+        The filename of the database.
+    max_entries : int
+        The maximum number of entries.
+    eviction_interval : int
+        The number of inserted entries, after which the cache is evicted again.
+    """
+
+    def __init__(self,
+                 filename : str = FIT_RESULT_CACHE_FILE,
+                 max_entries : int = FIT_RESULT_CACHE_MAX_ENTRIES,
+                 eviction_interval : int = FIT_RESULT_CACHE_EVICTION_INTERVAL
+        ) -> None:
+        self.filename : str = filename
+        self.max_entries : int = max_entries
+        self.eviction_interval : int = eviction_interval
+        # sqlite connections can't be shared between threads
+        self.__local : threading.local = threading.local()
+        self.__lock : threading.Lock = threading.Lock()
+        # None until the entries are counted on the first connection
+        self.__nr_entries : int | None = None
+        self.__nr_inserts : int = 0
+        # is increased by clear, so the connections of all threads are opened again
+        self.__generation : int = 0
+        
+    def __getstate__(self) -> dict:
+        '''
+        Gets the state for pickling without the connection to the database.
+
+        Returns
+        -------
+        dict
+            The filename, the maximum number of entries and the eviction interval.
+
+        '''
+        return {"filename" : self.filename, "max_entries" : self.max_entries, "eviction_interval" : self.eviction_interval}
+    
+    def __setstate__(self, state : dict) -> None:
+        '''
+        Sets the state after unpickling, the connection is opened on first use.
+
+        Parameters
+        ----------
+        state : dict
+            The filename, the maximum number of entries and the eviction interval.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.__init__(**state)
+
+    def key(self,
+            position : np.ndarray,
+            voltage : np.ndarray,
+            p0 : list[float],
+            fixed_center : bool
+        ) -> str:
+        '''
+        Creates the key of a fit.
+
+        Parameters
+        ----------
+        position : np.ndarray
+            The positions of the fitted signal.
+        voltage : np.ndarray
+            The voltages of the fitted signal.
+        p0 : list[float]
+            The start conditions with the fixed center as last element.
+        fixed_center : bool
+            If the fit has a fixed center.
+
+        Returns
+        -------
+        str
+            The key of the fit.
+
+        '''
+        fit_hash = hashlib.blake2b(digest_size=16)
+        # the constants are read on every call, so a changed constant never hits an old fit
+        fit_hash.update("{}:{!r}:{!r}:{!r}:{!r}:".format("fixed" if fixed_center else "free", constants.COIL_RADIUS,
+                                                          constants.COIL_DISTANCE, constants.SYSTEM_CALIBRATION,
+                                                          constants.DC_CALIBRATION_FACTOR).encode())
+        fit_hash.update(np.asarray(p0, dtype=float).tobytes())
+        fit_hash.update(np.ascontiguousarray(position, dtype=float).tobytes())
+        fit_hash.update(np.ascontiguousarray(voltage, dtype=float).tobytes())
+        return fit_hash.hexdigest()
+
+    def load(self, keys : list[str]) -> list[tuple[np.ndarray, np.ndarray] | None]:
+        '''
+        Loads many entries of the cache and marks them as recently used.
+
+        Parameters
+        ----------
+        keys : list[str]
+            The keys of the fits.
+
+        Returns
+        -------
+        list[tuple(np.ndarray, np.ndarray) | None]
+            The coefficients and the covariance of every fit or None, if the entry doesn't
+            exist.
+
+        '''
+        results : dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        # without an open connection the database isn't created just to find nothing
+        if len(keys) == 0 or (getattr(self.__local, "connection", None) is None and not os.path.isfile(self.filename)):
+            return [None] * len(keys)
+        try:
+            with self.__connect__() as connection:
+                for start in range(0, len(keys), 500):
+                    chunk : list[str] = keys[start:start + 500]
+                    rows : list[tuple] = connection.execute(
+                        "SELECT key, nr_parameters, result FROM fits WHERE key IN ({})".format(",".join("?" * len(chunk))),
+                        chunk).fetchall()
+                    for key, nr_parameters, result in rows:
+                        values : np.ndarray = np.frombuffer(result, dtype=float)
+                        results[key] = (values[:nr_parameters].copy(),
+                                        values[nr_parameters:].reshape(nr_parameters, nr_parameters).copy())
+                    connection.executemany("UPDATE fits SET last_used = ? WHERE key = ?",
+                                           [(time.time(), key) for key, _, _ in rows])
+        except sqlite3.Error:
+            return [None] * len(keys)
+        return [results.get(key) for key in keys]
+
+    def save(self, keys : list[str], results : list[tuple[np.ndarray, np.ndarray]]) -> None:
+        '''
+        Saves many new entries to the cache and removes old entries, if the cache is too
+        large and eviction_interval entries were inserted since the last eviction.
+
+        Parameters
+        ----------
+        keys : list[str]
+            The keys of the fits.
+        results : list[tuple[np.ndarray, np.ndarray]]
+            The coefficients and the covariance of every fit.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if len(keys) == 0:
+            return
+        rows : list[tuple[str, int, bytes, float]] = []
+        for key, (coeff, cov) in zip(keys, results):
+            values : np.ndarray = np.concatenate((np.ravel(coeff), np.ravel(cov))).astype(float)
+            rows.append((key, len(coeff), values.tobytes(), time.time()))
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+            with self.__connect__() as connection:
+                connection.executemany("INSERT OR REPLACE INTO fits VALUES (?, ?, ?, ?)", rows)
+            with self.__lock:
+                # after clear on another thread the entries are counted on the next connection
+                if self.__nr_entries is None:
+                    return
+                # replaced entries are counted as well, evict corrects the count
+                self.__nr_entries += len(rows)
+                self.__nr_inserts += len(rows)
+                due : bool = self.__nr_inserts >= self.eviction_interval and self.__nr_entries > self.max_entries
+            if due:
+                self.evict()
+        except (OSError, sqlite3.Error):
+            return
+
+    def evict(self) -> None:
+        '''
+        Removes the least recently used entries until the cache contains at most
+        max_entries entries.
+
+        Returns
+        -------
+        None.
+
+        '''
+        with self.__connect__() as connection:
+            nr_entries : int = connection.execute("SELECT COUNT(*) FROM fits").fetchone()[0]
+            if nr_entries > self.max_entries:
+                connection.execute("DELETE FROM fits WHERE key IN (SELECT key FROM fits ORDER BY last_used LIMIT ?)",
+                                   (nr_entries - self.max_entries,))
+        with self.__lock:
+            self.__nr_entries : int | None = min(nr_entries, self.max_entries)
+            self.__nr_inserts : int = 0
+
+    def clear(self) -> None:
+        '''
+        Removes all entries of the cache.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.__close__()
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+        with self.__lock:
+            self.__generation += 1
+            self.__nr_entries : int | None = None
+            self.__nr_inserts : int = 0
+
+    def __len__(self) -> int:
+        '''
+        Returns the number of entries of the cache.
+
+        Returns
+        -------
+        int
+            The number of entries of the cache.
+
+        '''
+        if not os.path.isfile(self.filename):
+            return 0
+        with self.__connect__() as connection:
+            return connection.execute("SELECT COUNT(*) FROM fits").fetchone()[0]
+
+    def __connect__(self) -> sqlite3.Connection:
+        '''
+        Gets the connection to the database of this process and thread and opens it and
+        creates the table, if necessary, e.g. after clear. The entries are counted, when the
+        cache is connected the first time. The connection commits, when it is used as a
+        context manager.
+
+        Returns
+        -------
+        sqlite3.Connection
+            The connection to the database.
+
+        '''
+        connection : sqlite3.Connection | None = getattr(self.__local, "connection", None)
+        if connection is None or self.__local.pid != os.getpid() or self.__local.generation != self.__generation:
+            self.__close__()
+            connection : sqlite3.Connection = sqlite3.connect(self.filename, timeout=30)
+            # the cache can always be refilled, so losing the last commits on a crash is fine
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute("CREATE TABLE IF NOT EXISTS fits (key TEXT PRIMARY KEY, nr_parameters INTEGER, "
+                               "result BLOB, last_used REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS fits_last_used ON fits (last_used)")
+            self.__local.connection : sqlite3.Connection | None = connection
+            self.__local.pid : int | None = os.getpid()
+            self.__local.generation : int = self.__generation
+            with self.__lock:
+                if self.__nr_entries is None:
+                    self.__nr_entries : int | None = connection.execute("SELECT COUNT(*) FROM fits").fetchone()[0]
+        return connection
+    
+    def __close__(self) -> None:
+        '''
+        Closes the connection to the database of this process and thread, if it is open.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if getattr(self.__local, "connection", None) is not None and self.__local.pid == os.getpid():
+            self.__local.connection.close()
+        self.__local.connection : sqlite3.Connection | None = None
+        self.__local.pid : int | None = None
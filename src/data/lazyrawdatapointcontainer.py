@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:48:31 2026
+
+@author: kaisjuli
+"""
+import mmap
+from collections import OrderedDict
+import numpy as np
+
+from .rawdatapoint import RawDataPoint
+from .rawdataparser import index_scans, parse_data_section
+
+class LazyRawDataPointContainer():
+    """
+    A class to store all datapoints of a raw datafile, which are only created when they
+    are accessed. Only the offsets of the scans in the file are kept and at most
+    max_resident datapoints stay in memory, the least recently used are dropped first.
+    
+    Parameters
+    ----------
+    buffer : bytes | mmap.mmap
+        The content of the raw datafile.
+    data_start : int
+        The offset of the first byte after the [Data] line.
+    max_resident : int, optional
+        The maximum number of created datapoints which are kept. The default is 1024.
+    follow : bool, optional
+        If the file is still being written. The last scan is then only indexed, once the
+        following scan has started or the file is finished. The default is False.
+        
+    Attributes
+    ----------
+    buffer : bytes | mmap.mmap
+        The content of the raw datafile.
+    data_start : int
+        The offset of the first byte after the [Data] line.
+    scan_starts : np.ndarray
+        The offsets of the info lines of all indexed scans.
+    stop : int
+        The offset behind the last indexed scan.
+    max_resident : int
+        The maximum number of created datapoints which are kept.
+    container : OrderedDict[int, RawDataPoint]
+        Contains the created datapoints in the order of their last access.
+    """
+    
+    def __init__(self,
+                 buffer : bytes | mmap.mmap,
+                 data_start : int,
+                 max_resident : int = 1024,
+                 follow : bool = False
+        ) -> None:
+        self.buffer : bytes | mmap.mmap = buffer
+        self.data_start : int = data_start
+        self.scan_starts : np.ndarray = index_scans(buffer, data_start)
+        self.stop : int = len(buffer)
+        if follow:
+            # the last scan could still be incomplete
+            self.scan_starts, self.stop = self.__complete_scans__(self.scan_starts, data_start)
+        self.max_resident : int = max_resident
+        self.container : OrderedDict[int, RawDataPoint] = OrderedDict()
+        
+    def __create_datapoint__(self, index : int) -> RawDataPoint:
+        '''
+        Creates the datapoint at the desired position from the file.
+
+        Parameters
+        ----------
+        index : int
+            The desired position in the container.
+
+        Returns
+        -------
+        RawDataPoint
+            The raw datapoint at the specified position.
+
+        '''
+        # rows in front of the first info line belong to the first scan
+        start : int = self.data_start if index == 0 else int(self.scan_starts[index])
+        stop : int = int(self.scan_starts[index + 1]) if index + 1 < len(self) else self.stop
+        info_strings, data, _ = parse_data_section(self.buffer, start, stop)
+        return RawDataPoint(info_strings[0], data)
+    
+    def __complete_scans__(self, scan_starts : np.ndarray, stop : int) -> tuple[np.ndarray, int]:
+        '''
+        Separates the last scan, which could still be incomplete, from the complete scans.
+
+        Parameters
+        ----------
+        scan_starts : np.ndarray
+            The offsets of the info lines of the scans.
+        stop : int
+            The offset behind the scans, if there is no scan.
+
+        Returns
+        -------
+        tuple(np.ndarray, int)
+            The offsets of the info lines of the complete scans and the offset behind them.
+
+        '''
+        if len(scan_starts) == 0:
+            return scan_starts, stop
+        return scan_starts[:-1], int(scan_starts[-1])
+
+    def extend(self, buffer : bytes | mmap.mmap, finished : bool = False) -> None:
+        '''
+        Replaces the buffer by the grown file and indexes only the appended scans, which
+        are followed by another scan. A trailing partial scan is indexed by a later call.
+
+        Parameters
+        ----------
+        buffer : bytes | mmap.mmap
+            The content of the grown raw datafile.
+        finished : bool, optional
+            If the file isn't written anymore and the last scan is complete. The default
+            is False.
+
+        Returns
+        -------
+        None.
+
+        '''
+        new_starts : np.ndarray = index_scans(buffer, self.stop)
+        if len(self) > 0 and len(new_starts) > 0 and new_starts[0] > self.stop:
+            # rows were appended to the last indexed scan
+            self.container.pop(len(self) - 1, None)
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.buffer : bytes | mmap.mmap = buffer
+        if finished:
+            new_stop : int = len(buffer)
+        else:
+            new_starts, new_stop = self.__complete_scans__(new_starts, self.stop)
+        self.scan_starts : np.ndarray = np.concatenate((self.scan_starts, new_starts))
+        self.stop : int = new_stop
+    
+    def close(self) -> None:
+        '''
+        Drops all created datapoints and closes the memory map of the file.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.container.clear()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        
+    def __getitem__(self, index : int | slice) -> RawDataPoint | list[RawDataPoint]:
+        '''
+        Gets the datapoint from the container at the desired position and creates it,
+        if it is not in memory.
+
+        Parameters
+        ----------
+        index : int | slice
+            The desired position in the container.
+
+        Raises
+        ------
+        IndexError
+            If the index is out of range.
+
+        Returns
+        -------
+        RawDataPoint | list[RawDataPoint]
+            The raw datapoint at the specified position.
+
+        '''
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("datapoint index out of range")
+        if index in self.container:
+            self.container.move_to_end(index)
+            return self.container[index]
+        rawdatapoint : RawDataPoint = self.__create_datapoint__(index)
+        self.container[index] = rawdatapoint
+        while len(self.container) > self.max_resident:
+            self.container.popitem(last=False)
+        return rawdatapoint
+    
+    def __len__(self) -> int:
+        '''
+        Returns the amount of raw datapoints inside the file.
+
+        Returns
+        -------
+        int
+            The amount of raw datapoints inside the file.
+
+        '''
+        return len(self.scan_starts)
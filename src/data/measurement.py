@@ -5,15 +5,28 @@ Created on Wed May 14 08:08:51 2025
 @author: kaisjuli
 """
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 if TYPE_CHECKING:
     from .measurementdatapoint import MeasurementDataPoint
     from .rawdatapoint import RawDataPoint
+    from .rawdatacache import RawDataCache
+    from .fitresultcache import FitResultCache
+    from .fitresult import FitResult
+    from .backgroundregistry import BackgroundRegistry
+    from .backgroundlibrary import BackgroundLibrary
     
+import threading
 import numpy as np
 
 from .rawdatafile import RawDataFile    
 from .measurementdatapointcontainer import MeasurementDataPointContainer
+from .backgroundsurface import BackgroundSurface
+from .measurementdatapoint import raw_datapoint_result
+from .fitresult import FREE_CENTER_DTYPE
+from ..calculation import match_background
+from ..constants import QUICK_LOOK_CHUNK_SIZE
+from ..constants import DIRECT_MAPPING_MAX_TEMP_DIFF, DIRECT_MAPPING_MAX_FIELD_DIFF
+from ..constants import INDIRECT_MAPPING_MAX_TEMP_DIFF, INDIRECT_MAPPING_MAX_FIELD_DIFF
 
 class Measurement():
     """
@@ -28,20 +41,128 @@ class Measurement():
     direct_mapping : bool
         If the background should be directly mapped on the sample or indirectly.
         The default is True.
+    cache : RawDataCache | None
+        The cache of already parsed raw datafiles. The default is None.
+    follow : bool
+        If the sample raw datafile is still being written and should be read
+        incrementally with refresh. The default is False.
+    warm_start : str
+        The source of the start parameters of the fits with a free center, one of
+        WARM_START_SOURCES. The default is 'default'.
+    eager : bool
+        If all fits are performed directly, e.g. for exports. Otherwise only the moments
+        with a free center are fitted directly and all other results on demand. The
+        default is False.
+    fit_cache : FitResultCache | None
+        The cache of already performed fits. The default is None.
+    max_workers : int | None
+        The maximum number of parallel processes for the fits of large files. The default
+        is 1, which means serial fitting, None means the number of processors.
+    quick_look : bool
+        If the measurement is created without fitting. The moments are estimated from the
+        amplitudes calculated by MultiVu, until the background refinement replaced them
+        by the fitted moments. The default is False.
+    refinement_progress : Callable[[int, int], None] | None
+        Is called by the background refinement after every chunk of fitted datapoints
+        with the number of fitted and of all datapoints to refine, e.g. to redraw a
+        plot. It is called from the background thread, so a GUI has to pass it on to
+        its own thread, e.g. by a Qt signal. The default is None.
+    max_temp_diff : float | None
+        The maximum temperature difference in K of a matching background datapoint. The
+        default is None, which means DIRECT_MAPPING_MAX_TEMP_DIFF for the direct and
+        INDIRECT_MAPPING_MAX_TEMP_DIFF for the indirect mapping and the background
+        library.
+    max_field_diff : float | None
+        The maximum field difference in Oe of a matching background datapoint. The
+        default is None, which means DIRECT_MAPPING_MAX_FIELD_DIFF for the direct and
+        INDIRECT_MAPPING_MAX_FIELD_DIFF for the indirect mapping and the background
+        library.
+    background_registry : BackgroundRegistry | None
+        The registry of the backgrounds, which are shared with other measurements. The
+        default is None, which means the background is parsed and fitted for this
+        measurement only.
+    background_library : BackgroundLibrary | None
+        The library of pre-fitted background templates. Without a background raw
+        datafile the best matching templates of the sample holder of the sample are used
+        as background like for the indirect mapping. The default is None.
+    interpolate_background : bool
+        If sample raw datapoints without a matching background raw datapoint get a
+        background synthesized by the background surface of all background raw
+        datapoints instead of being dropped. The default is False.
+    sample_scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None
+        The header lines and the scans of the sample raw datafile like
+        RawDataFile.get_scans returns them, e.g. of another process. The default is
+        None, which means the file is read.
+    background_scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None
+        The header lines and the scans of the background raw datafile like
+        RawDataFile.get_scans returns them, e.g. of another process. They are ignored
+        with a background registry, which shares its own. The default is None, which
+        means the file is read.
+    datapoint_results : tuple[np.ndarray, np.ndarray, dict[int, Exception]] | None
+        The datapoint results with a free center like get_datapoint_results returns
+        them, e.g. of another process, which are used instead of fitting. The default is
+        None.
         
     Attributes
     ----------
     name : str
         The name of the measurement.
+    cache : RawDataCache | None
+        The cache of already parsed raw datafiles.
+    warm_start : str
+        The source of the start parameters of the fits with a free center.
+    eager : bool
+        If all fits are performed directly.
+    fit_cache : FitResultCache | None
+        The cache of already performed fits.
+    max_workers : int | None
+        The maximum number of parallel processes for the fits of large files.
+    quick_look : bool
+        If the moments are estimated until the datapoints are fitted.
+    refinement_progress : Callable[[int, int], None] | None
+        Is called by the background refinement after every chunk.
+    max_temp_diff : float | None
+        The maximum temperature difference of a matching background datapoint.
+    max_field_diff : float | None
+        The maximum field difference of a matching background datapoint.
+    background_registry : BackgroundRegistry | None
+        The registry of the shared backgrounds.
+    background_library : BackgroundLibrary | None
+        The library of pre-fitted background templates.
+    interpolate_background : bool
+        If the backgrounds of unmatched sample raw datapoints are synthesized.
+    background_surface : BackgroundSurface | None
+        The interpolation of the background raw datapoints, which is built when it is
+        needed the first time.
+    direct_mapping : bool
+        If the background is directly mapped on the sample or indirectly.
     sample_rdf : RawDataFile
         The raw datafile of the sample measurement.
     background_rdf : RawDataFile
         The raw datafile of the background measurement.
+    background_results : dict[int, FitResult]
+        The fit results of the background raw datapoints by their index in the background
+        raw datafile, which are shared by all datapoints of the same background raw
+        datapoint.
     datapoints : MeasurementDataPointContainer
         The container of all measurement datapoints.
+    scan_indices : np.ndarray
+        The index of the sample raw datapoint of every datapoint or, if there is no
+        sample, of the background raw datapoint.
+    background_indices : np.ndarray
+        The index of the background raw datapoint of every datapoint in the background
+        raw datafile, -1 for templates, synthesized backgrounds or without a background.
     
+    has_background : bool
+        If the sample has a background, either of a raw datafile or of the library.
+    unmatched_datapoints : list[RawDataPoint]
+        The sample raw datapoints, which don't have a matching background datapoint.
+    nr_interpolated_datapoints : int
+        The number of datapoints with a synthesized background.
     nr_not_matching_datapoints : int
         The number of sample datapoints which don't have a matching background datapoint.
+    nr_failed_datapoints : int
+        The number of datapoints, whose fit failed.
     nr_jump_corrected_datapoints : int
         The number of datapoints which had to be corrected due to jumps in the voltage signal.
         
@@ -72,14 +193,50 @@ class Measurement():
     def __init__(self, 
                  sample_filename : str | None = None,
                  background_filename : str | None = None,
-                 direct_mapping : bool = True
+                 direct_mapping : bool = True,
+                 cache : RawDataCache | None = None,
+                 follow : bool = False,
+                 warm_start : str = "default",
+                 eager : bool = False,
+                 fit_cache : FitResultCache | None = None,
+                 max_workers : int | None = 1,
+                 quick_look : bool = False,
+                 refinement_progress : Callable[[int, int], None] | None = None,
+                 max_temp_diff : float | None = None,
+                 max_field_diff : float | None = None,
+                 background_registry : BackgroundRegistry | None = None,
+                 background_library : BackgroundLibrary | None = None,
+                 interpolate_background : bool = False,
+                 sample_scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None = None,
+                 background_scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None = None,
+                 datapoint_results : tuple[np.ndarray, np.ndarray, dict[int, Exception]] | None = None
         ) -> None:
         
-        self.__set_sample_rdf__(sample_filename)
-        self.__set_background_rdf__(background_filename)
+        self.cache : RawDataCache | None = cache
+        self.warm_start : str = warm_start
+        self.eager : bool = eager
+        self.fit_cache : FitResultCache | None = fit_cache
+        self.max_workers : int | None = max_workers
+        self.quick_look : bool = quick_look
+        self.refinement_progress : Callable[[int, int], None] | None = refinement_progress
+        self.max_temp_diff : float | None = max_temp_diff
+        self.max_field_diff : float | None = max_field_diff
+        self.background_registry : BackgroundRegistry | None = background_registry
+        self.background_library : BackgroundLibrary | None = background_library
+        self.interpolate_background : bool = interpolate_background
+        self.background_rdf : RawDataFile | None = None
+        self.__refinement : threading.Thread | None = None
+        self.__refinement_stopped : threading.Event | None = None
+        self.__datapoint_results : tuple[np.ndarray, np.ndarray, dict[int, Exception]] | None = datapoint_results
+        self.__set_sample_rdf__(sample_filename, follow, sample_scans)
+        self.__set_background_rdf__(background_filename, background_scans)
         self.__create_measurement_datapoints__(direct_mapping)
         
-    def __set_sample_rdf__(self, sample_filename : str) -> None:
+    def __set_sample_rdf__(self,
+                           sample_filename : str,
+                           follow : bool = False,
+                           scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None = None
+        ) -> None:
         '''
         Sets the sample raw datafile.
 
@@ -87,6 +244,11 @@ class Measurement():
         ----------
         sample_filename : str
             The filename of the raw datafile of the sample.
+        follow : bool, optional
+            If the raw datafile is still being written. The default is False.
+        scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None, optional
+            The already parsed header lines and scans of the raw datafile. The default is
+            None.
 
         Returns
         -------
@@ -94,100 +256,611 @@ class Measurement():
 
         '''
         if sample_filename is not None:
-            self.sample_rdf : RawDataFile | None = RawDataFile(sample_filename)
+            # the columns of the scans are read at once for all datapoints
+            self.sample_rdf : RawDataFile | None = RawDataFile(sample_filename, cache=self.cache, follow=follow, columnar=True,
+                                                               scans=scans)
             self.name : str = sample_filename.split("/")[-1]
         else:
             self.sample_rdf : RawDataFile | None = None
             self.name : str = ''
             
-    def __set_background_rdf__(self, background_filename : str) -> None:
+    def __set_background_rdf__(self,
+                               background_filename : str,
+                               scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None = None
+        ) -> None:
         '''
-        Sets the background raw datafile.
+        Sets the background raw datafile. With a background registry the raw datafile and
+        the fit results of its datapoints are shared with all other measurements of the
+        registry and the previous background is released.
 
         Parameters
         ----------
         background_filename : str
             THe filename of the raw datafile of the background.
+        scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None, optional
+            The already parsed header lines and scans of the raw datafile, which are
+            ignored with a background registry. The default is None.
 
         Returns
         -------
         None.
 
         '''
-        if background_filename is not None:
-            self.background_rdf : RawDataFile | None = RawDataFile(background_filename)
-        else:
+        if self.background_registry is not None and self.background_rdf is not None:
+            self.background_registry.release(self.background_rdf.filename)
+        if background_filename is None:
             self.background_rdf : RawDataFile | None = None
+        elif self.background_registry is not None:
+            self.background_rdf : RawDataFile | None = self.background_registry.acquire(background_filename)
+        else:
+            self.background_rdf : RawDataFile | None = RawDataFile(background_filename, cache=self.cache, scans=scans)
+        if self.background_registry is not None and self.background_rdf is not None:
+            self.background_results : dict[int, FitResult] = self.background_registry.results(background_filename)
+        else:
+            self.background_results : dict[int, FitResult] = {}
+        self.__templates : dict[int, tuple[RawDataPoint, FitResult]] = {}
+        self.__synthesized_results : dict[RawDataPoint, FitResult] = {}
+        self.background_surface : BackgroundSurface | None = None
+            
+    def share_background(self, background_registry : BackgroundRegistry) -> None:
+        '''
+        Replaces the own background raw datafile and the fit results of its datapoints by
+        the shared ones of a background registry, e.g. after the measurement was created
+        in another process. Results, which weren't shared yet, are added to the registry.
+        With a quick look the background refinement is started again afterwards.
+
+        Parameters
+        ----------
+        background_registry : BackgroundRegistry
+            The registry of the shared backgrounds.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if self.background_registry is background_registry:
+            return
+        self.stop_refinement()
+        if self.background_registry is not None and self.background_rdf is not None:
+            self.background_registry.release(self.background_rdf.filename)
+        self.background_registry : BackgroundRegistry = background_registry
+        if self.background_rdf is not None:
+            self.__share_background_rdf__(background_registry)
+        if self.quick_look:
+            self.start_refinement()
+            
+    def __share_background_rdf__(self, background_registry : BackgroundRegistry) -> None:
+        '''
+        Replaces the background raw datapoints of all datapoints and their results by the
+        shared ones of a background registry.
+
+        Parameters
+        ----------
+        background_registry : BackgroundRegistry
+            The registry of the shared backgrounds.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.background_rdf : RawDataFile = background_registry.acquire(self.background_rdf.filename)
+        self.background_results : dict[int, FitResult] = background_registry.results(self.background_rdf.filename)
+        shared_rdps : list[RawDataPoint] = self.background_rdf[:]
+        for mdp, index in zip(self.datapoints, self.background_indices.tolist()):
+            # templates and synthesized backgrounds aren't part of the raw datafile
+            if index >= 0:
+                mdp.share_background(shared_rdps[index], self.__background_result__(index, shared_rdps[index]))
         
-    def __create_measurement_datapoints__(self, direct_mapping : bool) -> None:
+    def __create_measurement_datapoints__(self, direct_mapping : bool | None = None) -> None:
         '''
         Creates all measurement datapoints according to the mapping option.
 
         Parameters
         ----------
-        direct_mapping : bool
+        direct_mapping : bool | None, optional
             If the mapping of the sample raw datapoints towards the background raw
-            datapoints is direct or indirect.
+            datapoints is direct or indirect. The default is None, which keeps the
+            current mapping option.
+
+        Returns
+        -------
+        None.
 
-        Raises
-        ------
-        err
-            If a measurement datapoint can't be created.
+        '''
+        if direct_mapping is not None:
+            self.direct_mapping : bool = direct_mapping
+        self.stop_refinement()
+        self.datapoints : MeasurementDataPointContainer = MeasurementDataPointContainer(self.warm_start, eager=self.eager,
+                                                                                       fit_cache=self.fit_cache,
+                                                                                       max_workers=self.max_workers)
+        self.scan_indices : np.ndarray = np.zeros(0, dtype=np.int64)
+        self.background_indices : np.ndarray = np.zeros(0, dtype=np.int64)
+        self.unmatched_datapoints : list[RawDataPoint] = []
+        self.nr_interpolated_datapoints : int = 0
+        self.__add_measurement_datapoints__(0)
+        
+    def __add_measurement_datapoints__(self, start : int) -> None:
+        '''
+        Creates the measurement datapoints for all raw datapoints from the index start on
+        according to the mapping option. Sample raw datapoints without a matching
+        background raw datapoint get a synthesized background, if the background is
+        interpolated and covers them, otherwise they are added to the unmatched
+        datapoints.
+
+        Parameters
+        ----------
+        start : int
+            The index of the first raw datapoint in the sample raw datafile or, if there
+            is no sample, in the background raw datafile.
 
         Returns
         -------
         None.
 
         '''
-        self.datapoints : MeasurementDataPointContainer = MeasurementDataPointContainer()
-        self.nr_not_matching_datapoints : int = 0
-        if direct_mapping:
-            if (self.sample_rdf is not None) and (self.background_rdf is not None):
-                for s, b in zip(self.sample_rdf, self.background_rdf):
-                    try:
-                        if abs(s.temperature - b.temperature) > 0.25 or abs(s.field - b.field) > 2:
-                            print(abs(s.temperature - b.temperature), abs(s.field - b.field))
-                            self.nr_not_matching_datapoints += 1
-                        else:
-                            self.datapoints.add(s, b)
-                    except ValueError as err:
-                        print(s.raw_voltage)
-                        print(b.raw_voltage)
-                        print(s.temperature)
-                        raise err
-            elif self.sample_rdf is not None:
-                for s in self.sample_rdf:
-                    self.datapoints.add(s, None)
+        nr_datapoints : int = len(self.datapoints)
+        rdp_pairs : list[tuple[RawDataPoint | None, RawDataPoint | None]] = []
+        # the shared result and the index in the background raw datafile of every background
+        background_results : list[FitResult | None] = []
+        background_indices : list[int] = []
+        if (self.sample_rdf is not None) and (self.background_rdf is not None):
+            max_temp_diff, max_field_diff = self.matching_tolerances
+            samples : list[RawDataPoint] = self.sample_rdf[start:]
+            if self.direct_mapping:
+                backgrounds : list[RawDataPoint] = self.background_rdf[start:start + len(samples)]
+                paired : list[RawDataPoint] = samples[:len(backgrounds)]
+                temp_diff : np.ndarray = np.abs(np.array([s.temperature for s in paired]) - np.array([b.temperature for b in backgrounds]))
+                field_diff : np.ndarray = np.abs(np.array([s.field for s in paired]) - np.array([b.field for b in backgrounds]))
+                # the sample raw datapoints behind the end of the background have no match
+                matches : np.ndarray = np.full(len(samples), -1)
+                matches[:len(paired)] = np.where((temp_diff <= max_temp_diff) & (field_diff <= max_field_diff),
+                                                 np.arange(start, start + len(paired)), -1)
             else:
-                for b in self.background_rdf:
-                    self.datapoints.add(None, b)
+                backgrounds : list[RawDataPoint] = self.background_rdf[:]
+                matches : np.ndarray = match_background([s.temperature for s in samples], [s.field for s in samples],
+                                                        [b.temperature for b in backgrounds], [b.field for b in backgrounds],
+                                                        max_temp_diff, max_field_diff,
+                                                        [s.scan_direction for s in samples], [b.scan_direction for b in backgrounds])
+            synthesized : dict[int, RawDataPoint | None] = {}
+            if self.interpolate_background and np.any(matches < 0):
+                if self.background_surface is None:
+                    self.background_surface : BackgroundSurface | None = BackgroundSurface(self.background_rdf[:], max_field_diff)
+                unmatched : np.ndarray = np.flatnonzero(matches < 0)
+                rdps, _ = self.background_surface.backgrounds([samples[index].temperature for index in unmatched],
+                                                              [samples[index].field for index in unmatched],
+                                                              [samples[index].scan_direction for index in unmatched])
+                synthesized : dict[int, RawDataPoint | None] = dict(zip(unmatched.tolist(), rdps))
+            for index, (s, match) in enumerate(zip(samples, matches)):
+                if match >= 0:
+                    b : RawDataPoint = self.background_rdf[int(match)]
+                    rdp_pairs.append((s, b))
+                    background_results.append(self.__background_result__(int(match), b))
+                    background_indices.append(int(match))
+                elif synthesized.get(index) is not None:
+                    b : RawDataPoint = synthesized[index]
+                    if b not in self.__synthesized_results:
+                        self.__synthesized_results[b] = raw_datapoint_result(b, self.fit_cache)
+                    rdp_pairs.append((s, b))
+                    background_results.append(self.__synthesized_results[b])
+                    background_indices.append(-1)
+                    self.nr_interpolated_datapoints += 1
+                else:
+                    self.unmatched_datapoints.append(s)
+        elif self.sample_rdf is not None and self.background_library is not None:
+            max_temp_diff, max_field_diff = self.matching_tolerances
+            samples : list[RawDataPoint] = self.sample_rdf[start:]
+            matches : np.ndarray = self.background_library.match(self.sample_rdf.sample_holder, self.sample_rdf.sample_holder_detail,
+                                                                 [s.temperature for s in samples], [s.field for s in samples],
+                                                                 [s.scan_direction for s in samples], max_temp_diff, max_field_diff)
+            # every template is loaded once and shared by all sample raw datapoints matching it
+            self.__templates.update(self.background_library.load(
+                [match for match in np.unique(matches) if match >= 0 and match not in self.__templates]))
+            for s, match in zip(samples, matches):
+                if match < 0:
+                    self.unmatched_datapoints.append(s)
+                else:
+                    rdp, result = self.__templates[int(match)]
+                    rdp_pairs.append((s, rdp))
+                    background_results.append(result)
+                    background_indices.append(-1)
+        elif self.sample_rdf is not None:
+            for s in self.sample_rdf[start:]:
+                rdp_pairs.append((s, None))
+                background_results.append(None)
+                background_indices.append(-1)
         else:
-            if (self.sample_rdf is not None) and (self.background_rdf is not None):
-                max_temp_diff = 0.1
-                max_field_diff = 10
-                for s in self.sample_rdf:
-                    bg = None
-                    for b in self.background_rdf:
-                        if abs(b.temperature - s.temperature) < max_temp_diff and abs(b.field - s.field) < max_field_diff and b.scan_direction == s.scan_direction:
-                            if bg is None:
-                                bg = b
-                            else:
-                                diff_1 = abs(bg.temperature - s.temperature) / s.temperature
-                                diff_2 = abs(bg.field - s.field) / s.field if abs(s.field) > 1 else abs(bg.field - s.field)
-                                sum_1 = diff_1 + diff_2
-                                diff_1 = abs(b.temperature - s.temperature) / s.temperature
-                                diff_2 = abs(b.field - s.field) / s.field if abs(s.field) > 1 else abs(b.field - s.field)
-                                sum_2 = diff_1 + diff_2
-                                if sum_2 < sum_1:
-                                    bg = b
-                    if bg is None:
-                        print(s.temperature, s.field)
-                        self.nr_not_matching_datapoints += 1
-                    else:
-                        self.datapoints.add(s, bg)
-            else:
-                for s in self.sample_rdf:
-                    self.datapoints.add(s, None)
+            for index, b in enumerate(self.background_rdf[start:], start):
+                rdp_pairs.append((None, b))
+                background_results.append(self.__background_result__(index, b))
+                background_indices.append(index)
+        # all datapoints are fitted at once or, for a quick look, in the background,
+        # unless they were already fitted by another process
+        if self.__datapoint_results is not None:
+            self.datapoints.add_fitted(rdp_pairs, self.__fitted_results__(rdp_pairs, start), background_results)
+            self.__datapoint_results : tuple[np.ndarray, np.ndarray, dict[int, Exception]] | None = None
+        else:
+            self.datapoints.add_many(rdp_pairs, fit=not self.quick_look, background_results=background_results)
+        self.__add_scan_indices__(start, nr_datapoints, rdp_pairs, background_indices)
+        if self.quick_look:
+            self.start_refinement()
+                    
+    def __background_result__(self, index : int, rdp : RawDataPoint) -> FitResult:
+        '''
+        Gets the shared result of a background raw datapoint and creates it, if the
+        background raw datapoint isn't used by any datapoint yet. The result only depends
+        on the background scan, so it doesn't keep any datapoint or measurement alive.
+
+        Parameters
+        ----------
+        index : int
+            The index of the background raw datapoint in the background raw datafile.
+        rdp : RawDataPoint
+            The background raw datapoint.
+
+        Returns
+        -------
+        FitResult
+            The shared result.
+
+        '''
+        if index not in self.background_results:
+            self.background_results[index] = raw_datapoint_result(rdp, self.fit_cache)
+        return self.background_results[index]
+                    
+    def __add_scan_indices__(self,
+                             start : int,
+                             nr_datapoints : int,
+                             rdp_pairs : list[tuple[RawDataPoint | None, RawDataPoint | None]],
+                             background_indices : list[int]
+        ) -> None:
+        '''
+        Adds the indices of the raw datapoints of the new datapoints to the scan indices
+        and the background indices.
+
+        Parameters
+        ----------
+        start : int
+            The index of the first new raw datapoint.
+        nr_datapoints : int
+            The number of datapoints before the new ones were added.
+        rdp_pairs : list[tuple[RawDataPoint | None, RawDataPoint | None]]
+            The raw datapoints of the sample and of the background of every new datapoint.
+        background_indices : list[int]
+            The index of the background raw datapoint of every pair in the background raw
+            datafile or -1.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if self.sample_rdf is not None:
+            positions : dict[int, int] = {id(rdp) : index for index, rdp in enumerate(self.sample_rdf[start:], start)}
+            indices : list[int] = [positions[id(dp.sample_rdp)] for dp in self.datapoints.container[nr_datapoints:]]
+        else:
+            positions : dict[int, int] = {id(rdp) : index for index, rdp in enumerate(self.background_rdf[start:], start)}
+            indices : list[int] = [positions[id(dp.background_rdp)] for dp in self.datapoints.container[nr_datapoints:]]
+        self.scan_indices : np.ndarray = np.concatenate((self.scan_indices, np.array(indices, dtype=np.int64)))
+        # the failed datapoints aren't in the container
+        positions : dict[int, int] = {id(b) : index for (_, b), index in zip(rdp_pairs, background_indices) if index >= 0}
+        indices : list[int] = [positions.get(id(dp.background_rdp), -1) for dp in self.datapoints.container[nr_datapoints:]]
+        self.background_indices : np.ndarray = np.concatenate((self.background_indices, np.array(indices, dtype=np.int64)))
+        
+    def __scan_column__(self, name : str, index_map : np.ndarray | None) -> np.ndarray:
+        '''
+        Gets a column of the sample scans for the datapoints at once.
+
+        Parameters
+        ----------
+        name : str
+            The name of the column of the ColumnarRawDataPointContainer, e.g. temperature.
+        index_map : np.ndarray | None
+            A list of indices, which measurement datapoints should be considered. None
+            means all datapoints.
+
+        Returns
+        -------
+        np.ndarray
+            The values of the datapoints.
+
+        '''
+        scan_indices : np.ndarray = self.scan_indices if index_map is None else self.scan_indices[np.asarray(index_map, dtype=np.int64)]
+        return getattr(self.sample_rdf.datapoints, name)[scan_indices]
+        
+    def __fitted_results__(self,
+                           rdp_pairs : list[tuple[RawDataPoint | None, RawDataPoint | None]],
+                           start : int
+        ) -> list[np.void | Exception | None]:
+        '''
+        Assigns the datapoint results, which were passed on creation, to the datapoints by
+        the index of their sample raw datapoint.
+
+        Parameters
+        ----------
+        rdp_pairs : list[tuple[RawDataPoint | None, RawDataPoint | None]]
+            The raw datapoints of the sample and of the background of every datapoint.
+        start : int
+            The index of the first new sample raw datapoint.
+
+        Returns
+        -------
+        list[np.void | Exception | None]
+            The fitted result, the error or None of every datapoint.
+
+        '''
+        indices, results, errors = self.__datapoint_results
+        fitted : dict[int, np.void | Exception] = dict(zip(indices.tolist(), results))
+        fitted.update(errors)
+        scan_indices : dict[int, int] = {id(rdp) : index for index, rdp in enumerate(self.sample_rdf[start:], start)}
+        return [fitted.get(scan_indices.get(id(s))) for s, _ in rdp_pairs]
+    
+    def get_datapoint_results(self) -> tuple[np.ndarray, np.ndarray, dict[int, Exception]]:
+        '''
+        Gets the fitted datapoint results with a free center and the errors of the
+        datapoints, which couldn't be fitted, by the index of their sample raw datapoint,
+        e.g. to send them to another process, which creates the measurement again with
+        them.
+
+        Returns
+        -------
+        tuple(np.ndarray, np.ndarray, dict[int, Exception])
+            The indices of the sample raw datapoints of the fitted datapoints, their
+            results of the type FREE_CENTER_DTYPE and the errors.
+
+        '''
+        fitted : np.ndarray = np.array([dp.datapoint_result.is_fitted(False) for dp in self.datapoints], dtype=bool)
+        results : np.ndarray = np.zeros(np.count_nonzero(fitted), FREE_CENTER_DTYPE)
+        for index, dp in enumerate(self.datapoints.container[position] for position in np.flatnonzero(fitted)):
+            results[index] = (dp.datapoint_result["fit_coeff"], dp.datapoint_result["fit_err"])
+        # the failed datapoints aren't in the container
+        positions : dict[int, int] = {id(rdp) : index for index, rdp in enumerate(self.sample_rdf[:])}
+        return (self.scan_indices[fitted], results,
+                {positions[id(s)] : err for s, _, err in self.datapoints.failures if id(s) in positions})
+        
+    @property
+    def matching_tolerances(self) -> tuple[float, float]:
+        '''
+        Gets the maximum temperature and field differences of matching sample and
+        background raw datapoints for the current mapping option. The templates of the
+        background library are always matched like for the indirect mapping.
+
+        Returns
+        -------
+        tuple(float, float)
+            The maximum temperature difference in K and field difference in Oe.
+
+        '''
+        if self.direct_mapping and self.background_rdf is not None:
+            defaults : tuple[float, float] = (DIRECT_MAPPING_MAX_TEMP_DIFF, DIRECT_MAPPING_MAX_FIELD_DIFF)
+        else:
+            defaults : tuple[float, float] = (INDIRECT_MAPPING_MAX_TEMP_DIFF, INDIRECT_MAPPING_MAX_FIELD_DIFF)
+        return (defaults[0] if self.max_temp_diff is None else self.max_temp_diff,
+                defaults[1] if self.max_field_diff is None else self.max_field_diff)
+    
+    @property
+    def has_background(self) -> bool:
+        '''
+        Checks if the sample has a background, either of a raw datafile or of the
+        background library.
+
+        Returns
+        -------
+        bool
+            True, if the datapoints have a background.
+
+        '''
+        return self.background_rdf is not None or (self.sample_rdf is not None and self.background_library is not None)
+    
+    @property
+    def nr_not_matching_datapoints(self) -> int:
+        '''
+        Gets the number of sample datapoints, which don't have a matching background
+        datapoint.
+
+        Returns
+        -------
+        int
+            The number of unmatched datapoints.
+
+        '''
+        return len(self.unmatched_datapoints)
+
+    @property
+    def nr_failed_datapoints(self) -> int:
+        '''
+        Gets the number of datapoints, whose fit failed, e.g. in the background
+        refinement. Their moments are NaN in the quick look.
+
+        Returns
+        -------
+        int
+            The number of failed datapoints.
+
+        '''
+        with self.datapoints.lock:
+            return sum(not dp.fitting_was_possible for dp in self.datapoints.container)
+
+    def refresh(self) -> int:
+        '''
+        Reads the scans which were appended to the sample raw datafile, or to the background
+        raw datafile if there is no sample, and creates and fits only the new measurement
+        datapoints.
+
+        Returns
+        -------
+        int
+            The number of new measurement datapoints.
+
+        '''
+        rdf : RawDataFile = self.sample_rdf if self.sample_rdf is not None else self.background_rdf
+        start : int = len(rdf)
+        nr_datapoints : int = len(self.datapoints)
+        if rdf.refresh() > 0:
+            self.__add_measurement_datapoints__(start)
+        return len(self.datapoints) - nr_datapoints
+    
+    def finish(self) -> int:
+        '''
+        Reads the remaining scans including the last one, once the followed raw datafile
+        isn't written anymore, and creates and fits only the new measurement datapoints.
+
+        Returns
+        -------
+        int
+            The number of new measurement datapoints.
+
+        '''
+        rdf : RawDataFile = self.sample_rdf if self.sample_rdf is not None else self.background_rdf
+        start : int = len(rdf)
+        nr_datapoints : int = len(self.datapoints)
+        if rdf.finish() > 0:
+            self.__add_measurement_datapoints__(start)
+        return len(self.datapoints) - nr_datapoints
+    
+    def fit_all(self) -> None:
+        '''
+        Performs all fits of all measurement datapoints, which aren't fitted yet, at once,
+        e.g. before exporting the measurement.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.datapoints.fit()
+        
+    def start_refinement(self, chunk_size : int = QUICK_LOOK_CHUNK_SIZE) -> None:
+        '''
+        Starts to fit the datapoint results of all datapoints, which aren't fitted yet, in
+        a background thread. The datapoints are fitted chunk by chunk in their order, so
+        the fitted moments progressively replace the estimated moments of the quick look.
+        Datapoints, which couldn't be fitted, are skipped. A running refinement is stopped
+        before.
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            The number of datapoints fitted at once. The default is QUICK_LOOK_CHUNK_SIZE.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.stop_refinement()
+        index_map : list[int] = [index for index, dp in enumerate(self.datapoints) if dp.fitting_was_possible
+                                 and not (dp.datapoint_result.is_fitted(False) and dp.datapoint_result.is_fitted(True))]
+        if len(index_map) == 0:
+            return
+        self.__refinement_stopped : threading.Event | None = threading.Event()
+        self.__refinement : threading.Thread | None = threading.Thread(
+            target=self.__refine__, args=(self.datapoints, index_map, chunk_size, self.__refinement_stopped), daemon=True)
+        self.__refinement.start()
+        
+    def stop_refinement(self, wait : bool = True) -> None:
+        '''
+        Stops the background refinement after the chunk, which is fitted at the moment.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            If it is waited until the refinement stopped. The default is True.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if self.__refinement is None:
+            return
+        self.__refinement_stopped.set()
+        if wait and self.__refinement is not threading.current_thread():
+            self.__refinement.join()
+        self.__refinement : threading.Thread | None = None
+        self.__refinement_stopped : threading.Event | None = None
+        
+    @property
+    def refining(self) -> bool:
+        '''
+        Checks if the background refinement is running.
+
+        Returns
+        -------
+        bool
+            True, if datapoints are fitted in the background.
+
+        '''
+        return self.__refinement is not None and self.__refinement.is_alive()
+        
+    def __refine__(self,
+                   datapoints : MeasurementDataPointContainer,
+                   index_map : list[int],
+                   chunk_size : int,
+                   stopped : threading.Event
+        ) -> None:
+        '''
+        Fits the datapoint results of the given datapoints chunk by chunk in the
+        background thread.
+
+        Parameters
+        ----------
+        datapoints : MeasurementDataPointContainer
+            The container of the datapoints, which is kept, even if the datapoints of the
+            measurement are created again.
+        index_map : list[int]
+            The indices of the datapoints to fit.
+        chunk_size : int
+            The number of datapoints fitted at once.
+        stopped : threading.Event
+            Is set to stop the refinement.
+
+        Returns
+        -------
+        None.
+
+        '''
+        for start in range(0, len(index_map), chunk_size):
+            if stopped.is_set():
+                return
+            datapoints.fit(index_map[start:start + chunk_size], ("datapoint_result",))
+            if self.refinement_progress is not None and not stopped.is_set():
+                self.refinement_progress(min(start + chunk_size, len(index_map)), len(index_map))
+                
+    def __quick_look_moments__(self, index_map : np.ndarray | None, free_center : bool) -> np.ndarray:
+        '''
+        Gets the fitted moments of all fitted datapoints and estimates the moments of all
+        other datapoints from the amplitudes calculated by MultiVu without fitting. The
+        moments of datapoints, which couldn't be fitted, are NaN.
+
+        Parameters
+        ----------
+        index_map : np.ndarray | None
+            A list of indices, which measurement datapoints should be considered. None
+            means all datapoints.
+        free_center : bool
+            If the moments with a free center are returned or with a fixed center.
+
+        Returns
+        -------
+        moments : np.ndarray
+            The fitted or estimated moments.
+
+        '''
+        datapoints : list[MeasurementDataPoint] = (self.datapoints.container if index_map is None
+                                                   else self.datapoint_subset(index_map))
+        moments : np.ndarray = np.zeros(len(datapoints))
+        # the refinement publishes its results under the lock
+        with self.datapoints.lock:
+            for index, dp in enumerate(datapoints):
+                if not dp.fitting_was_possible:
+                    moments[index] : float = np.nan
+                elif dp.datapoint_result.is_fitted(not free_center):
+                    moments[index] : float = dp.datapoint_result["moment" if free_center else "moment_fixed_ctr"]
+                else:
+                    moments[index] : float = dp.quick_look_moment(free_center)
+        return moments
                     
     def datapoint_subset(self, index_map : np.ndarray) -> list[MeasurementDataPoint]:
         '''
@@ -221,10 +894,7 @@ class Measurement():
             The temperatures of the measurement.
 
         '''
-        temperatures : np.ndarray = np.zeros(len(self.datapoints))
-        for index, dp in enumerate(self.datapoints):
-            temperatures[index] : float = dp.sample_rdp.temperature
-        return temperatures
+        return self.__scan_column__("temperature", None)
     
     def temperature_subset(self, index_map : np.ndarray) -> np.ndarray:
         '''
@@ -241,10 +911,7 @@ class Measurement():
             The temperatures of the subset measurement.
 
         '''
-        temperatures : np.ndarray = np.zeros(len(index_map))
-        for index, index_dp in enumerate(index_map):
-            temperatures[index] : float = self.datapoints[index_dp].sample_rdp.temperature
-        return temperatures
+        return self.__scan_column__("temperature", index_map)
     
     @property
     def field(self) -> np.ndarray:
@@ -257,10 +924,7 @@ class Measurement():
             The fields of the measurement.
 
         '''
-        fields : np.ndarray = np.zeros(len(self.datapoints))
-        for index, dp in enumerate(self.datapoints):
-            fields[index] : float = dp.sample_rdp.field
-        return fields
+        return self.__scan_column__("field", None)
     
     def field_subset(self, index_map : np.ndarray) -> np.ndarray:
         '''
@@ -277,15 +941,13 @@ class Measurement():
             The fields of the subset measurement.
 
         '''
-        fields : np.ndarray = np.zeros(len(index_map))
-        for index, index_dp in enumerate(index_map):
-            fields[index] : float = self.datapoints[index_dp].sample_rdp.field
-        return fields
+        return self.__scan_column__("field", index_map)
             
     @property        
     def moment(self) -> np.ndarray:
         '''
-        Gets the moments of the measurement.
+        Gets the moments of the measurement. Missing fits are performed at once, with a
+        quick look they are estimated instead.
 
         Returns
         -------
@@ -293,6 +955,9 @@ class Measurement():
             The moments of the measurement.
 
         '''
+        if self.quick_look:
+            return self.__quick_look_moments__(None, True)
+        self.datapoints.fit(results=("datapoint_result",), fixed_center=False)
         moments : np.ndarray = np.zeros(len(self.datapoints))
         for index, dp in enumerate(self.datapoints):
             moments[index] : float = dp.datapoint_result["moment"]
@@ -300,7 +965,8 @@ class Measurement():
     
     def moment_subset(self, index_map : np.ndarray) -> np.ndarray:
         '''
-        Gets the moments of the subset measurement.
+        Gets the moments of the subset measurement. Missing fits are performed at once,
+        with a quick look they are estimated instead.
 
         Parameters
         ----------
@@ -313,6 +979,9 @@ class Measurement():
             The moments of the subset measurement.
 
         '''
+        if self.quick_look:
+            return self.__quick_look_moments__(index_map, True)
+        self.datapoints.fit(index_map, ("datapoint_result",), fixed_center=False)
         moments : np.ndarray = np.zeros(len(index_map))
         for index, index_dp in enumerate(index_map):
             moments[index] : float = self.datapoints[index_dp].datapoint_result["moment"]
@@ -413,7 +1082,8 @@ class Measurement():
     @property        
     def moment_fixed_ctr(self) -> np.ndarray:
         '''
-        Gets the moments of the measurement with a fixed center.
+        Gets the moments of the measurement with a fixed center. Missing fits are performed at once,
+        with a quick look they are estimated instead.
 
         Returns
         -------
@@ -421,6 +1091,9 @@ class Measurement():
             The moments of the measurement with a fixed center.
 
         '''
+        if self.quick_look:
+            return self.__quick_look_moments__(None, False)
+        self.datapoints.fit(results=("datapoint_result",), free_center=False)
         moments : np.ndarray = np.zeros(len(self.datapoints))
         for index, dp in enumerate(self.datapoints):
             moments[index] : float = dp.datapoint_result["moment_fixed_ctr"]
@@ -428,7 +1101,8 @@ class Measurement():
     
     def moment_fixed_ctr_subset(self, index_map : np.ndarray) -> np.ndarray:
         '''
-        Gets the moments of the subset measurement with a fixed center.
+        Gets the moments of the subset measurement with a fixed center. Missing fits are performed at once,
+        with a quick look they are estimated instead.
 
         Parameters
         ----------
@@ -441,6 +1115,9 @@ class Measurement():
             The moments of the subset measurement with a fixed center.
 
         '''
+        if self.quick_look:
+            return self.__quick_look_moments__(index_map, False)
+        self.datapoints.fit(index_map, ("datapoint_result",), free_center=False)
         moments : np.ndarray = np.zeros(len(index_map))
         for index, index_dp in enumerate(index_map):
             moments[index] : float = self.datapoints[index_dp].datapoint_result["moment_fixed_ctr"]
@@ -549,10 +1226,7 @@ class Measurement():
             The timestamps of the measurement.
 
         '''
-        timestamps : np.ndarray = np.zeros(len(self.datapoints))
-        for index, dp in enumerate(self.datapoints):
-            timestamps[index] : float = dp.sample_rdp.timestamp[-1]
-        return timestamps
+        return self.__scan_column__("timestamp", None)
     
     def timestamp_subset(self, index_map : np.ndarray) -> np.ndarray:
         '''
@@ -569,10 +1243,7 @@ class Measurement():
             The timestamps of the subset measurement.
 
         '''
-        timestamps : np.ndarray = np.zeros(len(index_map))
-        for index, index_dp in enumerate(index_map):
-            timestamps[index] : float = self.datapoints[index_dp].sample_rdp.timestamp[-1]
-        return timestamps
+        return self.__scan_column__("timestamp", index_map)
     
     @property
     def nr_jump_corrected_datapoints(self) -> int:
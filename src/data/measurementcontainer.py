@@ -4,7 +4,21 @@ Created on Thu May 15 08:38:56 2025
 
 @author: kaisjuli
 """
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable
+if TYPE_CHECKING:
+    from .rawdatacache import RawDataCache
+    from .fitresultcache import FitResultCache
+    from .backgroundlibrary import BackgroundLibrary
+
+import os
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, Future, as_completed
+import numpy as np
+
 from .measurement import Measurement
+from .rawdatafile import RawDataFile
+from .backgroundregistry import BackgroundRegistry
 
 class MeasurementContainer():
     """
@@ -12,19 +26,42 @@ class MeasurementContainer():
     
     Parameters
     ----------
-    
+    cache : RawDataCache | None, optional
+        The cache of already parsed raw datafiles. The default is None.
+    fit_cache : FitResultCache | None, optional
+        The cache of already performed fits. The default is None.
+    background_library : BackgroundLibrary | None, optional
+        The library of pre-fitted background templates. The default is None.
         
     Attributes
     ----------
     container : list[RawDataPoint]
         Contains all measurements.
+    cache : RawDataCache | None
+        The cache of already parsed raw datafiles.
+    fit_cache : FitResultCache | None
+        The cache of already performed fits.
+    background_library : BackgroundLibrary | None
+        The library of pre-fitted background templates.
+    backgrounds : BackgroundRegistry
+        The backgrounds, whose raw datafiles and fits are shared by all measurements with
+        the same background.
     """
     
-    def __init__(self) -> None:
+    def __init__(self,
+                 cache : RawDataCache | None = None,
+                 fit_cache : FitResultCache | None = None,
+                 background_library : BackgroundLibrary | None = None
+        ) -> None:
         self.container : list[Measurement] = []
+        self.cache : RawDataCache | None = cache
+        self.fit_cache : FitResultCache | None = fit_cache
+        self.background_library : BackgroundLibrary | None = background_library
+        self.backgrounds : BackgroundRegistry = BackgroundRegistry(cache)
         
     def add(self, sample_filename : str, background_filename : None | str, 
-            direct_mapping : bool = True) -> Measurement:
+            direct_mapping : bool = True, follow : bool = False, quick_look : bool = False,
+            use_library : bool = False, interpolate_background : bool = False) -> Measurement:
         '''
         Creates a new measurement and adds it to the container.
 
@@ -36,6 +73,17 @@ class MeasurementContainer():
             The filename to the background measurement.
         direct_mapping : bool, optional
             If the mapping should be direct or indirect. The default is True.
+        follow : bool, optional
+            If the sample file is still being written. The default is False.
+        quick_look : bool, optional
+            If the moments are estimated without fitting and refined in the background.
+            The default is False.
+        use_library : bool, optional
+            If the background templates of the background library are used, when there
+            is no background file. The default is False.
+        interpolate_background : bool, optional
+            If sample datapoints without a matching background datapoint get an
+            interpolated background. The default is False.
 
         Returns
         -------
@@ -43,13 +91,124 @@ class MeasurementContainer():
             The created measurement.
 
         '''
-        measurement : Measurement = Measurement(sample_filename, background_filename, direct_mapping)
+        measurement : Measurement = Measurement(sample_filename, background_filename, direct_mapping, self.cache, follow,
+                                                fit_cache=self.fit_cache, quick_look=quick_look,
+                                                background_registry=self.backgrounds,
+                                                background_library=self.background_library if use_library else None,
+                                                interpolate_background=interpolate_background)
         self.container.append(measurement)
         return measurement
+    
+    def add_many(self,
+                 sample_filenames : list[str],
+                 background_filename : None | str,
+                 direct_mapping : bool = True,
+                 max_workers : int | None = None,
+                 use_library : bool = False,
+                 interpolate_background : bool = False,
+                 progress : Callable[[int, int, str, Exception | None], None] | None = None,
+                 quick_look : bool = False,
+                 refinement_progress : Callable[[Measurement, int, int], None] | None = None
+        ) -> tuple[list[Measurement], dict[str, Exception]]:
+        '''
+        Creates the measurements of many sample files in parallel processes and adds them
+        to the container in the order of the filenames. The background is parsed once by
+        the shared backgrounds of the container and its scans are sent to every process.
+        Every process parses and fits one file at once and sends back the scans and the
+        fit results in compact arrays, from which the measurement is created again with
+        the shared background.
+
+        Parameters
+        ----------
+        sample_filenames : list[str]
+            The filenames to the sample measurements.
+        background_filename : None | str
+            The filename to the background measurement of all samples.
+        direct_mapping : bool, optional
+            If the mapping should be direct or indirect. The default is True.
+        max_workers : int | None, optional
+            The maximum number of parallel processes. The default is None, which means
+            the number of processors, but at most the number of files.
+        use_library : bool, optional
+            If the background templates of the background library are used, when there
+            is no background file. The default is False.
+        interpolate_background : bool, optional
+            If sample datapoints without a matching background datapoint get an
+            interpolated background. The default is False.
+        progress : Callable[[int, int, str, Exception | None], None] | None, optional
+            Is called after every finished file with the number of finished files, the
+            number of all files, the filename and the error, if the measurement couldn't
+            be created. The default is None.
+        quick_look : bool, optional
+            If the processes only parse the files and the moments are estimated without
+            fitting and refined in the background of this process. The default is False.
+        refinement_progress : Callable[[Measurement, int, int], None] | None, optional
+            Is called by the background refinement of every measurement with the
+            measurement, the number of fitted and of all datapoints to refine. It is
+            called from the background thread. The default is None.
+
+        Returns
+        -------
+        tuple(list[Measurement], dict[str, Exception])
+            The created measurements and the errors of the files, which couldn't be
+            created.
+
+        '''
+        if len(sample_filenames) == 0:
+            return [], {}
+        if max_workers is None:
+            max_workers : int = min(len(sample_filenames), os.cpu_count() or 1)
+        background_library : BackgroundLibrary | None = self.background_library if use_library else None
+        # the same file can be given more than once
+        measurements : list[Measurement | None] = [None] * len(sample_filenames)
+        errors : dict[str, Exception] = {}
+        # the background is parsed once here and held, until all measurements acquired it
+        background_scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None = None
+        if background_filename is not None:
+            try:
+                background_scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None = self.backgrounds.acquire(
+                    background_filename).get_scans()
+            except Exception as err:
+                # no measurement can be created without its background
+                for nr_done, sample_filename in enumerate(sample_filenames, 1):
+                    errors[sample_filename] = err
+                    if progress is not None:
+                        progress(nr_done, len(sample_filenames), sample_filename, err)
+                return [], errors
+        try:
+            with ProcessPoolExecutor(max_workers) as executor:
+                futures : dict[Future, int] = {executor.submit(_create_measurement, sample_filename, background_filename,
+                                                              direct_mapping, self.cache, self.fit_cache, background_library,
+                                                              interpolate_background, quick_look, background_scans) : index
+                                               for index, sample_filename in enumerate(sample_filenames)}
+                for nr_done, future in enumerate(as_completed(futures), 1):
+                    index : int = futures[future]
+                    error : Exception | None = None
+                    try:
+                        sample_scans, datapoint_results = future.result()
+                        measurements[index] = Measurement(sample_filenames[index], background_filename, direct_mapping, self.cache,
+                                                          fit_cache=self.fit_cache, quick_look=quick_look,
+                                                          background_registry=self.backgrounds,
+                                                          background_library=background_library,
+                                                          interpolate_background=interpolate_background,
+                                                          sample_scans=sample_scans, datapoint_results=datapoint_results)
+                        if refinement_progress is not None:
+                            measurements[index].refinement_progress = partial(refinement_progress, measurements[index])
+                    except Exception as err:
+                        error : Exception = err
+                        errors[sample_filenames[index]] = err
+                    if progress is not None:
+                        progress(nr_done, len(futures), sample_filenames[index], error)
+        finally:
+            if background_filename is not None:
+                self.backgrounds.release(background_filename)
+        created : list[Measurement] = [measurement for measurement in measurements if measurement is not None]
+        self.container.extend(created)
+        return created, errors
         
     def remove(self, measurement : Measurement) -> None:
         '''
-        Removes an existing measurement from the container.
+        Removes an existing measurement from the container and releases its background.
 
         Parameters
         ----------
@@ -61,7 +220,10 @@ class MeasurementContainer():
         None.
 
         '''
+        measurement.stop_refinement(False)
         self.container.remove(measurement)
+        if measurement.background_registry is self.backgrounds and measurement.background_rdf is not None:
+            self.backgrounds.release(measurement.background_rdf.filename)
         
     def get_from_filename(self, filename : str) -> Measurement:
         '''
@@ -109,4 +271,57 @@ class MeasurementContainer():
             The amount of raw datapoints inside the container.
 
         '''
-        return len(self.container)
\ No newline at end of file
+        return len(self.container)
+
+def _create_measurement(sample_filename : str,
+                        background_filename : None | str,
+                        direct_mapping : bool,
+                        cache : RawDataCache | None,
+                        fit_cache : FitResultCache | None = None,
+                        background_library : BackgroundLibrary | None = None,
+                        interpolate_background : bool = False,
+                        quick_look : bool = False,
+                        background_scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None = None
+    ) -> tuple[tuple[list[str], np.ndarray, np.ndarray, np.ndarray], tuple[np.ndarray, np.ndarray, dict[int, Exception]] | None]:
+    '''
+    Creates a measurement in a worker process of MeasurementContainer.add_many and
+    returns it in compact arrays, which are cheaper to send back than the objects of all
+    datapoints.
+
+    Parameters
+    ----------
+    sample_filename : str
+        The filename to the sample measurement.
+    background_filename : None | str
+        The filename to the background measurement.
+    direct_mapping : bool
+        If the mapping should be direct or indirect.
+    cache : RawDataCache | None
+        The cache of already parsed raw datafiles.
+    fit_cache : FitResultCache | None, optional
+        The cache of already performed fits. The default is None.
+    background_library : BackgroundLibrary | None, optional
+        The library of pre-fitted background templates. The default is None.
+    interpolate_background : bool, optional
+        If sample datapoints without a matching background datapoint get an interpolated
+        background. The default is False.
+    quick_look : bool, optional
+        If the sample file is only parsed and nothing is fitted. The default is False.
+    background_scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None, optional
+        The scans of the background raw datafile, which was already parsed by the parent
+        process. The default is None, which means the file is read.
+
+    Returns
+    -------
+    tuple(tuple[list[str], np.ndarray, np.ndarray, np.ndarray], tuple[np.ndarray, np.ndarray, dict[int, Exception]] | None)
+        The scans of the sample raw datafile like RawDataFile.get_scans and the datapoint
+        results like Measurement.get_datapoint_results returns them, None for a quick look.
+
+    '''
+    if quick_look:
+        return RawDataFile(sample_filename, cache=cache, columnar=True).get_scans(), None
+    measurement : Measurement = Measurement(sample_filename, background_filename, direct_mapping, cache, fit_cache=fit_cache,
+                                            background_library=background_library,
+                                            interpolate_background=interpolate_background,
+                                            background_scans=background_scans)
+    return measurement.sample_rdf.get_scans(), measurement.get_datapoint_results()
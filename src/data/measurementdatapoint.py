@@ -8,16 +8,20 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .rawdatapoint import RawDataPoint
+    from .fitresultcache import FitResultCache
     
+import functools
 import numpy as np
     
+from .fitresult import FitResult
 from ..calculation import subtract_background, fit_signal, convert_amplitude_to_moment
     
 class MeasurementDataPoint():
     """
     A class to represent a measurement datapoint, containing of a sample raw datapoint and
     if given a background raw datapoint.
-    All result dictionaries contain
+    All result dictionaries are FitResults, whose fits are performed on the first access,
+    and contain
         - p0 : start conditions
         - moment : calculated magnetic moment with a free center
         - moment_err : error of the calculated magnetic moment with a free center
@@ -35,6 +39,17 @@ class MeasurementDataPoint():
         The raw datapoint of the sample. The default is None.
     background_rdp : RawDataPoint | None
         The raw datapoint of the background. The default is None.
+    fit : bool
+        If all fits are performed directly. Otherwise every fit is performed on the first
+        access of its results, unless they are set before with set_fitting_result, e.g.
+        after fitting many datapoints at once. The default is True.
+    fit_cache : FitResultCache | None
+        The cache of already performed fits, which is consulted before fitting. The
+        default is None.
+    background_result : FitResult | None
+        The shared result of the background raw datapoint, e.g. of another datapoint or
+        measurement with the same background. The default is None, which means the
+        datapoint creates its own result.
         
     Attributes
     ----------
@@ -44,64 +59,52 @@ class MeasurementDataPoint():
         The raw datapoint of the background. The default is None.
     fitting_was_possible : bool
         States if the fitting was possible.
+    fit_cache : FitResultCache | None
+        The cache of already performed fits.
         
-    sample_result : dict[str, None | float | list[float] | np.ndarray]
+    sample_result : FitResult
         The result of the fitting procedure of the sample raw datafile.
-    background_result : dict[str, None | float | list[float] | np.ndarray]
+    background_result : FitResult
         The result of the fitting procedure of the background raw datafile.
-    datapoint_result : dict[str, None | float | list[float] | np.ndarray]
-        The result of the fitting procedure of the measurement datapoint.
+    datapoint_result : FitResult
+        The result of the fitting procedure of the measurement datapoint. Without a
+        background it is the result of the sample and vice versa.
+    subtracted_signal : tuple[np.ndarray, np.ndarray] | None
+        The positions and voltages of the sample without the background, which are
+        calculated once and used for fitting, plotting and exporting. None without a
+        sample or a background.
     """
     
     def __init__(self, 
                  sample_rdp : RawDataPoint | None = None,
-                 background_rdp : RawDataPoint | None = None
+                 background_rdp : RawDataPoint | None = None,
+                 fit : bool = True,
+                 fit_cache : FitResultCache | None = None,
+                 background_result : FitResult | None = None
         ) -> None:
         
         self.sample_rdp : RawDataPoint | None = sample_rdp
         self.background_rdp : RawDataPoint | None = background_rdp
         self.fitting_was_possible : bool = True
+        self.fit_cache : FitResultCache | None = fit_cache
+        self.__subtracted_signal : tuple[np.ndarray, np.ndarray] | None = None
         
         # TODO: check for compatibility 
         
-        self.sample_result : dict[str, None | float | list[float] | np.ndarray] = {
-            "p0" : None,
-            "moment" : None,
-            "moment_err" : None,
-            "fit_coeff" : None,
-            "fit_err" : None,
-            "fixed_ctr" : None,
-            "moment_fixed_ctr" : None,
-            "moment_fixed_ctr_err" : None,
-            "fit_fixed_ctr_coeff" : None,
-            "fit_fixed_ctr_err" : None,
-            }
-        self.background_result : dict[str, None | float | list[float] | np.ndarray] = {
-            "p0" : None,
-            "moment" : None,
-            "moment_err" : None,
-            "fit_coeff" : None,
-            "fit_err" : None,
-            "fixed_ctr" : None,
-            "moment_fixed_ctr" : None,
-            "moment_fixed_ctr_err" : None,
-            "fit_fixed_ctr_coeff" : None,
-            "fit_fixed_ctr_err" : None,
-            }
-        self.datapoint_result : dict[str, None | float | list[float] | np.ndarray] = {
-            "p0" : None,
-            "moment" : None,
-            "moment_err" : None,
-            "fit_coeff" : None,
-            "fit_err" : None,
-            "fixed_ctr" : None,
-            "moment_fixed_ctr" : None,
-            "moment_fixed_ctr_err" : None,
-            "fit_fixed_ctr_coeff" : None,
-            "fit_fixed_ctr_err" : None,
-            }
+        self.sample_result : FitResult = raw_datapoint_result(sample_rdp, fit_cache)
+        if background_result is None:
+            background_result : FitResult = raw_datapoint_result(background_rdp, fit_cache)
+        self.background_result : FitResult = background_result
+        # without a background the datapoint is the sample and vice versa
+        if background_rdp is None and sample_rdp is not None:
+            self.datapoint_result : FitResult = self.sample_result
+        elif sample_rdp is None and background_rdp is not None:
+            self.datapoint_result : FitResult = self.background_result
+        else:
+            self.datapoint_result : FitResult = FitResult(self.__fit__ if sample_rdp is not None else None)
         
-        self.__calculate_moments__()
+        if fit:
+            self.__calculate_moments__()
         
     def __calculate_moments__(self):
         '''
@@ -113,75 +116,219 @@ class MeasurementDataPoint():
         None.
 
         '''
-        def perform_fitting(pos : np.ndarray,
-                            voltage : np.ndarray,
-                            fixed_ctr : float,
-                            save_dict : dict) -> None:
-            '''
-            Performes the fitting on the position and voltage data given with a fixed center
-            and saves the result in the corresponding dictionary.
-
-            Parameters
-            ----------
-            pos : np.ndarray
-                The positions of the signal.
-            voltage : np.ndarray
-                The voltages of the signal.
-            fixed_ctr : float
-                The value of the fixed center.
-            save_dict : dict
-                The dictionary, in which all results have to be saved.
-
-            Returns
-            -------
-            None.
-
-            '''
-            save_dict["fixed_ctr"] : float = fixed_ctr
-            save_dict["p0"] : list[float] = [0, np.mean(voltage), 0, fixed_ctr]
-            #try:
-            res : list[np.ndarray] = fit_signal(pos, voltage, save_dict["p0"])
+        for pos, voltage, p0, _, save_dict in self.fitting_tasks():
+            self.set_fitting_result(save_dict, p0, _fit_signal(pos, voltage, p0, False, self.fit_cache),
+                                    _fit_signal(pos, voltage, p0, True, self.fit_cache))
+            
+    def share_background(self, background_rdp : RawDataPoint, shared : FitResult) -> None:
+        '''
+        Replaces the background raw datapoint by an equal shared one and the result of the
+        background by its shared result. Results, which are only fitted by this datapoint,
+        are kept in the shared result.
+
+        Parameters
+        ----------
+        background_rdp : RawDataPoint
+            The shared background raw datapoint.
+        shared : FitResult
+            The shared result of the background raw datapoint.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.background_rdp : RawDataPoint | None = background_rdp
+        for key, value in dict.items(self.background_result):
+            if value is not None:
+                shared.setdefault(key, value)
+        if self.datapoint_result is self.background_result:
+            self.datapoint_result : FitResult = shared
+        self.background_result : FitResult = shared
+            
+    def fitting_tasks(self) -> list[tuple[np.ndarray, np.ndarray, list[float], float, FitResult]]:
+        '''
+        Collects the signals, which have to be fitted for the sample, the background and
+        the datapoint.
+
+        Returns
+        -------
+        list[tuple[np.ndarray, np.ndarray, list[float], float, FitResult]]
+            The positions, the voltages, the start conditions with the fixed center as last
+            element, the center calculated by MultiVu and the dictionary of the results
+            of every fit.
+
+        '''
+        tasks : list[tuple[np.ndarray, np.ndarray, list[float], float, FitResult]] = []
+        if self.sample_rdp is not None:
+            tasks.append(self.fitting_task(self.sample_result))
+        if self.background_rdp is not None:
+            tasks.append(self.fitting_task(self.background_result))
+        if self.sample_rdp is not None and self.background_rdp is not None:
+            tasks.append(self.fitting_task(self.datapoint_result))
+        return tasks
+    
+    def fitting_task(self, save_dict : FitResult) -> tuple[np.ndarray, np.ndarray, list[float], float, FitResult]:
+        '''
+        Collects the signal, which has to be fitted for one of the result dictionaries.
+
+        Parameters
+        ----------
+        save_dict : FitResult
+            The sample, background or datapoint result.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, list[float], float, FitResult]
+            The positions, the voltages, the start conditions with the fixed center as last
+            element, the center calculated by MultiVu and the dictionary of the results.
+
+        '''
+        if save_dict is self.sample_result:
+            return _raw_datapoint_task(self.sample_rdp) + (self.sample_result,)
+        if save_dict is self.background_result:
+            return _raw_datapoint_task(self.background_rdp) + (self.background_result,)
+        pos_wo_bg, voltage_wo_bg = self.subtracted_signal
+        fixed_ctr : float = (self.background_rdp.given_center + self.sample_rdp.given_center) / 2 # TODO: einfügen dass einstellbar ist
+        return (pos_wo_bg, voltage_wo_bg, [0, np.mean(voltage_wo_bg), 0, fixed_ctr],
+                (self.background_rdp.calculated_center + self.sample_rdp.calculated_center) / 2, self.datapoint_result)
+    
+    @property
+    def subtracted_signal(self) -> tuple[np.ndarray, np.ndarray] | None:
+        '''
+        Gets the signal of the sample without the background. It is calculated on the
+        first access, unless it was set before, e.g. after subtracting the backgrounds of
+        many datapoints at once.
+
+        Returns
+        -------
+        tuple(np.ndarray, np.ndarray) | None
+            The interpolated positions and the subtracted voltages or None without a
+            sample or a background.
+
+        '''
+        if self.__subtracted_signal is None and self.sample_rdp is not None and self.background_rdp is not None:
+            self.__subtracted_signal : tuple[np.ndarray, np.ndarray] | None = subtract_background(self.sample_rdp,
+                                                                                                  self.background_rdp)
+        return self.__subtracted_signal
+    
+    def set_subtracted_signal(self, position : np.ndarray, voltage : np.ndarray) -> None:
+        '''
+        Sets the signal of the sample without the background.
+
+        Parameters
+        ----------
+        position : np.ndarray
+            The interpolated positions.
+        voltage : np.ndarray
+            The subtracted voltages.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.__subtracted_signal : tuple[np.ndarray, np.ndarray] | None = (position, voltage)
+        
+    def has_subtracted_signal(self) -> bool:
+        '''
+        Checks if the signal without the background is available without calculating it.
+
+        Returns
+        -------
+        bool
+            True, if the signal is set or there is nothing to subtract.
+
+        '''
+        return self.__subtracted_signal is not None or self.sample_rdp is None or self.background_rdp is None
+    
+    def __fit__(self, save_dict : FitResult, fixed_center : bool) -> None:
+        '''
+        Performs one fit of the datapoint result on demand.
+
+        Parameters
+        ----------
+        save_dict : FitResult
+            The datapoint result.
+        fixed_center : bool
+            If the fit with a fixed center is performed, otherwise the fit with a free center.
+
+        Returns
+        -------
+        None.
+
+        '''
+        pos, voltage, p0, _, _ = self.fitting_task(save_dict)
+        if fixed_center:
+            self.set_fitting_result(save_dict, p0, res_fixed_ctr=_fit_signal(pos, voltage, p0, True, self.fit_cache))
+        else:
+            self.set_fitting_result(save_dict, p0, _fit_signal(pos, voltage, p0, False, self.fit_cache))
+            
+    @staticmethod
+    def set_fitting_result(save_dict : FitResult,
+                           p0 : list[float],
+                           res : list[np.ndarray] | None = None,
+                           res_fixed_ctr : list[np.ndarray] | None = None) -> None:
+        '''
+        Saves the results of the fits with a free and a fixed center of one fitting task in
+        the corresponding dictionary. A fit without results stays to be performed on demand.
+
+        Parameters
+        ----------
+        save_dict : FitResult
+            The dictionary, in which all results have to be saved.
+        p0 : list[float]
+            The start conditions with the fixed center as last element.
+        res : list[np.ndarray] | None, optional
+            The coefficients and the covariance of the fit with a free center. The default
+            is None.
+        res_fixed_ctr : list[np.ndarray] | None, optional
+            The coefficients and the covariance of the fit with a fixed center. The default
+            is None.
+
+        Returns
+        -------
+        None.
+
+        '''
+        save_dict["fixed_ctr"] : float = p0[3]
+        save_dict["p0"] : list[float] = p0
+        if res is not None:
             save_dict["moment"] : float = convert_amplitude_to_moment(res[0][0])
             save_dict["moment_err"] : float = abs(convert_amplitude_to_moment(np.sqrt(np.diag(res[1]))[0]))
             save_dict["fit_coeff"] : np.ndarray = res[0]
             save_dict["fit_err"] : np.ndarray = res[1]
-            #except RuntimeError:
-            #    self.fitting_was_possible = False
-            #try:
-            res : list[np.ndarray] = fit_signal(pos, voltage, save_dict["p0"][:3], True, fixed_ctr)
-            save_dict["moment_fixed_ctr"] : float = convert_amplitude_to_moment(res[0][0])
-            save_dict["moment_fixed_ctr_err"] : float = abs(convert_amplitude_to_moment(np.sqrt(np.diag(res[1]))[0]))
-            save_dict["fit_fixed_ctr_coeff"] : np.ndarray = res[0]
-            save_dict["fit_fixed_ctr_err"] : np.ndarray = res[1]
-            #except RuntimeError:
-            #    self.fitting_was_possible = False
-        
-        if self.sample_rdp is not None:
-            perform_fitting(
-                self.sample_rdp.raw_position,
-                self.sample_rdp.raw_voltage,
-                self.sample_rdp.given_center,
-                self.sample_result
-            )
-            if self.background_rdp is None:
-                self.datapoint_result : dict = self.sample_result.copy()
+        if res_fixed_ctr is not None:
+            save_dict["moment_fixed_ctr"] : float = convert_amplitude_to_moment(res_fixed_ctr[0][0])
+            save_dict["moment_fixed_ctr_err"] : float = abs(convert_amplitude_to_moment(np.sqrt(np.diag(res_fixed_ctr[1]))[0]))
+            save_dict["fit_fixed_ctr_coeff"] : np.ndarray = res_fixed_ctr[0]
+            save_dict["fit_fixed_ctr_err"] : np.ndarray = res_fixed_ctr[1]
+            
+    def quick_look_moment(self, free_center : bool = True) -> float:
+        '''
+        Estimates the moment of the datapoint without fitting from the amplitudes, which
+        MultiVu calculated for the scans. With a background, the amplitude of the
+        background is subtracted from the amplitude of the sample.
+
+        Parameters
+        ----------
+        free_center : bool, optional
+            If the amplitudes with a free center are used or with a fixed center. The
+            default is True.
+
+        Returns
+        -------
+        float
+            The estimated moment.
+
+        '''
+        name : str = "amp_free" if free_center else "amp_fixed"
+        if self.sample_rdp is None:
+            return convert_amplitude_to_moment(getattr(self.background_rdp, name))
+        amplitude : float = getattr(self.sample_rdp, name)
         if self.background_rdp is not None:
-            perform_fitting(
-                self.background_rdp.raw_position,
-                self.background_rdp.raw_voltage,
-                self.background_rdp.given_center,
-                self.background_result
-            )
-            if self.sample_rdp is None:
-                self.datapoint_result : dict = self.background_result.copy()
-        if self.sample_rdp is not None and self.background_rdp is not None:
-            pos_wo_bg, voltage_wo_bg = subtract_background(self.sample_rdp, self.background_rdp)
-            perform_fitting(
-                pos_wo_bg,
-                voltage_wo_bg,
-                (self.background_rdp.given_center + self.sample_rdp.given_center) / 2, # TODO: einfügen dass einstellbar ist
-                self.datapoint_result
-            )
+            amplitude -= getattr(self.background_rdp, name)
+        return convert_amplitude_to_moment(amplitude)
             
     def convert_to_volume_susceptibility(self,
                                          mass : str,
@@ -258,4 +405,121 @@ class MeasurementDataPoint():
             The converted moment.
 
         '''
-        return float(molar_mass) * self.convert_to_mass_susceptibility(mass, free_center)
\ No newline at end of file
+        return float(molar_mass) * self.convert_to_mass_susceptibility(mass, free_center)
+
+
+def raw_datapoint_result(rdp : RawDataPoint | None, fit_cache : FitResultCache | None = None) -> FitResult:
+    '''
+    Creates the result of a single raw datapoint, whose fits only depend on the raw
+    datapoint, so it can be shared by all datapoints and measurements with the same scan.
+
+    Parameters
+    ----------
+    rdp : RawDataPoint | None
+        The raw datapoint, e.g. of the sample or the background.
+    fit_cache : FitResultCache | None, optional
+        The cache of already performed fits. The default is None.
+
+    Returns
+    -------
+    FitResult
+        The result, which is fitted on the first access, or without a raw datapoint the
+        empty result.
+
+    '''
+    if rdp is None:
+        return FitResult()
+    return FitResult(functools.partial(_fit_raw_datapoint, rdp, fit_cache))
+
+
+def _raw_datapoint_task(rdp : RawDataPoint) -> tuple[np.ndarray, np.ndarray, list[float], float]:
+    '''
+    Collects the signal of a single raw datapoint.
+
+    Parameters
+    ----------
+    rdp : RawDataPoint
+        The raw datapoint.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, list[float], float]
+        The positions, the voltages, the start conditions with the fixed center as last
+        element and the center calculated by MultiVu.
+
+    '''
+    voltage : np.ndarray = rdp.raw_voltage
+    return (rdp.raw_position, voltage, [0, np.mean(voltage), 0, rdp.given_center], rdp.calculated_center)
+
+
+def _fit_raw_datapoint(rdp : RawDataPoint, fit_cache : FitResultCache | None, save_dict : FitResult, fixed_center : bool) -> None:
+    '''
+    Performs one fit of the result of a single raw datapoint on demand.
+
+    Parameters
+    ----------
+    rdp : RawDataPoint
+        The raw datapoint.
+    fit_cache : FitResultCache | None
+        The cache of already performed fits.
+    save_dict : FitResult
+        The result of the raw datapoint.
+    fixed_center : bool
+        If the fit with a fixed center is performed, otherwise the fit with a free center.
+
+    Returns
+    -------
+    None.
+
+    '''
+    pos, voltage, p0, _ = _raw_datapoint_task(rdp)
+    if fixed_center:
+        MeasurementDataPoint.set_fitting_result(save_dict, p0, res_fixed_ctr=_fit_signal(pos, voltage, p0, True, fit_cache))
+    else:
+        MeasurementDataPoint.set_fitting_result(save_dict, p0, _fit_signal(pos, voltage, p0, False, fit_cache))
+
+
+def _fit_signal(pos : np.ndarray,
+                voltage : np.ndarray,
+                p0 : list[float],
+                fixed_center : bool,
+                fit_cache : FitResultCache | None = None
+    ) -> list[np.ndarray]:
+    '''
+    Fits one signal or loads the result from the fit cache, if it was fitted before.
+
+    Parameters
+    ----------
+    pos : np.ndarray
+        The positions of the signal.
+    voltage : np.ndarray
+        The voltages of the signal.
+    p0 : list[float]
+        The start conditions with the fixed center as last element.
+    fixed_center : bool
+        If the center is fixed.
+    fit_cache : FitResultCache | None, optional
+        The cache of already performed fits. The default is None.
+
+    Returns
+    -------
+    list[np.ndarray]
+        The coefficients and the covariance of the fit.
+
+    '''
+    if fit_cache is not None:
+        key : str = fit_cache.key(pos, voltage, p0, fixed_center)
+        res : tuple[np.ndarray, np.ndarray] | None = fit_cache.load([key])[0]
+        if res is not None:
+            return res
+    if fixed_center:
+        res : list[np.ndarray] = fit_signal(pos, voltage, p0[:3], True, p0[3])
+    else:
+        try:
+            res : list[np.ndarray] = fit_signal(pos, voltage, p0)
+        except RuntimeError:
+            # only the center has to be searched, which converges far more often
+            res : list[np.ndarray] = fit_signal(pos, voltage, p0, variable_projection=True)
+    if fit_cache is not None:
+        fit_cache.save([key], [res])
+    return res
@@ -9,8 +9,19 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .rawdatapoint import RawDataPoint
+    from .fitresultcache import FitResultCache
     
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future
+import numpy as np
+
 from .measurementdatapoint import MeasurementDataPoint
+from .fitresult import FitResult, FREE_CENTER_DTYPE
+from .sharedarrays import SharedArrays
+from ..calculation import pad_signals, fit_signals, fit_signal_fixed_center, fit_signal_variable_projection, warm_start_parameters
+from ..calculation import subtract_backgrounds, FIT_ERRORS
+from ..constants import FIT_CHUNK_SIZE
     
 class MeasurementDataPointContainer():
     """
@@ -18,21 +29,113 @@ class MeasurementDataPointContainer():
     
     Parameters
     ----------
-    
+    warm_start : str, optional
+        The source of the start parameters of the fits with a free center in add_many,
+        one of WARM_START_SOURCES. The default is 'default'.
+    count_saved_iterations : bool, optional
+        If the fits of add_many are repeated with the default start parameters to count
+        the iterations saved by the warm start. The default is False.
+    eager : bool, optional
+        If add_many performs all fits of the new datapoints, e.g. for exports. Otherwise
+        only the datapoint results with a free center are fitted and all other results
+        are fitted on demand. The default is False.
+    fit_cache : FitResultCache | None, optional
+        The cache of already performed fits, which is consulted before fitting. The
+        default is None.
+    max_workers : int | None, optional
+        The maximum number of parallel processes for the fits with a free center. The
+        default is 1, which means serial fitting, None means the number of processors.
+    chunk_size : int, optional
+        The number of signals fitted at once by one process. With less signals, they
+        are fitted serially. The default is FIT_CHUNK_SIZE.
         
     Attributes
     ----------
     container : list[MeasurementDataPoint]
         Contains all datapoints of the measurement.
+    warm_start : str
+        The source of the start parameters of the fits with a free center.
+    count_saved_iterations : bool
+        If the iterations saved by the warm start are counted.
+    eager : bool
+        If add_many performs all fits of the new datapoints.
+    fit_cache : FitResultCache | None
+        The cache of already performed fits.
+    max_workers : int | None
+        The maximum number of parallel processes for the fits with a free center.
+    chunk_size : int
+        The number of signals fitted at once by one process.
+    failures : list[tuple[RawDataPoint | None, RawDataPoint | None, Exception]]
+        The raw datapoints of the sample and of the background and the error of every
+        datapoint, which couldn't be fitted.
+    lock : threading.RLock
+        Is held while fit results, failures and counters are published, so they can be
+        read consistently while another thread fits, e.g. the background refinement.
+    nr_fits : int
+        The number of fits with a free center performed by add_many and fit.
+    nr_iterations : int
+        The number of iterations of these fits.
+    nr_saved_iterations : int
+        The number of iterations saved compared to the default start parameters, if they
+        are counted.
     """
     
-    def __init__(self) -> None:
+    def __init__(self,
+                 warm_start : str = "default",
+                 count_saved_iterations : bool = False,
+                 eager : bool = False,
+                 fit_cache : FitResultCache | None = None,
+                 max_workers : int | None = 1,
+                 chunk_size : int = FIT_CHUNK_SIZE
+        ) -> None:
         self.container : list[MeasurementDataPoint] = []
+        self.warm_start : str = warm_start
+        self.count_saved_iterations : bool = count_saved_iterations
+        self.eager : bool = eager
+        self.fit_cache : FitResultCache | None = fit_cache
+        self.max_workers : int | None = max_workers
+        self.chunk_size : int = chunk_size
+        self.failures : list[tuple[RawDataPoint | None, RawDataPoint | None, Exception]] = []
+        self.lock : threading.RLock = threading.RLock()
+        self.nr_fits : int = 0
+        self.nr_iterations : int = 0
+        self.nr_saved_iterations : int = 0
+        
+    def __getstate__(self) -> dict:
+        '''
+        Gets the state for pickling without the lock.
+
+        Returns
+        -------
+        dict
+            All attributes except of the lock.
+
+        '''
+        state : dict = self.__dict__.copy()
+        del state["lock"]
+        return state
+    
+    def __setstate__(self, state : dict) -> None:
+        '''
+        Sets the state after unpickling with a new lock.
+
+        Parameters
+        ----------
+        state : dict
+            All attributes except of the lock.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.__dict__.update(state)
+        self.lock : threading.RLock = threading.RLock()
         
     def add(self, sample_rdp : RawDataPoint, background_rdp : RawDataPoint) -> None:
         '''
         Creates a new MeasurementDataPoint and adds it to the container, if fitting
-        is possible.
+        is possible. Otherwise the error is added to the failures.
 
         Parameters
         ----------
@@ -47,10 +150,403 @@ class MeasurementDataPointContainer():
 
         '''
         try:
-            self.container.append(MeasurementDataPoint(sample_rdp, background_rdp))
-        except RuntimeError:
-            print("fitting not possible")
-            pass
+            self.container.append(MeasurementDataPoint(sample_rdp, background_rdp, True, self.fit_cache))
+        except FIT_ERRORS as err:
+            self.failures.append((sample_rdp, background_rdp, err))
+        
+    def add_many(self,
+                 rdp_pairs : list[tuple[RawDataPoint | None, RawDataPoint | None]],
+                 fit : bool = True,
+                 background_results : list[FitResult | None] | None = None
+        ) -> None:
+        '''
+        Creates many new MeasurementDataPoints and adds them to the container. The
+        datapoint results with a free center, or with eager all results, are fitted at once,
+        all other results are fitted on demand. Datapoints, which couldn't be fitted, aren't
+        added and their errors are added to the failures.
+
+        Parameters
+        ----------
+        rdp_pairs : list[tuple[RawDataPoint | None, RawDataPoint | None]]
+            The raw datapoints of the sample and of the background of every datapoint.
+        fit : bool, optional
+            If the new datapoints are fitted. Otherwise all datapoints are added and all
+            results are fitted on demand or with fit. The default is True.
+        background_results : list[FitResult | None] | None, optional
+            The shared result of the background raw datapoint of every datapoint, e.g. of
+            a BackgroundRegistry. The default is None, which means every datapoint creates
+            its own.
+
+        Returns
+        -------
+        None.
+
+        '''
+        datapoints : list[MeasurementDataPoint] = self.__create_datapoints__(rdp_pairs, background_results)
+        if not fit:
+            with self.lock:
+                self.container.extend(datapoints)
+            return
+        previous : MeasurementDataPoint | None = self.container[-1] if len(self.container) > 0 else None
+        if self.eager:
+            failures : dict[MeasurementDataPoint, Exception] = self.__fit__(
+                datapoints, ("sample_result", "background_result", "datapoint_result"), True, True, previous)
+        else:
+            failures : dict[MeasurementDataPoint, Exception] = self.__fit__(datapoints, ("datapoint_result",), True, False, previous)
+        with self.lock:
+            for mdp in datapoints:
+                if mdp in failures:
+                    self.failures.append((mdp.sample_rdp, mdp.background_rdp, failures[mdp]))
+                else:
+                    self.container.append(mdp)
+        
+    def add_fitted(self,
+                   rdp_pairs : list[tuple[RawDataPoint | None, RawDataPoint | None]],
+                   results : list[np.void | Exception | None],
+                   background_results : list[FitResult | None] | None = None
+        ) -> None:
+        '''
+        Creates many new MeasurementDataPoints, whose datapoint results with a free center
+        were already fitted, e.g. by another process, and adds them to the container.
+        Datapoints with an error instead of a result aren't added and their errors are
+        added to the failures, datapoints without a result are fitted on demand.
+
+        Parameters
+        ----------
+        rdp_pairs : list[tuple[RawDataPoint | None, RawDataPoint | None]]
+            The raw datapoints of the sample and of the background of every datapoint.
+        results : list[np.void | Exception | None]
+            The fitted parameters and their covariance of the type FREE_CENTER_DTYPE, the
+            error or None of every datapoint.
+        background_results : list[FitResult | None] | None, optional
+            The shared result of the background raw datapoint of every datapoint. The
+            default is None, which means every datapoint creates its own.
+
+        Returns
+        -------
+        None.
+
+        '''
+        datapoints : list[MeasurementDataPoint] = self.__create_datapoints__(rdp_pairs, background_results)
+        self.subtract_backgrounds([mdp for mdp, result in zip(datapoints, results) if isinstance(result, np.void)])
+        with self.lock:
+            for mdp, result in zip(datapoints, results):
+                if isinstance(result, Exception):
+                    self.failures.append((mdp.sample_rdp, mdp.background_rdp, result))
+                    continue
+                if result is not None:
+                    mdp.set_fitting_result(mdp.datapoint_result, mdp.fitting_task(mdp.datapoint_result)[2],
+                                           (result["fit_coeff"], result["fit_err"]))
+                self.container.append(mdp)
+
+    def __create_datapoints__(self,
+                              rdp_pairs : list[tuple[RawDataPoint | None, RawDataPoint | None]],
+                              background_results : list[FitResult | None] | None
+        ) -> list[MeasurementDataPoint]:
+        '''
+        Creates MeasurementDataPoints without fitting them, which use the given shared
+        results of their background raw datapoints.
+
+        Parameters
+        ----------
+        rdp_pairs : list[tuple[RawDataPoint | None, RawDataPoint | None]]
+            The raw datapoints of the sample and of the background of every datapoint.
+        background_results : list[FitResult | None] | None
+            The shared result of the background raw datapoint of every datapoint or None.
+
+        Returns
+        -------
+        list[MeasurementDataPoint]
+            The created datapoints.
+
+        '''
+        if background_results is None:
+            background_results : list[FitResult | None] = [None] * len(rdp_pairs)
+        return [MeasurementDataPoint(s, b, False, self.fit_cache, result) for (s, b), result in zip(rdp_pairs, background_results)]
+        
+    def fit(self,
+            index_map : np.ndarray | None = None,
+            results : tuple[str, ...] = ("sample_result", "background_result", "datapoint_result"),
+            free_center : bool = True,
+            fixed_center : bool = True
+        ) -> None:
+        '''
+        Fits the results of many datapoints at once, which aren't fitted yet, instead of
+        fitting them one by one on the first access. The errors of datapoints, which
+        couldn't be fitted, are added to the failures and marked as not fittable, their
+        results stay unfitted.
+
+        Parameters
+        ----------
+        index_map : np.ndarray | None, optional
+            The indices of the datapoints. The default is None, which means all datapoints.
+        results : tuple[str, ...], optional
+            The names of the results of every datapoint, which are fitted. The default is
+            all results.
+        free_center : bool, optional
+            If the fits with a free center are performed. The default is True.
+        fixed_center : bool, optional
+            If the fits with a fixed center are performed. The default is True.
+
+        Returns
+        -------
+        None.
+
+        '''
+        datapoints : list[MeasurementDataPoint] = (self.container if index_map is None
+                                                   else [self.container[index] for index in index_map])
+        failures : dict[MeasurementDataPoint, Exception] = self.__fit__(datapoints, results, free_center, fixed_center)
+        with self.lock:
+            for mdp, err in failures.items():
+                mdp.fitting_was_possible : bool = False
+                self.failures.append((mdp.sample_rdp, mdp.background_rdp, err))
+        
+    def __fit__(self,
+                datapoints : list[MeasurementDataPoint],
+                results : tuple[str, ...],
+                free_center : bool,
+                fixed_center : bool,
+                previous : MeasurementDataPoint | None = None
+        ) -> dict[MeasurementDataPoint, Exception]:
+        '''
+        Fits all signals of the given results at once, which aren't fitted yet and aren't
+        in the fit cache. Signals, whose fit with a free center doesn't converge, are fitted
+        by variable projection.
+
+        Parameters
+        ----------
+        datapoints : list[MeasurementDataPoint]
+            The datapoints to fit.
+        results : tuple[str, ...]
+            The names of the results of every datapoint, which are fitted.
+        free_center : bool
+            If the fits with a free center are performed.
+        fixed_center : bool
+            If the fits with a fixed center are performed.
+        previous : MeasurementDataPoint | None, optional
+            The datapoint in front of the first one for the warm start. The default is None.
+
+        Returns
+        -------
+        dict[MeasurementDataPoint, Exception]
+            The errors of the datapoints, which couldn't be fitted.
+
+        '''
+        if "datapoint_result" in results:
+            self.subtract_backgrounds(datapoints)
+        free_tasks : list[tuple[MeasurementDataPoint, tuple]] = []
+        fixed_tasks : list[tuple[MeasurementDataPoint, tuple]] = []
+        seen : set[int] = set()
+        for mdp in datapoints:
+            for name in results:
+                save_dict : FitResult = getattr(mdp, name)
+                # results without raw datapoints have nothing to fit, results of datapoints
+                # without a background are the same as the sample or background results and
+                # background results are shared by all datapoints with the same background
+                if save_dict.fit_function is None or id(save_dict) in seen:
+                    continue
+                seen.add(id(save_dict))
+                missing_free : bool = free_center and not save_dict.is_fitted(False)
+                missing_fixed : bool = fixed_center and not save_dict.is_fitted(True)
+                if missing_free or missing_fixed:
+                    task : tuple = mdp.fitting_task(save_dict)
+                    if missing_free:
+                        free_tasks.append((mdp, task))
+                    if missing_fixed:
+                        fixed_tasks.append((mdp, task))
+        free_tasks, free_keys = self.__load_cached__(free_tasks, False)
+        fixed_tasks, fixed_keys = self.__load_cached__(fixed_tasks, True)
+                        
+        failures : dict[MeasurementDataPoint, Exception] = {}
+        if len(free_tasks) > 0:
+            position, voltage, mask = pad_signals([task[0] for _, task in free_tasks], [task[1] for _, task in free_tasks])
+            p0 : np.ndarray = np.array([task[2] for _, task in free_tasks], dtype=float)
+            start : np.ndarray = warm_start_parameters(position, voltage, p0, self.warm_start,
+                                                       np.array([task[3] for _, task in free_tasks], dtype=float),
+                                                       self.__previous_parameters__(free_tasks, previous if free_tasks[0][0] is datapoints[0] else None),
+                                                       mask)
+            popt, pcov, errors = self.__fit_free_center__(position, voltage, mask, p0, start)
+            fitted : list[tuple[np.ndarray, np.ndarray]] = []
+            result_keys : list[str] = []
+            with self.lock:
+                for index, (mdp, (_, _, task_p0, _, save_dict)) in enumerate(free_tasks):
+                    if errors[index] is not None:
+                        failures[mdp] = errors[index]
+                        continue
+                    mdp.set_fitting_result(save_dict, task_p0, (popt[index], pcov[index]))
+                    fitted.append((popt[index], pcov[index]))
+                    if self.fit_cache is not None:
+                        result_keys.append(free_keys[index])
+            if self.fit_cache is not None:
+                self.fit_cache.save(result_keys, fitted)
+                
+        if len(fixed_tasks) > 0:
+            position, voltage, mask = pad_signals([task[0] for _, task in fixed_tasks], [task[1] for _, task in fixed_tasks])
+            p0 : np.ndarray = np.array([task[2] for _, task in fixed_tasks], dtype=float)
+            popt_fixed_ctr, pcov_fixed_ctr = fit_signal_fixed_center(position, voltage, p0[:, 3], mask)
+            with self.lock:
+                for index, (mdp, (_, _, task_p0, _, save_dict)) in enumerate(fixed_tasks):
+                    mdp.set_fitting_result(save_dict, task_p0, res_fixed_ctr=(popt_fixed_ctr[index], pcov_fixed_ctr[index]))
+            if self.fit_cache is not None:
+                self.fit_cache.save(fixed_keys, list(zip(popt_fixed_ctr, pcov_fixed_ctr)))
+        return failures
+        
+    def subtract_backgrounds(self, datapoints : list[MeasurementDataPoint] | None = None) -> None:
+        '''
+        Subtracts the backgrounds of many datapoints at once, whose signal without the
+        background isn't calculated yet, and sets the signals of the datapoints.
+
+        Parameters
+        ----------
+        datapoints : list[MeasurementDataPoint] | None, optional
+            The datapoints. The default is None, which means all datapoints.
+
+        Returns
+        -------
+        None.
+
+        '''
+        pending : list[MeasurementDataPoint] = [mdp for mdp in (self.container if datapoints is None else datapoints)
+                                                if not mdp.has_subtracted_signal()]
+        if len(pending) == 0:
+            return
+        signals : list[tuple[np.ndarray, np.ndarray]] = subtract_backgrounds([mdp.sample_rdp for mdp in pending],
+                                                                           [mdp.background_rdp for mdp in pending])
+        with self.lock:
+            for mdp, (position, voltage) in zip(pending, signals):
+                mdp.set_subtracted_signal(position, voltage)
+        
+    def __fit_free_center__(self,
+                            position : np.ndarray,
+                            voltage : np.ndarray,
+                            mask : np.ndarray,
+                            p0 : np.ndarray,
+                            start : np.ndarray
+        ) -> tuple[np.ndarray, np.ndarray, list[Exception | None]]:
+        '''
+        Fits padded signals with a free center. With more than one worker and more than one
+        chunk of signals, the chunks are fitted in parallel processes, otherwise serially.
+        The signals are shared with the processes in shared memory, every process only
+        gets the range of its chunk and writes the results into a shared output array.
+
+        Parameters
+        ----------
+        position : np.ndarray
+            The padded positions, one row per signal.
+        voltage : np.ndarray
+            The padded voltages, one row per signal.
+        mask : np.ndarray
+            Which points of the rows are valid.
+        p0 : np.ndarray
+            The default start parameters of every signal.
+        start : np.ndarray
+            The warm start parameters of every signal.
+
+        Returns
+        -------
+        tuple(np.ndarray, np.ndarray, list[Exception | None])
+            The fitted parameters, their covariance and the error of every signal, if it
+            couldn't be fitted.
+
+        '''
+        chunks : list[slice] = [slice(index, index + self.chunk_size) for index in range(0, len(voltage), self.chunk_size)]
+        max_workers : int = min(len(chunks), self.max_workers or os.cpu_count() or 1)
+        if max_workers <= 1:
+            chunk_results : list[tuple] = [_fit_chunk(position, voltage, mask, p0, start, self.count_saved_iterations)]
+        else:
+            chunk_results : list[tuple] = []
+            with SharedArrays({"position" : position, "voltage" : voltage, "mask" : mask, "p0" : p0, "start" : start,
+                               "output" : np.zeros(len(voltage), FREE_CENTER_DTYPE)}) as shared:
+                with ProcessPoolExecutor(max_workers) as executor:
+                    futures : list[Future] = [executor.submit(_fit_shared_chunk, shared.descriptors, chunk.start, chunk.stop,
+                                                              self.count_saved_iterations) for chunk in chunks]
+                    for chunk, future in zip(chunks, futures):
+                        nr_signals : int = len(range(len(voltage))[chunk])
+                        try:
+                            errors, nr_iterations, nr_saved_iterations = future.result()
+                            chunk_results.append((shared["output"]["fit_coeff"][chunk].copy(), shared["output"]["fit_err"][chunk].copy(),
+                                                  [errors.get(index) for index in range(nr_signals)], nr_iterations, nr_saved_iterations))
+                        except Exception as err:
+                            # e.g. a crashed worker, all signals of the chunk failed
+                            chunk_results.append((np.full((nr_signals, 4), np.nan), np.full((nr_signals, 4, 4), np.inf),
+                                                  [err] * nr_signals, 0, 0))
+        with self.lock:
+            self.nr_fits += len(voltage)
+            self.nr_iterations += sum(chunk_result[3] for chunk_result in chunk_results)
+            self.nr_saved_iterations += sum(chunk_result[4] for chunk_result in chunk_results)
+        return (np.concatenate([chunk_result[0] for chunk_result in chunk_results]),
+                np.concatenate([chunk_result[1] for chunk_result in chunk_results]),
+                [error for chunk_result in chunk_results for error in chunk_result[2]])
+                
+    def __load_cached__(self,
+                        tasks : list[tuple[MeasurementDataPoint, tuple]],
+                        fixed_center : bool
+        ) -> tuple[list[tuple[MeasurementDataPoint, tuple]], list[str]]:
+        '''
+        Sets the results of all fitting tasks, which are in the fit cache.
+
+        Parameters
+        ----------
+        tasks : list[tuple[MeasurementDataPoint, tuple]]
+            The datapoints and their fitting tasks.
+        fixed_center : bool
+            If the fits have a fixed center.
+
+        Returns
+        -------
+        tuple(list[tuple[MeasurementDataPoint, tuple]], list[str])
+            The tasks, which still have to be fitted, and their keys in the fit cache.
+
+        '''
+        if self.fit_cache is None or len(tasks) == 0:
+            return tasks, []
+        keys : list[str] = [self.fit_cache.key(task[0], task[1], task[2], fixed_center) for _, task in tasks]
+        remaining : list[tuple[MeasurementDataPoint, tuple]] = []
+        remaining_keys : list[str] = []
+        for key, (mdp, task), res in zip(keys, tasks, self.fit_cache.load(keys)):
+            if res is None:
+                remaining.append((mdp, task))
+                remaining_keys.append(key)
+            elif fixed_center:
+                mdp.set_fitting_result(task[4], task[2], res_fixed_ctr=res)
+            else:
+                mdp.set_fitting_result(task[4], task[2], res)
+        return remaining, remaining_keys
+        
+    def __previous_parameters__(self,
+                                tasks : list[tuple[MeasurementDataPoint, tuple]],
+                                previous : MeasurementDataPoint | None
+        ) -> np.ndarray:
+        '''
+        Collects the fitted parameters of the datapoint in front of every fitting task. Only
+        the datapoint in front of the first one is already fitted, all other tasks get NaN.
+
+        Parameters
+        ----------
+        tasks : list[tuple[MeasurementDataPoint, tuple]]
+            The datapoints and their fitting tasks.
+        previous : MeasurementDataPoint | None
+            The datapoint in front of the first one, if there is any.
+
+        Returns
+        -------
+        np.ndarray
+            The parameters of the fit with a free center of the previous datapoint.
+
+        '''
+        parameters : np.ndarray = np.full((len(tasks), 4), np.nan)
+        if previous is None:
+            return parameters
+        first : MeasurementDataPoint = tasks[0][0]
+        for index, (mdp, task) in enumerate(tasks):
+            if mdp is not first:
+                break
+            for result, previous_result in ((mdp.sample_result, previous.sample_result),
+                                            (mdp.background_result, previous.background_result),
+                                            (mdp.datapoint_result, previous.datapoint_result)):
+                if task[4] is result and previous_result.is_fitted(False):
+                    parameters[index] = previous_result["fit_coeff"]
+        return parameters
         
     def remove(self,  measurementdatapoint : MeasurementDataPoint) -> None:
         '''
@@ -95,4 +591,100 @@ class MeasurementDataPointContainer():
             The amount of raw datapoints inside the container.
 
         '''
-        return len(self.container)
\ No newline at end of file
+        return len(self.container)
+
+def _fit_chunk(position : np.ndarray,
+               voltage : np.ndarray,
+               mask : np.ndarray,
+               p0 : np.ndarray,
+               start : np.ndarray,
+               count_saved_iterations : bool
+    ) -> tuple[np.ndarray, np.ndarray, list[Exception | None], int, int]:
+    '''
+    Fits a chunk of padded signals with a free center at once, serially or in a worker
+    process of MeasurementDataPointContainer. Signals, whose fit doesn't converge, are
+    fitted by variable projection.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        The padded positions, one row per signal.
+    voltage : np.ndarray
+        The padded voltages, one row per signal.
+    mask : np.ndarray
+        Which points of the rows are valid.
+    p0 : np.ndarray
+        The default start parameters of every signal.
+    start : np.ndarray
+        The warm start parameters of every signal.
+    count_saved_iterations : bool
+        If the fits are repeated with the default start parameters to count the
+        iterations saved by the warm start.
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray, list[Exception | None], int, int)
+        The fitted parameters, their covariance, the error of every signal, if it couldn't
+        be fitted, the number of iterations and the number of saved iterations.
+
+    '''
+    popt, pcov, converged, iterations = fit_signals(position, voltage, start, mask, full_output=True)
+    nr_saved_iterations : int = 0
+    if count_saved_iterations:
+        nr_saved_iterations : int = int(fit_signals(position, voltage, p0, mask, full_output=True)[3].sum() - iterations.sum())
+    errors : list[Exception | None] = [None] * len(voltage)
+    for index in np.flatnonzero(~converged):
+        try:
+            # the center is searched around the given and the warm start center
+            popt[index], pcov[index] = fit_signal_variable_projection(position[index][mask[index]], voltage[index][mask[index]],
+                                                                      (p0[index][3], start[index][3]))
+        except FIT_ERRORS as err:
+            errors[index] = err
+    return popt, pcov, errors, int(iterations.sum()), nr_saved_iterations
+
+def _fit_shared_chunk(descriptors : dict[str, tuple[str, tuple[int, ...], np.dtype]],
+                      start : int,
+                      stop : int,
+                      count_saved_iterations : bool
+    ) -> tuple[dict[int, Exception], int, int]:
+    '''
+    Fits a chunk of padded signals in shared memory in a worker process of
+    MeasurementDataPointContainer and writes the results into the shared output array.
+
+    Parameters
+    ----------
+    descriptors : dict[str, tuple[str, tuple[int, ...], np.dtype]]
+        The descriptors of the shared arrays position, voltage, mask, p0, start and output.
+    start : int
+        The index of the first signal of the chunk.
+    stop : int
+        The index after the last signal of the chunk.
+    count_saved_iterations : bool
+        If the fits are repeated with the default start parameters to count the
+        iterations saved by the warm start.
+
+    Returns
+    -------
+    tuple(dict[int, Exception], int, int)
+        The errors of the signals in the chunk, which couldn't be fitted, the number of
+        iterations and the number of saved iterations.
+
+    '''
+    arrays, segments = SharedArrays.attach(descriptors)
+    try:
+        chunk : slice = slice(start, stop)
+        popt, pcov, errors, nr_iterations, nr_saved_iterations = _fit_chunk(
+            arrays["position"][chunk], arrays["voltage"][chunk], arrays["mask"][chunk], arrays["p0"][chunk],
+            arrays["start"][chunk], count_saved_iterations)
+        arrays["output"]["fit_coeff"][chunk] = popt
+        arrays["output"]["fit_err"][chunk] = pcov
+    finally:
+        # the views have to be released before the segments can be closed
+        arrays : dict[str, np.ndarray] = {}
+        for segment in segments:
+            try:
+                segment.close()
+            except BufferError:
+                # the traceback of an error still holds views, they are freed with the process
+                pass
+    return {index : error for index, error in enumerate(errors) if error is not None}, nr_iterations, nr_saved_iterations
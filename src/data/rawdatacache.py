@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:31:52 2026
+
+@author: kaisjuli
+"""
+import os
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+
+from .. import constants
+from ..constants import RAW_DATA_CACHE_DIRECTORY, RAW_DATA_CACHE_MAX_SIZE
+
+class RawDataCache():
+    """
+    A class to store the decoded and jump corrected scans of raw datafiles in binary sidecar
+    files, so reopening a file doesn't require to parse it again. Every entry is a directory
+    named after a key of the size, the modification time and the content hash of the raw
+    datafile, the parameters of the jump correction and the format of the cache. If the
+    cache grows larger than max_size, the least recently used entries are removed.
+    
+    Parameters
+    ----------
+    directory : str, optional
+        The directory of the cache. The default is RAW_DATA_CACHE_DIRECTORY.
+    max_size : int, optional
+        The maximum size of the cache in bytes. The default is RAW_DATA_CACHE_MAX_SIZE.
+        
+    Attributes
+    ----------
+    directory : str
+        The directory of the cache.
+    max_size : int
+        The maximum size of the cache in bytes.
+    """
+    
+    def __init__(self,
+                 directory : str = RAW_DATA_CACHE_DIRECTORY,
+                 max_size : int = RAW_DATA_CACHE_MAX_SIZE
+        ) -> None:
+        self.directory : str = directory
+        self.max_size : int = max_size
+        
+    def key(self, filename : str, buffer : bytes) -> str:
+        '''
+        Creates the key of a raw datafile. The current parameters of the jump correction
+        and the format version are part of the key, so entries of other parameters or of
+        an older format aren't loaded.
+
+        Parameters
+        ----------
+        filename : str
+            The filename of the raw datafile.
+        buffer : bytes
+            The content of the raw datafile.
+
+        Returns
+        -------
+        str
+            The key of the raw datafile.
+
+        '''
+        stat : os.stat_result = os.stat(filename)
+        file_hash = hashlib.blake2b(digest_size=16)
+        file_hash.update("{}:{}:{}:{}:{}:".format(constants.RAW_DATA_CACHE_FORMAT_VERSION, constants.JUMP_THRESHOLD,
+                                                  constants.JUMP_VOLTAGE_LIMIT, stat.st_size, stat.st_mtime_ns).encode())
+        file_hash.update(buffer)
+        return file_hash.hexdigest()
+    
+    def load(self, key : str) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None:
+        '''
+        Loads an entry of the cache. The scan data is memory mapped.
+
+        Parameters
+        ----------
+        key : str
+            The key of the raw datafile.
+
+        Returns
+        -------
+        tuple(list[str], np.ndarray, np.ndarray, np.ndarray) | None
+            The header lines, the rows of all scans, the offsets of the scans in the rows
+            and the info records of the scans or None, if the entry doesn't exist.
+
+        '''
+        entry : str = os.path.join(self.directory, key)
+        try:
+            header_lines : np.ndarray = np.load(os.path.join(entry, "header.npy"))
+            offsets : np.ndarray = np.load(os.path.join(entry, "offsets.npy"))
+            info : np.ndarray = np.load(os.path.join(entry, "info.npy"))
+            data : np.ndarray = np.load(os.path.join(entry, "data.npy"), mmap_mode="r")
+            os.utime(entry)
+        except (OSError, ValueError):
+            return None
+        return header_lines.tolist(), data, offsets, info
+    
+    def save(self,
+             key : str,
+             header_lines : list[str],
+             data : np.ndarray,
+             offsets : np.ndarray,
+             info : np.ndarray
+        ) -> None:
+        '''
+        Saves a new entry to the cache and removes old entries, if the cache is too large.
+        The entry is written to a temporary directory first, so incomplete entries are never
+        loaded.
+
+        Parameters
+        ----------
+        key : str
+            The key of the raw datafile.
+        header_lines : list[str]
+            The lines of the header.
+        data : np.ndarray
+            The rows of all scans.
+        offsets : np.ndarray
+            The offsets of the scans in the rows.
+        info : np.ndarray
+            The info records of the scans.
+
+        Returns
+        -------
+        None.
+
+        '''
+        entry : str = os.path.join(self.directory, key)
+        if os.path.isdir(entry):
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_entry : str = tempfile.mkdtemp(prefix=".", dir=self.directory)
+        except OSError:
+            return
+        try:
+            np.save(os.path.join(temp_entry, "header.npy"), np.array(header_lines, dtype=str))
+            np.save(os.path.join(temp_entry, "offsets.npy"), offsets)
+            np.save(os.path.join(temp_entry, "info.npy"), info)
+            np.save(os.path.join(temp_entry, "data.npy"), data)
+            os.rename(temp_entry, entry)
+        except OSError:
+            shutil.rmtree(temp_entry, ignore_errors=True)
+            return
+        self.evict()
+        
+    def evict(self) -> None:
+        '''
+        Removes the least recently used entries until the cache is smaller than max_size.
+        Entries which are still in use and can't be removed are skipped, as well as entries
+        which are removed at the same time, e.g. by another process.
+
+        Returns
+        -------
+        None.
+
+        '''
+        entries : list[tuple[float, int, str]] = []
+        try:
+            names : list[str] = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            entry : str = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(entry):
+                continue
+            try:
+                size : int = sum(f.stat().st_size for f in os.scandir(entry) if f.is_file())
+                entries.append((os.stat(entry).st_mtime, size, entry))
+            except OSError:
+                continue
+        total_size : int = sum(entry[1] for entry in entries)
+        for _, size, entry in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                shutil.rmtree(entry)
+                total_size -= size
+            except OSError:
+                pass
+            
+    def clear(self) -> None:
+        '''
+        Removes all entries of the cache.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -4,8 +4,17 @@ Created on Mon May 12 12:14:16 2025
 
 @author: kaisjuli
 """
+import os
+import mmap
+import numpy as np
+
 from .rawdatapoint import RawDataPoint
 from .rawdatapointcontainer import RawDataPointContainer
+from .lazyrawdatapointcontainer import LazyRawDataPointContainer
+from .columnarrawdatapointcontainer import ColumnarRawDataPointContainer
+from .rawdatacache import RawDataCache
+from .rawdataparser import INFO_DTYPE, read_header, index_scans, parse_data_section, decode_info_strings
+from ..calculation import sort_scans, correct_jumps
 
 class RawDataFile():
     """
@@ -15,13 +24,46 @@ class RawDataFile():
     ----------
     filename : str
         The filename of the raw datafile.
+    lazy : bool, optional
+        If the file is memory mapped and the raw datapoints are only created when they
+        are accessed. The default is False.
+    max_resident : int, optional
+        The maximum number of raw datapoints kept in memory in the lazy mode.
+        The default is 1024.
+    cache : RawDataCache | None, optional
+        The cache of already parsed raw datafiles, which is not used in the lazy and the
+        follow mode. The default is None.
+    follow : bool, optional
+        If the file is still being written. The last scan of the file is then only read
+        by refresh, once the following scan has started, or by finish. The default is
+        False.
+    columnar : bool, optional
+        If the scans are stored in contiguous arrays and the raw datapoints are only views
+        on them. Not used in the lazy mode. The default is False.
+    scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None, optional
+        The header lines, the converted rows of all scans, the offsets of the scans in
+        the rows and the info records of the scans like get_scans returns them, e.g. of
+        another process. The file isn't read again then. Not used in the lazy and the
+        follow mode. The default is None.
         
     Attributes
     ----------
-    datapoints : RawDataPointContainer
+    datapoints : RawDataPointContainer | LazyRawDataPointContainer | ColumnarRawDataPointContainer
         The container which stores all raw datapoints from the file.
     filename : str
         The filename of the raw datafile.
+    lazy : bool
+        If the raw datapoints are only created when they are accessed.
+    max_resident : int
+        The maximum number of raw datapoints kept in memory in the lazy mode.
+    follow : bool
+        If the file is still being written.
+    columnar : bool
+        If the scans are stored in contiguous arrays.
+    parsed_until : int
+        The offset in the file up to which all scans are read.
+    header_lines : list[str]
+        The lines of the header.
         
     appname : str
         The appname in the datafile.
@@ -53,35 +95,219 @@ class RawDataFile():
         The molar mass of the sample.
     """
     
-    def __init__(self, filename : str) -> None:
-        self.datapoints : RawDataPointContainer = RawDataPointContainer()
+    def __init__(self,
+                 filename : str,
+                 lazy : bool = False,
+                 max_resident : int = 1024,
+                 cache : RawDataCache | None = None,
+                 follow : bool = False,
+                 columnar : bool = False,
+                 scans : tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None = None
+        ) -> None:
         self.filename : str = filename
+        self.lazy : bool = lazy
+        self.max_resident : int = max_resident
+        self.follow : bool = follow
+        self.columnar : bool = columnar and not lazy
+        
+        cached : tuple | None = None
+        if scans is not None and not lazy and not follow:
+            buffer : bytes = b""
+            cached : tuple | None = scans
+        elif lazy:
+            buffer : bytes | mmap.mmap = self.__map_file__()
+        else:
+            with open(filename, "rb") as file:
+                buffer : bytes = file.read()
+        if cached is None and cache is not None and not lazy and not follow:
+            cache_key : str = cache.key(filename, buffer)
+            cached : tuple | None = cache.load(cache_key)
+        if cached is not None:
+            header_lines, data, offsets, info = cached
+        else:
+            header_lines, data_start = read_header(buffer)
+        self.header_lines : list[str] = list(header_lines)
+        info_buffer : list[str] = []
+        for line in header_lines:
+            if line[:5] == "TITLE":
+                self.title : str = line[6:-1]
+            if line[:4] == "INFO":
+                info_buffer.append(line)
+        if lazy:
+            self.datapoints : LazyRawDataPointContainer = LazyRawDataPointContainer(buffer, data_start, max_resident, follow)
+            self.parsed_until : int = self.datapoints.stop
+        else:
+            self.parsed_until : int = len(buffer) if scans is None else os.path.getsize(filename)
+            if cached is None:
+                if follow:
+                    # the last scan could still be incomplete
+                    self.parsed_until : int = max(buffer.rfind(b"\n;", data_start - 1) + 1, data_start)
+                data, offsets, info = self.__convert_scans__(*parse_data_section(buffer, data_start, self.parsed_until))
+                if cache is not None and not follow:
+                    cache.save(cache_key, header_lines, data, offsets, info)
+            if columnar:
+                self.datapoints : ColumnarRawDataPointContainer = ColumnarRawDataPointContainer(data, offsets, info)
+            else:
+                self.datapoints : RawDataPointContainer = RawDataPointContainer()
+                self.__add_scans__(data, offsets, info)
+        self.__convert_info_buffer__(info_buffer)
+        
+    def __convert_scans__(self,
+                          info_strings : list[str],
+                          data : np.ndarray,
+                          offsets : np.ndarray
+        ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        Converts the parsed scans, i.e. decodes the info strings, sorts the rows by the
+        raw position and corrects jumps in the voltage.
+
+        Parameters
+        ----------
+        info_strings : list[str]
+            The info string of each scan.
+        data : np.ndarray
+            The parsed rows of all scans.
+        offsets : np.ndarray
+            The offsets of the scans in the parsed rows.
+
+        Returns
+        -------
+        tuple(np.ndarray, np.ndarray, np.ndarray)
+            The converted rows of all scans, the offsets of the scans in the converted rows
+            and the info records of the scans.
+
+        '''
+        info : np.ndarray = decode_info_strings(info_strings)
+        data, down = sort_scans(data, offsets)
+        data, offsets, info["jump_corrected"] = correct_jumps(data, offsets)
+        info["scan_direction"] = np.where(down, "down", "up")
+        return data, offsets, info
+    
+    def __add_scans__(self, data : np.ndarray, offsets : np.ndarray, info : np.ndarray) -> None:
+        '''
+        Adds converted scans to the container of the raw datapoints.
+
+        Parameters
+        ----------
+        data : np.ndarray
+            The converted rows of the scans.
+        offsets : np.ndarray
+            The offsets of the scans in the rows.
+        info : np.ndarray
+            The info records of the scans.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if isinstance(self.datapoints, ColumnarRawDataPointContainer):
+            self.datapoints.extend(data, offsets, info)
+        else:
+            for info_record, start, stop in zip(info, offsets[:-1], offsets[1:]):
+                self.datapoints.add(info_record, data[start:stop], True)
+        
+    def get_scans(self) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        Gets the header lines and all scans in contiguous arrays, e.g. to send them to
+        another process, which creates the raw datafile again with them.
+
+        Returns
+        -------
+        tuple(list[str], np.ndarray, np.ndarray, np.ndarray)
+            The header lines, the converted rows of all scans, the offsets of the scans in
+            the rows and the info records of the scans.
+
+        '''
+        if isinstance(self.datapoints, ColumnarRawDataPointContainer):
+            return self.header_lines, self.datapoints.data, self.datapoints.offsets, self.datapoints.info
+        rdps : list[RawDataPoint] = self.datapoints[:]
+        offsets : np.ndarray = np.zeros(len(rdps) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(rdp.data) for rdp in rdps])
+        data : np.ndarray = np.concatenate([rdp.data for rdp in rdps]) if len(rdps) > 0 else np.empty((0, 4))
+        info : np.ndarray = np.array([rdp.info_record for rdp in rdps], dtype=INFO_DTYPE)
+        return self.header_lines, data, offsets, info
         
-        with open(filename) as file:
-            info_buffer : list[str] = []
-            data_flag : bool = False
-            data_info_buffer : str = ""
-            data_buffer : list[list[str]] = []
-            for index, line in enumerate(file):
-                if line[:5] == "TITLE":
-                    self.title : str = line[6:-1]
-                if line[:4] == "INFO":
-                    info_buffer.append(line)
-                if line == "[Data]\n":
-                    data_flag : bool = True
-                if data_flag:
-                    if line[0] == ";":
-                        if data_info_buffer != "":
-                            self.datapoints.add(data_info_buffer, data_buffer)
-                            data_buffer : list[list[str]] = []
-                        data_info_buffer : str = line
-                    elif line[0] == ",":
-                        if line.count(",") == 4:
-                            res : list[str] = line[:-1].split(",")[1:]
-                            if res[1] != '':
-                                data_buffer.append(res)
-            self.datapoints.add(data_info_buffer, data_buffer)
-            self.__convert_info_buffer__(info_buffer)
+    def __map_file__(self) -> bytes | mmap.mmap:
+        '''
+        Maps the raw datafile read-only into memory.
+
+        Returns
+        -------
+        bytes | mmap.mmap
+            The memory map of the file or an empty buffer, if the file is empty.
+
+        '''
+        with open(self.filename, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+    def refresh(self) -> int:
+        '''
+        Reads the scans which were appended to the file since it was read. Only the part
+        of the file behind parsed_until is read and only complete scans, which are followed
+        by the next scan, are added. In the lazy mode the appended complete scans are
+        indexed.
+
+        Returns
+        -------
+        int
+            The number of new raw datapoints.
+
+        '''
+        nr_datapoints : int = len(self)
+        if self.lazy:
+            self.datapoints.extend(self.__map_file__())
+            self.parsed_until : int = self.datapoints.stop
+            return len(self) - nr_datapoints
+        with open(self.filename, "rb") as file:
+            file.seek(self.parsed_until)
+            buffer : bytes = file.read()
+        scan_starts : np.ndarray = index_scans(buffer)
+        if len(scan_starts) < 2:
+            return 0
+        self.__add_scans__(*self.__convert_scans__(*parse_data_section(buffer, int(scan_starts[0]), int(scan_starts[-1]))))
+        self.parsed_until += int(scan_starts[-1])
+        return len(self) - nr_datapoints
+        
+    def finish(self) -> int:
+        '''
+        Reads all scans which were appended to the file including the last one, once the
+        file isn't written anymore, and ends the follow mode.
+
+        Returns
+        -------
+        int
+            The number of new raw datapoints.
+
+        '''
+        nr_datapoints : int = len(self)
+        self.follow : bool = False
+        if self.lazy:
+            self.datapoints.extend(self.__map_file__(), finished=True)
+            self.parsed_until : int = self.datapoints.stop
+            return len(self) - nr_datapoints
+        with open(self.filename, "rb") as file:
+            file.seek(self.parsed_until)
+            buffer : bytes = file.read()
+        scan_starts : np.ndarray = index_scans(buffer)
+        if len(scan_starts) > 0:
+            self.__add_scans__(*self.__convert_scans__(*parse_data_section(buffer, int(scan_starts[0]), len(buffer))))
+        self.parsed_until += len(buffer)
+        return len(self) - nr_datapoints
+        
+    def close(self) -> None:
+        '''
+        Closes the memory map of the file in the lazy mode.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if self.lazy:
+            self.datapoints.close()
             
     def __convert_info_buffer__(self, info_buffer : list[str]) -> None:
         '''
@@ -185,8 +411,20 @@ class RawDataFile():
                 if "SAMPLE_MASS" in line:
                     lines[i] : str = line + replace_text
                     break
+        # the memory map has to be released before writing and the offsets of the scans change
+        self.close()
         with open(self.filename, 'w') as file:
             file.writelines(lines)
+        if self.lazy:
+            buffer : bytes | mmap.mmap = self.__map_file__()
+            self.datapoints : LazyRawDataPointContainer = LazyRawDataPointContainer(buffer, read_header(buffer)[1], self.max_resident,
+                                                                                    self.follow)
+            self.parsed_until : int = self.datapoints.stop
+        elif self.follow:
+            with open(self.filename, "rb") as file:
+                buffer : bytes = file.read()
+            scan_starts : np.ndarray = index_scans(buffer, read_header(buffer)[1])
+            self.parsed_until : int = int(scan_starts[len(self)]) if len(scan_starts) > len(self) else len(buffer)
         
     def set_sample_density(self, new_sample_density : float) -> None:
         '''
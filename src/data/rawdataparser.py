@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 20:41:07 2026
+
+@author: kaisjuli
+"""
+import io
+import re
+import locale
+import numpy as np
+
+NEWLINE : int = ord("\n")
+CARRIAGE_RETURN : int = ord("\r")
+COMMA : int = ord(",")
+SEMICOLON : int = ord(";")
+CHUNK_SIZE : int = 2**24
+
+DATA_SECTION_PATTERN : re.Pattern = re.compile(rb"^\[Data\]\r?\n", re.MULTILINE)
+
+INFO_FIELDS : tuple[str, ...] = ("low_temp", "high_temp", "avg_temp", "low_field", "high_field", "drift",
+                                 "slope", "squid_range", "given_center", "calculated_center", "amp_fixed", "amp_free")
+INFO_KEYS : tuple[str, ...] = ("low temp", "high temp", "avg. temp", "low field", "high field", "drift",
+                               "slope", "squid range", "given center", "calculated center", "amp fixed", "amp free")
+INFO_WITHOUT_UNIT : tuple[str, ...] = ("squid range",)
+INFO_DTYPE : np.dtype = np.dtype([(name, float) for name in INFO_FIELDS] +
+                                 [("jump_corrected", bool), ("scan_direction", "U4")])
+# the usual layout of an info line, in which every key occurs once and in the order of INFO_KEYS
+INFO_LINE_PATTERN : re.Pattern = re.compile(
+    "^;" + ";".join(re.escape(key) + (r" = (\S+)" if key in INFO_WITHOUT_UNIT else r" = (\S+) [^;\n]*")
+                    for key in INFO_KEYS) + r"[^\n]*$", re.MULTILINE)
+
+def read_header(buffer : bytes) -> tuple[list[str], int]:
+    '''
+    Reads all lines of the header of a raw datafile up to and including the [Data] line.
+
+    Parameters
+    ----------
+    buffer : bytes
+        The content of the raw datafile.
+
+    Returns
+    -------
+    tuple(list[str], int)
+        The lines of the header and the offset of the first byte after the [Data] line.
+        If the file has no [Data] line, the offset is the length of the buffer.
+
+    '''
+    match : re.Match | None = DATA_SECTION_PATTERN.search(buffer)
+    data_start : int = len(buffer) if match is None else match.end()
+    with io.TextIOWrapper(io.BytesIO(buffer[:data_start])) as file:
+        header_lines : list[str] = file.readlines()
+    return header_lines, data_start
+
+def index_scans(buffer : bytes, start : int = 0, stop : int | None = None, chunk_size : int = CHUNK_SIZE) -> np.ndarray:
+    '''
+    Locates the start of all scan-boundary lines of the data section. The buffer is processed
+    in chunks, so the memory usage does not depend on the size of the file.
+
+    Parameters
+    ----------
+    buffer : bytes
+        The content of the raw datafile.
+    start : int, optional
+        The offset of the first byte of the data section. The default is 0.
+    stop : int | None, optional
+        The offset behind the last byte of the data section. The default is None,
+        which means the end of the buffer.
+    chunk_size : int, optional
+        The number of bytes which are processed at once. The default is CHUNK_SIZE.
+
+    Returns
+    -------
+    np.ndarray
+        The offsets of all lines starting with a semicolon.
+
+    '''
+    stop : int = len(buffer) if stop is None else stop
+    scan_starts : list[np.ndarray] = [np.empty(0, dtype=np.int64)]
+    chunk_start : int = start
+    while chunk_start < stop:
+        chunk_stop : int = min(chunk_start + chunk_size, stop)
+        # the last byte of the previous chunk is needed to recognize a line start
+        offset : int = chunk_start - 1 if chunk_start > start else chunk_start
+        raw : np.ndarray = np.frombuffer(buffer, dtype=np.uint8, count=chunk_stop - offset, offset=offset)
+        is_start : np.ndarray = raw == SEMICOLON
+        is_start[1:] &= raw[:-1] == NEWLINE
+        if offset < chunk_start:
+            is_start[0] = False
+        scan_starts.append(np.flatnonzero(is_start) + offset)
+        chunk_start : int = chunk_stop
+    return np.concatenate(scan_starts)
+
+def split_lines(raw : np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Locates all lines in a byte array.
+
+    Parameters
+    ----------
+    raw : np.ndarray
+        The bytes of the data section as uint8 array.
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray, np.ndarray)
+        The start of each line, the end of each line without the line break and the
+        first character of each line, which is 0 for empty lines.
+
+    '''
+    newlines : np.ndarray = np.flatnonzero(raw == NEWLINE)
+    starts : np.ndarray = np.concatenate(([0], newlines + 1))
+    ends : np.ndarray = np.concatenate((newlines, [raw.size]))
+    first : np.ndarray = np.zeros(starts.size, dtype=np.uint8)
+    if raw.size == 0:
+        return starts, ends, first
+    not_empty : np.ndarray = ends > starts
+    ends[not_empty & (raw[ends - 1] == CARRIAGE_RETURN)] -= 1
+    not_empty : np.ndarray = ends > starts
+    first[not_empty] = raw[starts[not_empty]]
+    return starts, ends, first
+
+def find_data_rows(raw : np.ndarray, starts : np.ndarray, ends : np.ndarray, first : np.ndarray) -> np.ndarray:
+    '''
+    Determines which lines contain a valid row of scan data. A valid row starts with a comma,
+    contains exactly four commas and has a raw position.
+
+    Parameters
+    ----------
+    raw : np.ndarray
+        The bytes of the data section as uint8 array.
+    starts : np.ndarray
+        The start of each line.
+    ends : np.ndarray
+        The end of each line without the line break.
+    first : np.ndarray
+        The first character of each line.
+
+    Returns
+    -------
+    np.ndarray
+        A boolean mask of all lines, which contain scan data.
+
+    '''
+    commas : np.ndarray = np.flatnonzero(raw == COMMA)
+    first_comma : np.ndarray = np.searchsorted(commas, starts)
+    nr_commas : np.ndarray = np.searchsorted(commas, ends) - first_comma
+    is_row : np.ndarray = (first == COMMA) & (nr_commas == 4)
+    has_position : np.ndarray = commas[first_comma[is_row] + 2] - commas[first_comma[is_row] + 1] > 1
+    is_row[is_row] = has_position
+    return is_row
+
+def convert_rows(raw : np.ndarray, starts : np.ndarray, is_row : np.ndarray) -> np.ndarray:
+    '''
+    Converts all valid rows in one pass to a float array.
+
+    Parameters
+    ----------
+    raw : np.ndarray
+        The bytes of the data section as uint8 array.
+    starts : np.ndarray
+        The start of each line.
+    is_row : np.ndarray
+        A boolean mask of all lines, which contain scan data.
+
+    Returns
+    -------
+    np.ndarray
+        The timestamp, raw position, raw voltage and processed voltage of each row.
+
+    '''
+    if not np.any(is_row):
+        return np.empty((0, 4))
+    line_lengths : np.ndarray = np.diff(np.concatenate((starts, [raw.size])))
+    row_bytes : bytes = raw[np.repeat(is_row, line_lengths)].tobytes()
+    return np.loadtxt(io.BytesIO(row_bytes), delimiter=",", usecols=(1, 2, 3, 4),
+                      comments=None, ndmin=2)
+
+def parse_data_section(buffer : bytes, start : int = 0, stop : int | None = None) -> tuple[list[str], np.ndarray, np.ndarray]:
+    '''
+    Parses the data section of a raw datafile. All scan-boundary lines are located at once
+    and all numeric rows are converted in bulk.
+
+    Parameters
+    ----------
+    buffer : bytes
+        The content of the raw datafile.
+    start : int, optional
+        The offset of the first byte of the data section. The default is 0.
+    stop : int | None, optional
+        The offset behind the last byte of the data section. The default is None,
+        which means the end of the buffer.
+
+    Returns
+    -------
+    tuple(list[str], np.ndarray, np.ndarray)
+        The info string of each scan, the rows of all scans and the offsets of the scans
+        in the rows, such that scan i covers the rows offsets[i]:offsets[i+1].
+
+    '''
+    stop : int = len(buffer) if stop is None else stop
+    raw : np.ndarray = np.frombuffer(buffer, dtype=np.uint8, count=stop - start, offset=start)
+    starts, ends, first = split_lines(raw)
+    is_info : np.ndarray = first == SEMICOLON
+    if not np.any(is_info):
+        return [], np.empty((0, 4)), np.zeros(1, dtype=np.int64)
+    is_row : np.ndarray = find_data_rows(raw, starts, ends, first)
+    data : np.ndarray = convert_rows(raw, starts, is_row)
+
+    info_starts : np.ndarray = starts[is_info]
+    # rows in front of the first info line are attached to the first scan
+    row_scan : np.ndarray = np.maximum(np.searchsorted(info_starts, starts[is_row], side="right") - 1, 0)
+    offsets : np.ndarray = np.zeros(info_starts.size + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(row_scan, minlength=info_starts.size))
+
+    encoding : str = locale.getpreferredencoding(False)
+    info_strings : list[str] = [raw[s:e].tobytes().decode(encoding)
+                                for s, e in zip(info_starts.tolist(), ends[is_info].tolist())]
+    return info_strings, data, offsets
+
+def decode_info_strings(info_strings : list[str]) -> np.ndarray:
+    '''
+    Decodes the info strings of many scans at once. Info strings with the usual layout are
+    matched in one pass over all strings, all others are decoded key by key, so reordered
+    keys are found as well. Missing or invalid values are set to NaN.
+
+    Parameters
+    ----------
+    info_strings : list[str]
+        The info strings of the scans.
+
+    Returns
+    -------
+    np.ndarray
+        The secondary information of the scans of the type INFO_DTYPE. jump_corrected and
+        scan_direction keep their defaults False and 'up'.
+
+    '''
+    info : np.ndarray = np.zeros(len(info_strings), dtype=INFO_DTYPE)
+    info["scan_direction"] = "up"
+    if len(info_strings) == 0:
+        return info
+    matches : list[tuple[str, ...]] = INFO_LINE_PATTERN.findall("\n".join(info_strings))
+    if len(matches) != len(info_strings):
+        # at least one line differs from the usual layout
+        matches : list[tuple[str, ...]] = []
+        for info_string in info_strings:
+            match : re.Match | None = INFO_LINE_PATTERN.fullmatch(info_string)
+            matches.append(match.groups() if match else _decode_info_string(info_string))
+    try:
+        values : np.ndarray = np.array(matches, dtype=float)
+    except ValueError:
+        values : np.ndarray = np.array([[_to_float(value) for value in match] for match in matches])
+    for index, name in enumerate(INFO_FIELDS):
+        info[name] = values[:, index]
+    return info
+
+def _decode_info_string(info_string : str) -> tuple[str, ...]:
+    '''
+    Decodes a single info string key by key. The value of a key is taken from the first
+    part of the info string, which contains the key.
+
+    Parameters
+    ----------
+    info_string : str
+        The info string of the scan.
+
+    Returns
+    -------
+    tuple(str, ...)
+        The values in the order of INFO_KEYS. Missing values are 'nan'.
+
+    '''
+    parts : list[str] = info_string.split(";")
+    values : list[str] = []
+    for key in INFO_KEYS:
+        part : str | None = next((part for part in parts if key in part), None)
+        if part is None:
+            values.append("nan")
+            continue
+        words : list[str] = part.split(" ")
+        with_unit : bool = key not in INFO_WITHOUT_UNIT
+        values.append(words[-1 - int(with_unit)].replace("=", "") if len(words) > int(with_unit) else "nan")
+    return tuple(values)
+
+def _to_float(value : str) -> float:
+    '''
+    Converts a value of an info string to float.
+
+    Parameters
+    ----------
+    value : str
+        The value of the info string.
+
+    Returns
+    -------
+    float
+        The converted value or NaN, if the value is invalid.
+
+    '''
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
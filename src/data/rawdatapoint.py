@@ -5,7 +5,9 @@ Created on Mon May 12 11:02:29 2025
 @author: kaisjuli
 """
 import numpy as np
-from numpy.polynomial.polynomial import Polynomial as poly
+
+from .rawdataparser import INFO_FIELDS, INFO_DTYPE, decode_info_strings
+from ..calculation import correct_jumps
 
 class RawDataPoint():
     """
@@ -13,10 +15,14 @@ class RawDataPoint():
     
     Parameters
     ----------
-    info_str : str
-        The secondary information about the datapoint in the raw file.
-    data_list : list[str]
+    info_str : str | np.void
+        The secondary information about the datapoint in the raw file or an already
+        decoded record of the type INFO_DTYPE.
+    data_list : list[list[str]] | np.ndarray
         The measured data of the scan.
+    converted : bool, optional
+        If the data_list is already sorted and jump corrected. In this case jump_corrected
+        and scan_direction are taken from the record. The default is False.
         
     Attributes
     ----------
@@ -67,12 +73,22 @@ class RawDataPoint():
         The processed voltage of the scan.
     """
     
-    def __init__(self, info_str : str, data_list : list[str]) -> None:
+    def __init__(self,
+                 info_str : str | np.void,
+                 data_list : list[list[str]] | np.ndarray,
+                 converted : bool = False
+        ) -> None:
         self.jump_corrected : bool = False
         self.scan_direction : str = "up"
         
-        self.__convert_info_string__(info_str)
-        self.__convert_data_list__(data_list)
+        if isinstance(info_str, str):
+            self.__convert_info_string__(info_str)
+        else:
+            self.__convert_info_record__(info_str, converted)
+        if converted:
+            self.data : np.ndarray = np.asarray(data_list, dtype=float)
+        else:
+            self.__convert_data_list__(data_list)
         return
     
     def __convert_info_string__(self, info_string : str) -> None:
@@ -89,41 +105,45 @@ class RawDataPoint():
         None.
 
         '''
-        def get_info_element(info_list : list[str], key : str, with_unit : bool = True) -> float:
-            '''
-            Gets the information about the specific key with or without the unit from the info_list.
+        self.__convert_info_record__(decode_info_strings([info_string])[0], False)
+        
+    def __convert_info_record__(self, info_record : np.void, converted : bool) -> None:
+        '''
+        Takes the informations from an already decoded record.
 
-            Parameters
-            ----------
-            info_list : list[str]
-                A list of encoded secundary information about the datapoint.
-            key : str
-                The key to be search after.
-            with_unit : bool, optional
-                Determines if the information comes with a unit. The default is True.
+        Parameters
+        ----------
+        info_record : np.void
+            The decoded secundary information about the datapoint of the type INFO_DTYPE.
+        converted : bool
+            If the data is already converted and the state of the conversion is taken
+            from the record as well.
 
-            Returns
-            -------
-            float
-                The specific information from the key.
+        Returns
+        -------
+        None.
 
-            '''
-            result : str = [sub for sub in info_list if key in sub][0]
-            return float(result.split(" ")[-1 - int(with_unit)].replace("=", ""))
-        
-        info_string_splitted : list[str] = info_string.split(";")
-        self.low_temp : float = get_info_element(info_string_splitted, "low temp")
-        self.high_temp : float = get_info_element(info_string_splitted, "high temp")
-        self.avg_temp : float = get_info_element(info_string_splitted, "avg. temp")
-        self.low_field : float = get_info_element(info_string_splitted, "low field")
-        self.high_field : float = get_info_element(info_string_splitted, "high field")
-        self.drift : float = get_info_element(info_string_splitted, "drift")
-        self.slope : float = get_info_element(info_string_splitted, "slope")
-        self.squid_range : float = get_info_element(info_string_splitted, "squid range", False)
-        self.given_center : float = get_info_element(info_string_splitted, "given center")
-        self.calculated_center : float = get_info_element(info_string_splitted, "calculated center")
-        self.amp_fixed : float = get_info_element(info_string_splitted, "amp fixed")
-        self.amp_free : float = get_info_element(info_string_splitted, "amp free")
+        '''
+        values : tuple = info_record.tolist()
+        for name, value in zip(INFO_FIELDS, values):
+            setattr(self, name, value)
+        if converted:
+            self.jump_corrected : bool = values[-2]
+            self.scan_direction : str = values[-1]
+            
+    @property
+    def info_record(self) -> np.void:
+        '''
+        Returns all secundary information and the state of the conversion as a record.
+
+        Returns
+        -------
+        np.void
+            The record of the type INFO_DTYPE.
+
+        '''
+        values : tuple = tuple(getattr(self, name) for name in INFO_FIELDS)
+        return np.array(values + (self.jump_corrected, self.scan_direction), dtype=INFO_DTYPE)[()]
         
     def print_info(self) -> None:
         '''
@@ -148,14 +168,14 @@ class RawDataPoint():
         s += "amp free = {} V\n".format(self.amp_free)
         print(s)
         
-    def __convert_data_list__(self, data_list : list[str]) -> None:
+    def __convert_data_list__(self, data_list : list[list[str]] | np.ndarray) -> None:
         '''
         Converts the given data_list to a numpy array with increasing raw positions.
 
         Parameters
         ----------
-        data_list : list[str]
-            The encoded data_list from the raw file.
+        data_list : list[list[str]] | np.ndarray
+            The encoded or already converted data_list from the raw file.
 
         Returns
         -------
@@ -177,24 +197,8 @@ class RawDataPoint():
         None.
 
         '''
-        self.data : np.ndarray = self.data[np.abs(self.data[:, 2]) < 500, :]
-
-        mean_diff : float = np.mean(np.abs(np.diff(self.data[:, 2])))
-        jump_index : np.ndarray = np.argwhere(np.abs(np.diff(self.data[:, 2])) > 10 * mean_diff)
-
-        for index in jump_index.flatten():
-            self.jump_corrected : bool = True
-            if index > 9:
-                fit_data : np.ndarray = self.data[index-9:index+1, 1:3]
-                fit_func : poly = np.polynomial.Polynomial.fit(fit_data[:, 0], fit_data[:, 1], 2)
-                y_goal : np.ndarray = fit_func(self.data[index+1, 1])
-                self.data[index+1:, 2] += y_goal - self.data[index+1, 2]
-            else:
-                fit_data : np.ndarray = self.data[index+1:index+11, 1:3]
-                fit_func : poly = np.polynomial.Polynomial.fit(fit_data[:, 0], fit_data[:, 1], 2)
-                y_goal : np.ndarray = fit_func(self.data[index, 1])
-                self.data[:index, 2] += y_goal - self.data[index, 2]
-                
+        self.data, _, jump_corrected = correct_jumps(self.data, np.array([0, len(self.data)]))
+        self.jump_corrected : bool = bool(jump_corrected[0])
         
     @property
     def timestamp(self) -> np.ndarray:
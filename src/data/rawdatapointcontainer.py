@@ -4,6 +4,8 @@ Created on Mon May 12 13:36:39 2025
 
 @author: kaisjuli
 """
+import numpy as np
+
 from .rawdatapoint import RawDataPoint
     
 class RawDataPointContainer():
@@ -23,23 +25,30 @@ class RawDataPointContainer():
     def __init__(self) -> None:
         self.container : list[RawDataPoint] = []
         
-    def add(self, info_str : str, data_list : list[str]) -> None:
+    def add(self,
+            info_str : str | np.void,
+            data_list : list[list[str]] | np.ndarray,
+            converted : bool = False
+        ) -> None:
         '''
         Creates a new RawDataPoint and adds it to the container.
 
         Parameters
         ----------
-        info_str : str
-            The secondary information about the datapoint in the raw file.
-        data_list : list[str]
+        info_str : str | np.void
+            The secondary information about the datapoint in the raw file or an already
+            decoded record.
+        data_list : list[list[str]] | np.ndarray
             The measured data of the scan.
+        converted : bool, optional
+            If the data_list is already sorted and jump corrected. The default is False.
 
         Returns
         -------
         None.
 
         '''
-        self.container.append(RawDataPoint(info_str, data_list))
+        self.container.append(RawDataPoint(info_str, data_list, converted))
         
     def remove(self, rawdatapoint : RawDataPoint) -> None:
         '''
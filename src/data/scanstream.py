@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:40 2026
+
+@author: kaisjuli
+"""
+from typing import Iterator
+from itertools import islice
+import numpy as np
+
+from .rawdatafile import RawDataFile
+from .rawdatapoint import RawDataPoint
+from .measurementdatapoint import MeasurementDataPoint
+from ..calculation import FIT_ERRORS, match_background
+from ..constants import DIRECT_MAPPING_MAX_TEMP_DIFF, DIRECT_MAPPING_MAX_FIELD_DIFF
+from ..constants import INDIRECT_MAPPING_MAX_TEMP_DIFF, INDIRECT_MAPPING_MAX_FIELD_DIFF, SCAN_STREAM_BLOCK_SIZE
+
+def iter_scans(filename : str) -> Iterator[RawDataPoint]:
+    '''
+    Yields the raw datapoints of a raw datafile one after another. The file is memory
+    mapped and no raw datapoint is kept, so the memory usage doesn't depend on the
+    length of the file.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the raw datafile.
+
+    Yields
+    ------
+    RawDataPoint
+        The next raw datapoint of the file.
+
+    '''
+    rdf : RawDataFile = RawDataFile(filename, lazy=True, max_resident=0)
+    try:
+        for index in range(len(rdf)):
+            yield rdf[index]
+    finally:
+        rdf.close()
+
+def iter_measurement_points(sample_filename : str,
+                            background_filename : str | None = None,
+                            direct_mapping : bool = True
+                            ) -> Iterator[MeasurementDataPoint]:
+    '''
+    Yields the fitted measurement datapoints of a sample and a background raw datafile one
+    after another. The raw datapoints are paired like in a Measurement and only one pair
+    is kept in memory at once. Datapoints without a matching background or for which the
+    fitting is not possible are skipped.
+
+    Parameters
+    ----------
+    sample_filename : str
+        The filename of the raw datafile of the sample.
+    background_filename : str | None, optional
+        The filename of the raw datafile of the background. The default is None.
+    direct_mapping : bool, optional
+        If the background should be directly mapped on the sample or indirectly.
+        The default is True.
+
+    Yields
+    ------
+    MeasurementDataPoint
+        The next fitted measurement datapoint.
+
+    '''
+    if background_filename is None:
+        pairs : Iterator = ((s, None) for s in iter_scans(sample_filename))
+    elif direct_mapping:
+        pairs : Iterator = ((s, b) for s, b in zip(iter_scans(sample_filename), iter_scans(background_filename))
+                            if abs(s.temperature - b.temperature) <= DIRECT_MAPPING_MAX_TEMP_DIFF
+                            and abs(s.field - b.field) <= DIRECT_MAPPING_MAX_FIELD_DIFF)
+    else:
+        pairs : Iterator = _iter_indirect_pairs(sample_filename, background_filename)
+    for sample_rdp, background_rdp in pairs:
+        try:
+            yield MeasurementDataPoint(sample_rdp, background_rdp)
+        except FIT_ERRORS:
+            pass
+
+def _iter_indirect_pairs(sample_filename : str,
+                         background_filename : str,
+                         max_temp_diff : float = INDIRECT_MAPPING_MAX_TEMP_DIFF,
+                         max_field_diff : float = INDIRECT_MAPPING_MAX_FIELD_DIFF,
+                         block_size : int = SCAN_STREAM_BLOCK_SIZE
+                         ) -> Iterator[tuple[RawDataPoint, RawDataPoint]]:
+    '''
+    Yields every sample raw datapoint with the closest background raw datapoint of the same
+    scan direction like match_background, which matches blocks of block_size sample raw
+    datapoints at once. Only the temperatures, fields and scan directions of the
+    background are kept, the background raw datapoints are read again when they are
+    needed.
+
+    Parameters
+    ----------
+    sample_filename : str
+        The filename of the raw datafile of the sample.
+    background_filename : str
+        The filename of the raw datafile of the background.
+    max_temp_diff : float, optional
+        The maximum temperature difference in K. The default is
+        INDIRECT_MAPPING_MAX_TEMP_DIFF.
+    max_field_diff : float, optional
+        The maximum field difference in Oe. The default is INDIRECT_MAPPING_MAX_FIELD_DIFF.
+    block_size : int, optional
+        The number of sample raw datapoints, which are matched at once. The default is
+        SCAN_STREAM_BLOCK_SIZE.
+
+    Yields
+    ------
+    tuple(RawDataPoint, RawDataPoint)
+        The sample raw datapoint and the matching background raw datapoint.
+
+    '''
+    background_rdf : RawDataFile = RawDataFile(background_filename, lazy=True, max_resident=1)
+    try:
+        bg_temp : np.ndarray = np.zeros(len(background_rdf))
+        bg_field : np.ndarray = np.zeros(len(background_rdf))
+        bg_direction : np.ndarray = np.empty(len(background_rdf), dtype=object)
+        for index in range(len(background_rdf)):
+            b : RawDataPoint = background_rdf[index]
+            bg_temp[index], bg_field[index], bg_direction[index] = b.temperature, b.field, b.scan_direction
+        samples : Iterator[RawDataPoint] = iter_scans(sample_filename)
+        block : list[RawDataPoint] = list(islice(samples, block_size))
+        while len(block) > 0:
+            matches : np.ndarray = match_background([s.temperature for s in block], [s.field for s in block], bg_temp, bg_field,
+                                                    max_temp_diff, max_field_diff, [s.scan_direction for s in block], bg_direction)
+            for s, match in zip(block, matches):
+                if match >= 0:
+                    yield s, background_rdf[int(match)]
+            block : list[RawDataPoint] = list(islice(samples, block_size))
+    finally:
+        background_rdf.close()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:20:12 2026
+
+@author: kaisjuli
+"""
+from __future__ import annotations
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+class SharedArrays():
+    """
+    A class to copy arrays once into shared memory segments, so worker processes can
+    attach them by name instead of receiving pickled copies, and write their results
+    directly into shared output arrays. Used as a context manager, which closes and
+    removes all segments on exit, also if an error occurred.
+
+    Parameters
+    ----------
+    arrays : dict[str, np.ndarray]
+        The arrays to share by their names.
+
+    Attributes
+    ----------
+    descriptors : dict[str, tuple[str, tuple[int, ...], np.dtype]]
+        The name of the segment, the shape and the dtype of every array, which are passed
+        to the worker processes.
+    arrays : dict[str, np.ndarray]
+        The arrays in shared memory.
+    """
+
+    def __init__(self, arrays : dict[str, np.ndarray]) -> None:
+        self.descriptors : dict[str, tuple[str, tuple[int, ...], np.dtype]] = {}
+        self.arrays : dict[str, np.ndarray] = {}
+        self.__segments : list[SharedMemory] = []
+        try:
+            for name, array in arrays.items():
+                array : np.ndarray = np.ascontiguousarray(array)
+                # segments of size zero aren't allowed
+                segment : SharedMemory = SharedMemory(create=True, size=max(array.nbytes, 1))
+                self.__segments.append(segment)
+                self.arrays[name] = np.ndarray(array.shape, array.dtype, buffer=segment.buf)
+                self.arrays[name][...] = array
+                self.descriptors[name] = (segment.name, array.shape, array.dtype)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> SharedArrays:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __getitem__(self, name : str) -> np.ndarray:
+        '''
+        Gets a shared array.
+
+        Parameters
+        ----------
+        name : str
+            The name of the array.
+
+        Returns
+        -------
+        np.ndarray
+            The array in shared memory, which is invalid after closing.
+
+        '''
+        return self.arrays[name]
+
+    def close(self) -> None:
+        '''
+        Closes and removes all segments. Copy the results before.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.arrays : dict[str, np.ndarray] = {}
+        for segment in self.__segments:
+            try:
+                segment.unlink()
+            except OSError:
+                pass
+            try:
+                segment.close()
+            except BufferError:
+                # views of the segment still exist, the memory is freed together with them
+                pass
+        self.__segments : list[SharedMemory] = []
+
+    @staticmethod
+    def attach(descriptors : dict[str, tuple[str, tuple[int, ...], np.dtype]]
+        ) -> tuple[dict[str, np.ndarray], list[SharedMemory]]:
+        '''
+        Attaches the shared arrays in a worker process.
+
+        Parameters
+        ----------
+        descriptors : dict[str, tuple[str, tuple[int, ...], np.dtype]]
+            The descriptors of the arrays.
+
+        Returns
+        -------
+        tuple(dict[str, np.ndarray], list[SharedMemory])
+            The arrays by their names and the segments, which have to be closed by the
+            worker, after it finished using the arrays.
+
+        '''
+        arrays : dict[str, np.ndarray] = {}
+        segments : list[SharedMemory] = []
+        for name, (segment_name, shape, dtype) in descriptors.items():
+            segment : SharedMemory = SharedMemory(name=segment_name)
+            segments.append(segment)
+            arrays[name] = np.ndarray(shape, dtype, buffer=segment.buf)
+        return arrays, segments
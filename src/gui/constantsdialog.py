@@ -9,7 +9,7 @@ import os
 from PyQt5 import uic
 from PyQt5.QtWidgets import QDialog
 
-from ..constants import COIL_RADIUS, COIL_DISTANCE, SYSTEM_CALIBRATION, DC_CALIBRATION_FACTOR
+from .. import constants
 
 class ConstantsDialog(QDialog):
     '''
@@ -35,8 +35,8 @@ class ConstantsDialog(QDialog):
         super().__init__()
         uic.loadUi("/".join(os.path.abspath(__file__).split("\\")[:-1]) + "/ui_files/constants_dialog.ui", self)
         
-        self.coil_radius_sb.setValue(COIL_RADIUS)
-        self.coil_distance_sb.setValue(COIL_DISTANCE)
-        self.system_calibration_sb.setValue(SYSTEM_CALIBRATION)
-        self.dc_calibration_factor_sb.setValue(DC_CALIBRATION_FACTOR)
+        self.coil_radius_sb.setValue(constants.COIL_RADIUS)
+        self.coil_distance_sb.setValue(constants.COIL_DISTANCE)
+        self.system_calibration_sb.setValue(constants.SYSTEM_CALIBRATION)
+        self.dc_calibration_factor_sb.setValue(constants.DC_CALIBRATION_FACTOR)
     
\ No newline at end of file
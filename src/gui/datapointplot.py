@@ -18,7 +18,7 @@ from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 
-from ..calculation import gradiometer_function, subtract_background
+from ..calculation import gradiometer_function
 
 class DatapointPlot(QDialog):
     
@@ -71,7 +71,7 @@ class DatapointPlot(QDialog):
         self.ax.scatter(self.datapoint.sample_rdp.raw_position, self.datapoint.sample_rdp.raw_voltage, picker=True, label="measurement")
         if self.datapoint.background_rdp is not None:
             self.ax.scatter(self.datapoint.background_rdp.raw_position, self.datapoint.background_rdp.raw_voltage, picker=True, label="background measurement")
-            self.ax.scatter(*subtract_background(self.datapoint.sample_rdp, self.datapoint.background_rdp), picker=True, label="without background")
+            self.ax.scatter(*self.datapoint.subtracted_signal, picker=True, label="without background")
         self.ax.plot(self.datapoint.sample_rdp.raw_position, gradiometer_function(self.datapoint.sample_rdp.raw_position, *self.datapoint.datapoint_result["fit_coeff"]), picker=True, label="fit")
         self.figure.legend()
         self.figure_canvas.draw()
@@ -25,7 +25,7 @@ from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 
-from ..calculation import gradiometer_function, gradiometer_function_fixed_center, subtract_background
+from ..calculation import gradiometer_function, gradiometer_function_fixed_center
 from .datapointinfowidget import DatapointInfoWidget
 
 class DatapointPlotDialog(QDialog):
@@ -103,7 +103,7 @@ class DatapointPlotDialog(QDialog):
         self.__fill_legend_labels__(self.background_fit_img_lb, file_prefix + "red_line")
         self.__fill_legend_labels__(self.sample_wo_background_img_lb, file_prefix + "blue_diamond")
         self.__fill_legend_labels__(self.sample_wo_background_fit_img_lb, file_prefix + "blue_line")
-        if self.measurement.background_rdf is None:
+        if not self.measurement.has_background:
             for cb in [self.background_cb, self.background_fit_cb,
                        self.sample_wo_background_cb, self.sample_wo_background_fit_cb]:
                 cb.setEnabled(False)
@@ -224,8 +224,7 @@ class DatapointPlotDialog(QDialog):
                                               color="crimson")
                 
             if self.sample_wo_background_cb.isChecked():
-                self.axes[direction].scatter(*subtract_background(datapoint.sample_rdp,
-                                                                  datapoint.background_rdp),
+                self.axes[direction].scatter(*datapoint.subtracted_signal,
                                              marker="D", c="lightsteelblue", s=10)
             if self.sample_wo_background_fit_cb.isChecked():
                 if self.parent.center_mode == "free":
@@ -383,7 +382,7 @@ class DatapointPlotDialog(QDialog):
         self.copy_sample_fit_action = self.popMenu.addAction("copy sample fit")
         self.copy_sample_fit_action.triggered.connect(self.__copy_sample_fit__)
         
-        if self.measurement.background_rdf is not None:
+        if self.measurement.has_background:
             self.popMenu.addSeparator()
             
             self.copy_background_action = self.popMenu.addAction("copy background")
@@ -450,7 +449,7 @@ class DatapointPlotDialog(QDialog):
     def __copy_sample_without_background__(self, event):
         dp = self.datapoints[self.current_popup_direction]
         final_string = ""
-        for x, y in zip(*subtract_background(dp.sample_rdp, dp.background_rdp)):
+        for x, y in zip(*dp.subtracted_signal):
             final_string += "{}\t{}\n".format(x, y)
         pyperclip.copy(final_string)
         
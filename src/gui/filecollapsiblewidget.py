@@ -12,7 +12,7 @@ from PyQt5 import uic
 from PyQt5.QtWidgets import QWidget, QLabel, QMessageBox, QFileDialog, QInputDialog
 from PyQt5 import QtCore
 
-from ..calculation import gradiometer_function, gradiometer_function_fixed_center, subtract_background
+from ..calculation import gradiometer_function, gradiometer_function_fixed_center
 
 class FileCollapsibleWidget(QWidget):
     
@@ -51,7 +51,7 @@ class FileCollapsibleWidget(QWidget):
         self.insert_one_row("number of datapoints", str(len(self.measurement.sample_rdf)))
         self.insert_one_row("jump corrections", str(self.measurement.nr_jump_corrected_datapoints))
         self.insert_one_row("nonmatching datapoints", str(self.measurement.nr_not_matching_datapoints))
-        self.insert_one_row("background selected", str(True if self.measurement.background_rdf is not None else False))
+        self.insert_one_row("background selected", str(self.measurement.has_background))
         self.insert_one_row("material", str(self.measurement.sample_rdf.sample_material))
         self.insert_one_row("comment", str(self.measurement.sample_rdf.sample_comment))
         self.insert_one_row("mass", str(self.measurement.sample_rdf.sample_mass) + " mg")
@@ -122,6 +122,8 @@ class FileCollapsibleWidget(QWidget):
         if export_filename == "":
             return
         export_filename = export_filename.replace(".rw.dat", '').replace(".dat", '')
+        # the export contains the moments with a free and a fixed center, which are fitted at once
+        self.measurement.datapoints.fit(results=("datapoint_result",))
         
         with open(export_filename + ".dat", "w") as file:
             file.write("[Header]\n")
@@ -188,7 +190,7 @@ class FileCollapsibleWidget(QWidget):
                        "Sample Time Stamp (sec),Sample Raw Position (mm),Sample Raw Voltage (V),Sample Processed Voltage (V),Sample Fixed C Fitted (V),Sample Free C Fitted (V)," \
                        "Background Time Stamp (sec),Background Raw Position (mm),Background Raw Voltage (V),Background Processed Voltage (V),Background Fixed C Fitted (V),Background Free C Fitted (V)," \
                        "Subtracted Raw Position (mm),Subtracted Raw Voltage (V),Subtracted Fixed C Fitted (V),Subtracted Free C Fitted (V)\n")
-            bg = True if self.measurement.background_rdf is not None else False
+            bg = self.measurement.has_background
             for mdp in self.measurement:
                 file.write(";".join(["",
                                      "low temp sample = {} K".format(mdp.sample_rdp.low_temp),
@@ -247,7 +249,7 @@ class FileCollapsibleWidget(QWidget):
                                                      str(background_fixed_c_fitted[index]),
                                                      str(background_free_c_fitted[index])]) + ','*4 + "\n")
                     
-                    pos_wo_bg, voltage_wo_bg = subtract_background(mdp.sample_rdp, mdp.background_rdp)
+                    pos_wo_bg, voltage_wo_bg = mdp.subtracted_signal
                     subtracted_fixed_c_fitted = gradiometer_function_fixed_center(mdp.datapoint_result["fixed_ctr"])(
                         pos_wo_bg,                                                      
                         *mdp.datapoint_result["fit_fixed_ctr_coeff"]
@@ -7,7 +7,7 @@ Created on Tue May 13 09:21:06 2025
 import os
 
 from PyQt5 import uic
-from PyQt5.QtWidgets import QMainWindow, QWidget, QScrollArea, QDockWidget, QVBoxLayout, QTextEdit, QFileDialog
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QScrollArea, QDockWidget, QVBoxLayout, QTextEdit, QFileDialog
 from PyQt5 import QtCore
 
 import numpy as np
@@ -25,10 +25,13 @@ from .myqmdisubwindow import MyQMdiSubWindow
 from .openplotdialog import OpenPlotDialog
 from .multipleplotdialog import MultiplePlotDialog
 from .constantsdialog import ConstantsDialog
-from ..data import Measurement, MeasurementContainer
+from ..data import Measurement, MeasurementContainer, RawDataCache, FitResultCache
 
 class MainWindow(QMainWindow):
     
+    # the background refinement reports from its own thread, the signal passes it on to the GUI thread
+    refinement_progressed = QtCore.pyqtSignal(object, int, int)
+    
     def __init__(self) -> None:
         super().__init__()
         uic.loadUi("/".join(os.path.abspath(__file__).split("\\")[:-1]) + "/ui_files/main_window.ui", self)
@@ -79,8 +82,9 @@ class MainWindow(QMainWindow):
         self.actionminimize_all.triggered.connect(self.minimize_all_mdi_subwindows)
         self.actioncascade.triggered.connect(self.cascade_all_mdi_subwindows)
         self.actiontile.triggered.connect(self.tile_all_mdi_subwindows)
-        self.measurements : MeasurementContainer = MeasurementContainer()
+        self.measurements : MeasurementContainer = MeasurementContainer(RawDataCache(), FitResultCache())
         self.menuConstants.aboutToShow.connect(self.show_constants)
+        self.refinement_progressed.connect(self.report_refinement_progress)
         
         self.showMaximized()
         
@@ -89,10 +93,38 @@ class MainWindow(QMainWindow):
         open_measurement_dialog = OpenMeasurementDialog(self.starting_dir)
         if open_measurement_dialog.exec():
             self.starting_dir : str = "/".join(open_measurement_dialog.sample_filenames[0].split()[:-1])
-            for sample_filename in open_measurement_dialog.sample_filenames:
-                self.add_measurement(sample_filename,
-                                     open_measurement_dialog.background_filename,
-                                     open_measurement_dialog.direct_mapping_cb.isChecked())
+            measurements, errors = self.measurements.add_many(open_measurement_dialog.sample_filenames,
+                                                              open_measurement_dialog.background_filename,
+                                                              open_measurement_dialog.direct_mapping_cb.isChecked(),
+                                                              progress=self.report_loading_progress,
+                                                              quick_look=open_measurement_dialog.quick_look_cb.isChecked(),
+                                                              refinement_progress=self.refinement_progressed.emit)
+            for measurement in measurements:
+                self.show_measurement(measurement)
+                
+    def report_loading_progress(self, nr_done, nr_files, filename, error):
+        if error is None:
+            self._console.append("loaded {} ({}/{})".format(filename.split("/")[-1], nr_done, nr_files))
+        else:
+            self._console.append("<b>loading {} failed:</b> {} ({}/{})".format(filename.split("/")[-1], error, nr_done, nr_files))
+        self.statusbar.showMessage("loading measurements {}/{}".format(nr_done, nr_files))
+        QApplication.processEvents()
+        
+    def report_refinement_progress(self, measurement, nr_done, nr_datapoints):
+        if measurement not in self.measurements.container:
+            return
+        self.statusbar.showMessage("refining {} {}/{}".format(measurement.name, nr_done, nr_datapoints))
+        if nr_done == nr_datapoints:
+            nr_failed = measurement.nr_failed_datapoints
+            if nr_failed == 0:
+                self._console.append("refined {}".format(measurement.name))
+            else:
+                self._console.append("<b>refined {}:</b> {} datapoints couldn't be fitted".format(measurement.name, nr_failed))
+        for index in range(self._file_list.layout().count()):
+            collapsible = self._file_list.layout().itemAt(index).widget()
+            if measurement == collapsible.measurement:
+                for plot_window in collapsible.plot_windows:
+                    plot_window.measurement_dataplot.__replot__()
         
     def convert_measurement_from_scan(self):
         open_measurement_from_scan_dialog = ConvertMeasurementFromScanDialog()
@@ -106,7 +138,9 @@ class MainWindow(QMainWindow):
     
     def add_measurement(self, sample_filename, background_filename, direct_mapping = True):
         measurement = self.measurements.add(sample_filename, background_filename, direct_mapping)
+        self.show_measurement(measurement)
         
+    def show_measurement(self, measurement):
         collapsible = FileCollapsibleWidget(measurement)
         self._file_list.layout().addWidget(collapsible)
         